@@ -62,12 +62,14 @@ def create_app():
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
     # Importation des modèles
-    from app.models import (association, cotisation, event, guidance, member,
-                            transaction)
+    from app.models import (association, collection_version, cotisation, event,
+                            guidance, member, transaction)
     # Enregistrement des blueprints
     from app.routes.auth import auth_bp
     from app.routes.cotisations import cotisations_bp
+    from app.routes.dashboard import dashboard_bp
     from app.routes.events import events_bp
+    from app.routes.exports import exports_bp
     from app.routes.finances import finances_bp
     from app.routes.guidance import guidance_bp
     from app.routes.main import main_bp
@@ -80,6 +82,25 @@ def create_app():
     app.register_blueprint(finances_bp, url_prefix='/api/finances')
     app.register_blueprint(main_bp, url_prefix='/api')
     app.register_blueprint(guidance_bp, url_prefix='/api/guidance')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+
+    # Index des ressources de l'assistant IA tenu à jour à chaque écriture
+    from app.services.guidance_index import register_index_events
+    register_index_events()
+
+    # Versions des collections (ETag des listes) incrémentées à chaque écriture
+    from app.services.collection_versions import register_version_events
+    register_version_events()
+
+    # Cumuls mensuels des finances tenus à jour à chaque écriture
+    from app.services.finance_rollups import register_rollup_events
+    register_rollup_events()
+
+    # Préchargement des modèles IA (évite le temps de chargement à la première requête)
+    if app.config.get('OLLAMA_WARMUP_ON_START') and not app.testing:
+        from app.services.model_warmup import start_model_warmup
+        app.extensions['ollama_keepalive'] = start_model_warmup(app)
 
     # Route de santé pour vérifier l'API et CORS
     @app.route('/health', methods=['GET', 'OPTIONS'])
@@ -4,20 +4,25 @@ from .association import Association
 from .member import Member
 from .cotisation import Cotisation
 from .event import Event
-from .transaction import Transaction, TransactionType
+from .transaction import Transaction, TransactionType, FinanceMonthlyRollup
+from .collection_version import CollectionVersion
 from .guidance import (
     OrganizationalDiagnostic,
     ComplianceCheck,
     Recommendation,
     SmartInsight,
+    InsightBatchRun,
     DocumentTemplate,
     AIQuery,
+    AIConversation,
+    AIJob,
     MaturityLevel,
     ComplianceCategory,
     ComplianceStatus,
     RecommendationPriority,
     RecommendationStatus,
-    InsightType
+    InsightType,
+    AIJobStatus
 )
 
 __all__ = [
@@ -27,16 +32,22 @@ __all__ = [
     'Event',
     'Transaction',
     'TransactionType',
+    'FinanceMonthlyRollup',
+    'CollectionVersion',
     'OrganizationalDiagnostic',
     'ComplianceCheck',
     'Recommendation',
     'SmartInsight',
+    'InsightBatchRun',
     'DocumentTemplate',
     'AIQuery',
+    'AIConversation',
+    'AIJob',
     'MaturityLevel',
     'ComplianceCategory',
     'ComplianceStatus',
     'RecommendationPriority',
     'RecommendationStatus',
-    'InsightType'
+    'InsightType',
+    'AIJobStatus'
 ]
@@ -0,0 +1,26 @@
+from datetime import datetime
+from app import db
+
+class CollectionVersion(db.Model):
+    """Compteur de modifications d'une collection (membres, événements...) d'une association
+    
+    Incrémenté dans la transaction de chaque écriture ; les listes en
+    dérivent leur ETag et répondent 304 sans relire les données.
+    """
+    __tablename__ = 'collection_versions'
+    
+    association_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    collection = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CollectionVersion {self.association_id}/{self.collection} v{self.version}>'
+    
+    def to_dict(self):
+        return {
+            'association_id': str(self.association_id),
+            'collection': self.collection,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
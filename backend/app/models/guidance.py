@@ -55,6 +55,14 @@ class InsightType(Enum):
     ACHIEVEMENT = "achievement"
 
 
+class AIJobStatus(Enum):
+    """Statuts des requêtes IA asynchrones"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class OrganizationalDiagnostic(db.Model):
     """Diagnostic organisationnel d'une association"""
     __tablename__ = 'organizational_diagnostics'
@@ -199,6 +207,7 @@ class SmartInsight(db.Model):
     actions = db.Column(JSON)  # ["Action 1", "Action 2"]
     
     dismissed = db.Column(db.Boolean, default=False)
+    source = db.Column(db.String(50))  # 'nightly' si généré par le traitement nocturne, sinon saisi
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -207,6 +216,7 @@ class SmartInsight(db.Model):
         return {
             'id': self.id,
             'diagnostic_id': self.diagnostic_id,
+            'source': self.source,
             'type': self.type.value,
             'title': self.title,
             'description': self.description,
@@ -220,6 +230,42 @@ class SmartInsight(db.Model):
         }
 
 
+class InsightBatchRun(db.Model):
+    """Exécution du calcul nocturne des insights (point de reprise)"""
+    __tablename__ = 'insight_batch_runs'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='running', index=True)  # running, completed
+    reference_date = db.Column(db.Date, nullable=False)  # Date de calcul, conservée à la reprise
+    
+    # Dernière association traitée : la reprise repart à l'identifiant suivant
+    last_association_id = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)  # Associations sans diagnostic
+    insights_created = db.Column(db.Integer, nullable=False, default=0)
+    elapsed_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'reference_date': self.reference_date.isoformat(),
+            'last_association_id': self.last_association_id,
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'insights_created': self.insights_created,
+            'elapsed_seconds': round(self.elapsed_seconds, 2),
+            'associations_per_second': (round(self.processed / self.elapsed_seconds, 2)
+                                        if self.elapsed_seconds else None),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
 class DocumentTemplate(db.Model):
     """Templates de documents organisationnels"""
     __tablename__ = 'document_templates'
@@ -264,6 +310,7 @@ class AIQuery(db.Model):
     id = db.Column(db.String(36), primary_key=True)
     association_id = db.Column(db.String(36), db.ForeignKey('associations.id'), nullable=False)
     diagnostic_id = db.Column(db.String(36), db.ForeignKey('organizational_diagnostics.id'))
+    conversation_id = db.Column(db.String(36), db.ForeignKey('ai_conversations.id'), index=True)
     
     query = db.Column(db.Text, nullable=False)
     context = db.Column(JSON)  # {currentPage, userRole, maturityLevel}
@@ -272,8 +319,19 @@ class AIQuery(db.Model):
     related_resources = db.Column(JSON)  # ["Resource 1", "Resource 2"]
     follow_up_questions = db.Column(JSON)  # ["Question 1", "Question 2"]
     confidence = db.Column(db.Float)  # 0.0 - 1.0
+    model_used = db.Column(db.String(100))  # Modèle Ollama ayant répondu ('fallback' si indisponible)
+    embedding = db.Column(db.LargeBinary)  # Embedding float32 normalisé de la question (index sémantique)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Télémétrie Ollama (vide pour les réponses réutilisées ou de secours)
+    total_duration_ms = db.Column(db.Float)
+    load_duration_ms = db.Column(db.Float)  # Chargement du modèle (démarrage à froid)
+    prompt_eval_count = db.Column(db.Integer)
+    prompt_eval_duration_ms = db.Column(db.Float)
+    eval_count = db.Column(db.Integer)  # Tokens générés
+    eval_duration_ms = db.Column(db.Float)
+    queue_wait_ms = db.Column(db.Integer)  # Attente dans le contrôle d'admission
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Relations
     association = db.relationship('Association', backref='ai_queries')
@@ -284,6 +342,7 @@ class AIQuery(db.Model):
             'id': self.id,
             'association_id': self.association_id,
             'diagnostic_id': self.diagnostic_id,
+            'conversation_id': self.conversation_id,
             'query': self.query,
             'context': self.context or {},
             'response': self.response,
@@ -291,5 +350,94 @@ class AIQuery(db.Model):
             'related_resources': self.related_resources or [],
             'follow_up_questions': self.follow_up_questions or [],
             'confidence': self.confidence,
+            'model_used': self.model_used,
+            'metrics': {
+                'total_duration_ms': self.total_duration_ms,
+                'load_duration_ms': self.load_duration_ms,
+                'prompt_eval_count': self.prompt_eval_count,
+                'prompt_eval_duration_ms': self.prompt_eval_duration_ms,
+                'eval_count': self.eval_count,
+                'eval_duration_ms': self.eval_duration_ms,
+                'tokens_per_second': self.tokens_per_second,
+                'queue_wait_ms': self.queue_wait_ms
+            },
             'created_at': self.created_at.isoformat()
         }
+    
+    @property
+    def tokens_per_second(self):
+        if not self.eval_count or not self.eval_duration_ms:
+            return None
+        return round(self.eval_count / (self.eval_duration_ms / 1000), 2)
+
+
+class AIConversation(db.Model):
+    """Fil de conversation avec l'assistant IA"""
+    __tablename__ = 'ai_conversations'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    association_id = db.Column(db.String(36), db.ForeignKey('associations.id'), nullable=False, index=True)
+    title = db.Column(db.String(255))
+    
+    # Contexte de l'échange suivant
+    model = db.Column(db.String(100))  # Modèle ayant produit ollama_context
+    ollama_context = db.Column(JSON)  # Tokens 'context' renvoyés par Ollama au dernier tour
+    summary = db.Column(db.Text)  # Résumé des tours sortis de la fenêtre glissante
+    turn_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relations
+    queries = db.relationship('AIQuery', backref='conversation', order_by='AIQuery.created_at',
+                              lazy='dynamic')
+    
+    def to_dict(self, include_turns=False):
+        data = {
+            'id': self.id,
+            'association_id': self.association_id,
+            'title': self.title,
+            'model': self.model,
+            'turn_count': self.turn_count,
+            'summary': self.summary,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+        if include_turns:
+            data['turns'] = [query.to_dict() for query in self.queries]
+        return data
+
+
+class AIJob(db.Model):
+    """Requête IA asynchrone en file d'attente"""
+    __tablename__ = 'ai_jobs'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    association_id = db.Column(db.String(36), db.ForeignKey('associations.id'), nullable=False)
+    status = db.Column(db.Enum(AIJobStatus), default=AIJobStatus.PENDING, nullable=False, index=True)
+    
+    payload = db.Column(JSON, nullable=False)  # {query, context, model, diagnostic_id}
+    ai_query_id = db.Column(db.String(36), db.ForeignKey('ai_queries.id'))
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Relations
+    ai_query = db.relationship('AIQuery')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'association_id': self.association_id,
+            'status': self.status.value,
+            'query': (self.payload or {}).get('query'),
+            'result': self.ai_query.to_dict() if self.ai_query else None,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,6 +1,18 @@
+import unicodedata
 from datetime import datetime
+
+from sqlalchemy import DDL, event
+
 from app import db
 
+
+def normalize_search(text):
+    """Minuscules sans accents ni espaces multiples (recherche insensible aux accents)"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
 class Member(db.Model):
     __tablename__ = 'members'
     
@@ -16,6 +28,31 @@ class Member(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # "nom prénom email" normalisé, indexé en trigrammes (pg_trgm / FTS5) pour la recherche
+    search_text = db.Column(db.Text)
+    
+    # Liste paginée par association dans l'ordre (nom, id)
+    __table_args__ = (
+        db.Index('ix_members_association_last_name_id', 'association_id', 'last_name', 'id'),
+        # Recherche des emails déjà enregistrés sans tenir compte de la casse (import groupé)
+        db.Index('ix_members_email_lower', db.func.lower(email)),
+    )
+    
+    # Champs de l'API et colonnes correspondantes (sélection partielle ?fields=)
+    API_FIELDS = {
+        'id': 'id',
+        'firstName': 'first_name',
+        'lastName': 'last_name',
+        'email': 'email',
+        'phone': 'phone',
+        'role': 'role',
+        'status': 'status',
+        'joinDate': 'join_date',
+        'associationId': 'association_id',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at'
+    }
+    
     # Relations
     cotisations = db.relationship('Cotisation', backref='member', lazy=True, cascade='all, delete-orphan')
     
@@ -23,16 +60,50 @@ class Member(db.Model):
         return f'<Member {self.first_name} {self.last_name}>'
     
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'firstName': self.first_name,
-            'lastName': self.last_name,
-            'email': self.email,
-            'phone': self.phone,
-            'role': self.role,
-            'status': self.status,
-            'joinDate': self.join_date.isoformat() if self.join_date else None,
-            'associationId': str(self.association_id),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_member(self, self.API_FIELDS)
+
+
+@event.listens_for(Member, 'before_insert')
+@event.listens_for(Member, 'before_update')
+def _update_search_text(mapper, connection, member):
+    member.search_text = member_search_text(member.first_name, member.last_name, member.email)
+
+
+def member_search_text(first_name, last_name, email):
+    """Texte indexé d'un membre (à renseigner aussi lors des insertions groupées)"""
+    return normalize_search(f"{last_name or ''} {first_name or ''} {email or ''}")
+
+
+# Index de recherche propre à chaque base, créé avec la table (create_all) comme par la migration
+event.listen(Member.__table__, 'after_create', DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5("
+    "search_text, content='members', content_rowid='id', tokenize='trigram')"
+).execute_if(dialect='sqlite'))
+for _statement in (
+    "CREATE TRIGGER IF NOT EXISTS members_fts_ai AFTER INSERT ON members BEGIN "
+    "INSERT INTO members_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS members_fts_ad AFTER DELETE ON members BEGIN "
+    "INSERT INTO members_fts(members_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS members_fts_au AFTER UPDATE OF search_text ON members BEGIN "
+    "INSERT INTO members_fts(members_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO members_fts(rowid, search_text) VALUES (new.id, new.search_text); END"
+):
+    event.listen(Member.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Member.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS members_fts").execute_if(dialect='sqlite'))
+event.listen(Member.__table__, 'after_create', DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql'))
+event.listen(Member.__table__, 'after_create', DDL(
+    "CREATE INDEX IF NOT EXISTS ix_members_search_text_trgm ON members USING gin (search_text gin_trgm_ops)"
+).execute_if(dialect='postgresql'))
+
+
+def serialize_member(row, fields):
+    """Membre (objet ou ligne SQL partielle) au format de l'API, limité aux champs demandés"""
+    data = {}
+    for field in fields:
+        value = getattr(row, Member.API_FIELDS[field])
+        if field in ('id', 'associationId'):
+            value = str(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        data[field] = value
+    return data
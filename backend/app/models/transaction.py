@@ -38,6 +38,11 @@ class Transaction(db.Model):
     # Relations
     association = db.relationship('Association', backref='transactions')
     
+    # Statistiques et listes par association sur un intervalle de dates
+    __table_args__ = (
+        db.Index('ix_transactions_association_date', 'association_id', 'date'),
+    )
+    
     def to_dict(self):
         """Convertir en dictionnaire pour l'API"""
         return {
@@ -57,3 +62,35 @@ class Transaction(db.Model):
     
     def __repr__(self):
         return f'<Transaction {self.id}: {self.description} - {self.amount}€>'
+
+
+class FinanceMonthlyRollup(db.Model):
+    """Somme et nombre de transactions par mois, type et catégorie d'une association
+    
+    Tenue à jour dans la transaction de chaque écriture (voir
+    services/finance_rollups) ; les statistiques et séries temporelles la
+    lisent au lieu de parcourir les transactions.
+    """
+    __tablename__ = 'finance_monthly_rollups'
+    
+    association_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    type = db.Column(db.Enum(TransactionType), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'association_id': self.association_id,
+            'year': self.year,
+            'month': self.month,
+            'type': self.type.value,
+            'category': self.category,
+            'total': self.total,
+            'count': self.count
+        }
+    
+    def __repr__(self):
+        return f'<FinanceMonthlyRollup {self.association_id} {self.year}-{self.month:02d} {self.type.value} {self.category}>'
@@ -8,6 +8,8 @@ from .events import events_bp
 from .finances import finances_bp
 from .health import health_bp
 from .guidance import guidance_bp
+from .exports import exports_bp
+from .dashboard import dashboard_bp
 
 __all__ = [
     'main_bp',
@@ -17,5 +19,7 @@ __all__ = [
     'events_bp',
     'finances_bp',
     'health_bp',
-    'guidance_bp'
+    'guidance_bp',
+    'exports_bp',
+    'dashboard_bp'
 ]
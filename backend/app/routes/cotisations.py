@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.services.collection_versions import conditional_get
 from app.models.cotisation import Cotisation
 from app.models.member import Member
 from datetime import datetime
@@ -52,6 +53,7 @@ def handle_preflight_stats():
 
 @cotisations_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get('cotisations')
 def get_cotisations():
     try:
         association_id = get_jwt_identity()
@@ -203,6 +205,7 @@ def delete_cotisation(cotisation_id):
 
 @cotisations_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional_get('cotisations', extra=lambda: str(datetime.now().year))  # Année par défaut
 def get_cotisation_stats():
     try:
         association_id = get_jwt_identity()
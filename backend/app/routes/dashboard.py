@@ -0,0 +1,31 @@
+from datetime import date
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.collection_versions import conditional_get
+from app.services.dashboard import dashboard_summary
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+
+@dashboard_bp.route('', methods=['GET'])
+@dashboard_bp.route('/', methods=['GET'])
+@jwt_required()
+@conditional_get('members', 'events', 'cotisations', 'finances', 'guidance', extra=lambda: date.today().isoformat())
+def get_dashboard():
+    """Tableau de bord en un appel : membres, événements à venir, cotisations, solde et recommandations
+    
+    year (défaut : année en cours) choisit l'exercice des cotisations et des
+    finances. L'ETag change avec les données et avec la date du jour
+    (événements « à venir »).
+    """
+    try:
+        association_id = int(get_jwt_identity())
+        year = request.args.get('year', type=int)
+        if year is not None and not 1900 <= year <= 2100:
+            return jsonify({'error': 'Année invalide'}), 400
+        
+        return jsonify(dashboard_summary(association_id, year)), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Erreur lors du calcul du tableau de bord: ' + str(e)}), 500
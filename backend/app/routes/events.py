@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.services.collection_versions import conditional_get
 from app.models.event import Event
 from datetime import datetime
 import traceback
@@ -58,6 +59,7 @@ def handle_preflight_collection():
 
 @events_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get('events')
 def get_events():
     try:
         association_id = get_jwt_identity()
@@ -0,0 +1,36 @@
+from datetime import date
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from app.services.exports import FORMATS, export_chunks
+
+exports_bp = Blueprint('exports', __name__)
+
+
+@exports_bp.route('/<dataset>', methods=['GET'])
+@jwt_required()
+def export_dataset(dataset):
+    """Export d'un jeu de données de l'association (members, events, cotisations, transactions)
+    
+    format=csv (défaut), xlsx ou ndjson. Filtres : status et role (membres),
+    status et type (événements), status et year (cotisations), type et
+    category (transactions). La réponse est diffusée par morceaux.
+    """
+    association_id = get_jwt_identity()
+    export_format = request.args.get('format', 'csv').lower()
+    try:
+        chunks = export_chunks(dataset, export_format, int(association_id), request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    filename = f'{dataset}-{date.today().isoformat()}.{export_format}'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[export_format],
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'  # Pas de mise en tampon par le proxy (nginx)
+        }
+    )
@@ -4,7 +4,9 @@ Routes API pour la gestion des transactions financières
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.services.collection_versions import conditional_get
 from app.models.transaction import Transaction, TransactionType
+from app.services.finance_stats import finance_stats, monthly_series, parse_month
 from datetime import datetime, date
 import traceback
 
@@ -35,6 +37,7 @@ def handle_preflight_stats():
 
 @finances_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get('finances')
 def get_transactions():
     """Récupérer toutes les transactions de l'association"""
     try:
@@ -236,6 +239,7 @@ def delete_transaction(transaction_id):
 
 @finances_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional_get('finances')
 def get_finance_stats():
     """Récupérer les statistiques financières"""
     try:
@@ -244,60 +248,56 @@ def get_finance_stats():
         # Paramètres optionnels
         year = request.args.get('year', '')
         month = request.args.get('month', '')
+        try:
+            year = int(year) if year else None
+            month = int(month) if month else None
+        except ValueError:
+            return jsonify({'error': 'Année et mois doivent être des entiers'}), 400
         
-        # Query de base
-        query = Transaction.query.filter_by(association_id=association_id)
+        # Lecture des cumuls mensuels (quelques lignes par mois)
+        try:
+            result = finance_stats(association_id, year, month)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Filtres temporels
-        if year:
-            query = query.filter(db.extract('year', Transaction.date) == int(year))
-        
-        if month:
-            query = query.filter(db.extract('month', Transaction.date) == int(month))
-        
-        transactions = query.all()
-        
-        # Calculs des statistiques
-        total_income = sum(t.amount for t in transactions if t.type == TransactionType.INCOME)
-        total_expenses = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
-        balance = total_income - total_expenses
-        
-        # Statistiques par catégorie
-        categories_stats = {}
-        for transaction in transactions:
-            cat = transaction.category
-            if cat not in categories_stats:
-                categories_stats[cat] = {'income': 0, 'expenses': 0, 'count': 0}
-            
-            if transaction.type == TransactionType.INCOME:
-                categories_stats[cat]['income'] += transaction.amount
-            else:
-                categories_stats[cat]['expenses'] += transaction.amount
-            
-            categories_stats[cat]['count'] += 1
+        return jsonify(result), 200
         
-        # Transactions récentes
-        recent_transactions = Transaction.query.filter_by(
-            association_id=association_id
-        ).order_by(Transaction.date.desc()).limit(5).all()
+    except Exception as e:
+        return jsonify({'error': 'Erreur lors de la récupération des statistiques: ' + str(e)}), 500
+
+
+@finances_bp.route('/timeseries', methods=['GET'])
+@jwt_required()
+@conditional_get('finances', extra=lambda: date.today().strftime('%Y-%m'))  # Fenêtre par défaut glissante
+def get_finance_timeseries():
+    """Recettes, dépenses et solde mois par mois
+    
+    from et to au format AAAA-MM (défaut : les 12 derniers mois), category
+    en option. Les mois sans transaction figurent avec des totaux nuls.
+    """
+    try:
+        association_id = get_jwt_identity()
         
-        result = {
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'balance': balance,
-            'transactions_count': len(transactions),
-            'categories_stats': categories_stats,
-            'recent_transactions': [t.to_dict() for t in recent_transactions]
-        }
+        today = date.today()
+        try:
+            end = parse_month(request.args['to']) if request.args.get('to') else (today.year, today.month)
+            if request.args.get('from'):
+                start = parse_month(request.args['from'])
+            else:
+                start = (end[0] - 1, end[1] + 1) if end[1] < 12 else (end[0], 1)
+            series = monthly_series(association_id, start, end, request.args.get('category'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify(result), 200
+        return jsonify({'from': series[0]['month'], 'to': series[-1]['month'], 'series': series}), 200
         
     except Exception as e:
-        return jsonify({'error': 'Erreur lors de la récupération des statistiques: ' + str(e)}), 500
+        return jsonify({'error': 'Erreur lors de la récupération de la série financière: ' + str(e)}), 500
 
 
 @finances_bp.route('/categories', methods=['GET'])
 @jwt_required()
+@conditional_get('finances')
 def get_categories():
     """Récupérer les catégories utilisées par l'association"""
     try:
@@ -1,18 +1,21 @@
 """
 Routes API pour le système de guidance organisationnelle
 """
+import itertools
 import uuid
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.services.collection_versions import conditional_get
 from app.models.guidance import (
     OrganizationalDiagnostic,
     ComplianceCheck,
     Recommendation,
     SmartInsight,
     DocumentTemplate,
-    AIQuery,
+    AIJob,
+    AIConversation,
     MaturityLevel,
     ComplianceCategory,
     ComplianceStatus,
@@ -21,6 +24,8 @@ from app.models.guidance import (
     InsightType
 )
 from app.models.association import Association
+from app.services.admission import AdmissionRejected
+from app.services.ai_assistant import ai_result_payload, save_ai_query
 import json
 
 
@@ -33,6 +38,7 @@ guidance_bp = Blueprint('guidance', __name__)
 
 @guidance_bp.route('/diagnostics', methods=['GET'])
 @jwt_required()
+@conditional_get('guidance')
 def get_diagnostics():
     """Récupérer tous les diagnostics de l'association"""
     try:
@@ -161,6 +167,7 @@ def create_diagnostic():
 
 @guidance_bp.route('/recommendations', methods=['GET'])
 @jwt_required()
+@conditional_get('guidance')
 def get_recommendations():
     """Récupérer toutes les recommandations de l'association"""
     try:
@@ -218,6 +225,7 @@ def update_recommendation(recommendation_id):
 
 @guidance_bp.route('/insights', methods=['GET'])
 @jwt_required()
+@conditional_get('guidance')
 def get_insights():
     """Récupérer tous les insights de l'association"""
     try:
@@ -271,6 +279,7 @@ def dismiss_insight(insight_id):
 
 @guidance_bp.route('/compliance', methods=['GET'])
 @jwt_required()
+@conditional_get('guidance')
 def get_compliance_checks():
     """Récupérer toutes les vérifications de conformité"""
     try:
@@ -358,12 +367,69 @@ def get_document_templates():
 # ROUTES ASSISTANT IA
 # =============================================================================
 
+def _sse_event(event, payload):
+    """Formate un événement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _wants_stream(data):
+    """Le client demande-t-il une réponse en flux (SSE) ?"""
+    if data.get('stream'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+
+def _stream_ai_query(ollama_service, association_id, data, context, conversation=None):
+    """Relaie les tokens Ollama en SSE puis enregistre la requête IA"""
+    
+    events = ollama_service.stream_response(
+        query=data['query'],
+        context=context,
+        model=data.get('model'),
+        conversation=conversation
+    )
+    # Le premier événement est attendu ici pour qu'un refus d'admission donne un vrai 429
+    first_event = next(events)
+    
+    def generate():
+        try:
+            for event in itertools.chain([first_event], events):
+                if event['type'] == 'token':
+                    yield _sse_event('token', {'content': event['content']})
+                else:
+                    ai_result = event['result']
+                    record = save_ai_query(association_id, data, context, ai_result)
+                    payload = ai_result_payload(ai_result)
+                    payload['id'] = record.id
+                    payload['conversation_id'] = record.conversation_id
+                    yield _sse_event('done', payload)
+        except Exception as e:
+            db.session.rollback()
+            yield _sse_event('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Pas de mise en tampon côté nginx
+        }
+    )
+
+
+def _admission_rejected_response(error):
+    """Réponse 429 lorsque l'assistant IA est saturé"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+
 @guidance_bp.route('/ai/query', methods=['POST'])
 @jwt_required()
 def ai_query():
     """Soumettre une requête à l'assistant IA avec Ollama"""
     try:
-        from app.services.ollama_service import OllamaService
+        from app.services.ollama_service import get_ollama_service
         
         association_id = get_jwt_identity()
         data = request.get_json()
@@ -371,45 +437,161 @@ def ai_query():
         if 'query' not in data:
             return jsonify({'error': 'Champ query manquant'}), 400
         
-        # Initialiser le service Ollama
-        ollama_service = OllamaService()
+        # Service Ollama partagé par le worker (session HTTP et catalogue en mémoire)
+        ollama_service = get_ollama_service()
         
         # Contexte enrichi pour l'IA
         context = data.get('context', {})
         context['associationId'] = association_id
         
+        # Question de suivi dans un fil de conversation
+        conversation = None
+        if data.get('conversation_id'):
+            from app.services.ai_conversation import conversation_state, get_conversation
+            
+            thread = get_conversation(association_id, data['conversation_id'])
+            if thread is None:
+                return jsonify({'error': 'Conversation non trouvée'}), 404
+            conversation = conversation_state(thread)
+        
+        # Mode asynchrone : la requête est mise en file et traitée par le pool IA
+        if data.get('async'):
+            from app.services.ai_jobs import enqueue_ai_job, get_ai_job_runner
+            
+            runner = get_ai_job_runner()
+            job = enqueue_ai_job(association_id, data, context)
+            runner.submit(job.id)
+            return jsonify({
+                'job_id': job.id,
+                'status': job.status.value,
+                'poll_url': f'/api/guidance/ai/jobs/{job.id}'
+            }), 202
+        
+        # Mode flux : les tokens sont envoyés au client dès leur génération
+        if _wants_stream(data):
+            return _stream_ai_query(ollama_service, association_id, data, context, conversation)
+        
         # Générer la réponse IA
         ai_result = ollama_service.generate_response(
             query=data['query'],
             context=context,
-            model=data.get('model', 'llama2')
+            model=data.get('model'),
+            conversation=conversation
         )
         
         # Enregistrer la requête et la réponse
-        ai_query_record = AIQuery(
-            id=str(uuid.uuid4()),
-            association_id=association_id,
-            diagnostic_id=data.get('diagnostic_id'),
-            query=data['query'],
-            context=context,
-            response=ai_result['response'],
-            suggestions=ai_result['suggestions'],
-            related_resources=ai_result['related_resources'],
-            follow_up_questions=ai_result['follow_up_questions'],
-            confidence=ai_result['confidence']
-        )
+        record = save_ai_query(association_id, data, context, ai_result)
         
-        db.session.add(ai_query_record)
-        db.session.commit()
+        payload = ai_result_payload(ai_result)
+        payload['id'] = record.id
+        payload['conversation_id'] = record.conversation_id
+        return jsonify(payload), 200
+        
+    except AdmissionRejected as e:
+        return _admission_rejected_response(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _persist_batch(association_id, items, results):
+    """Enregistre les réponses d'un lot dans une seule transaction ; retourne les ids par position"""
+    ids = {}
+    for position, ai_result in results.items():
+        item = items[position]
+        record = save_ai_query(association_id, item, item['context'], ai_result, commit=False)
+        ids[position] = record.id
+    db.session.commit()
+    return ids
+
+
+def _stream_ai_batch(association_id, items, mapping, max_in_flight):
+    """Envoie chaque résultat du lot dès qu'il est prêt, puis l'enregistrement groupé"""
+    from flask import current_app
+    from app.services.ai_batch import error_payload, run_batch
+    from app.services.ollama_service import get_ollama_service
+    
+    app = current_app._get_current_object()
+    service = get_ollama_service()
+    
+    def generate():
+        results = {}
+        try:
+            for position, ai_result, error in run_batch(app, service, items, max_in_flight):
+                indexes = [i for i, unique in enumerate(mapping) if unique == position]
+                if error is not None:
+                    yield _sse_event('result', dict(error_payload(error), indexes=indexes))
+                    continue
+                results[position] = ai_result
+                yield _sse_event('result', dict(ai_result_payload(ai_result), indexes=indexes))
+            
+            ids = _persist_batch(association_id, items, results)
+            yield _sse_event('done', {'ids': [ids.get(position) for position in mapping]})
+        except Exception as e:
+            db.session.rollback()
+            yield _sse_event('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@guidance_bp.route('/ai/batch', methods=['POST'])
+@jwt_required()
+def ai_batch():
+    """Soumettre plusieurs requêtes à l'assistant IA en un seul appel
+    
+    Les requêtes identiques ne sont générées qu'une fois ; les autres sont
+    traitées en parallèle dans la limite de générations simultanées.
+    """
+    try:
+        from flask import current_app
+        from app.services.ai_batch import batch_concurrency, error_payload, plan_batch, run_batch
+        from app.services.ollama_service import get_ollama_service
+        
+        association_id = get_jwt_identity()
+        data = request.get_json() or {}
+        queries = data.get('queries')
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'Champ queries manquant'}), 400
+        max_queries = current_app.config.get('AI_BATCH_MAX_QUERIES', 20)
+        if len(queries) > max_queries:
+            return jsonify({'error': f'Maximum {max_queries} requêtes par lot'}), 400
+        
+        try:
+            items, mapping = plan_batch(queries, association_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        service = get_ollama_service()
+        max_in_flight = batch_concurrency(service, data.get('max_in_flight'))
+        
+        if _wants_stream(data):
+            return _stream_ai_batch(association_id, items, mapping, max_in_flight)
+        
+        app = current_app._get_current_object()
+        payloads, results = {}, {}
+        for position, ai_result, error in run_batch(app, service, items, max_in_flight):
+            if error is not None:
+                payloads[position] = error_payload(error)
+            else:
+                results[position] = ai_result
+                payloads[position] = ai_result_payload(ai_result)
+        
+        ids = _persist_batch(association_id, items, results)
+        for position, record_id in ids.items():
+            payloads[position]['id'] = record_id
         
         return jsonify({
-            'response': ai_result['response'],
-            'suggestions': ai_result['suggestions'],
-            'related_resources': ai_result['related_resources'],
-            'follow_up_questions': ai_result['follow_up_questions'],
-            'confidence': ai_result['confidence'],
-            'model_used': ai_result.get('model_used', 'llama2'),
-            'timestamp': ai_result.get('timestamp')
+            'results': [payloads[position] for position in mapping],
+            'unique_queries': len(items),
+            'deduplicated': len(mapping) - len(items)
         }), 200
         
     except Exception as e:
@@ -417,6 +599,152 @@ def ai_query():
         return jsonify({'error': str(e)}), 500
 
 
+@guidance_bp.route('/ai/conversations', methods=['POST'])
+@jwt_required()
+def create_ai_conversation():
+    """Ouvrir un fil de conversation avec l'assistant IA"""
+    try:
+        from app.services.ai_conversation import create_conversation
+        
+        association_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        conversation = create_conversation(association_id, data.get('title'))
+        return jsonify(conversation.to_dict()), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@guidance_bp.route('/ai/conversations', methods=['GET'])
+@jwt_required()
+@conditional_get('conversations')
+def get_ai_conversations():
+    """Conversations récentes de l'association"""
+    try:
+        association_id = get_jwt_identity()
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        conversations = AIConversation.query.filter_by(
+            association_id=association_id
+        ).order_by(AIConversation.updated_at.desc()).limit(limit).all()
+        return jsonify([c.to_dict() for c in conversations]), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@guidance_bp.route('/ai/conversations/<conversation_id>', methods=['GET'])
+@jwt_required()
+def get_ai_conversation(conversation_id):
+    """Détail d'une conversation et de ses échanges"""
+    try:
+        from app.services.ai_conversation import get_conversation
+        
+        conversation = get_conversation(get_jwt_identity(), conversation_id)
+        if conversation is None:
+            return jsonify({'error': 'Conversation non trouvée'}), 404
+        return jsonify(conversation.to_dict(include_turns=True)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@guidance_bp.route('/ai/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_ai_job(job_id):
+    """Suivre une requête IA asynchrone (statut puis résultat)"""
+    try:
+        from app.services.ai_jobs import get_ai_job_runner
+        
+        association_id = get_jwt_identity()
+        
+        # Reprend la file si ce worker vient de (re)démarrer
+        get_ai_job_runner()
+        
+        job = AIJob.query.filter_by(id=job_id, association_id=association_id).first()
+        if not job:
+            return jsonify({'error': 'Requête IA non trouvée'}), 404
+        
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@guidance_bp.route('/ai/admission', methods=['GET'])
+@jwt_required()
+def ai_admission_stats():
+    """État du contrôle d'admission IA du worker courant"""
+    from app.services.ollama_service import get_ollama_service
+    
+    admission = get_ollama_service().admission
+    if admission is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(admission.stats(), enabled=True)), 200
+
+
+@guidance_bp.route('/ai/health', methods=['GET'])
+def ai_health():
+    """État du disjoncteur Ollama (monitoring)"""
+    from app.services.ollama_service import get_ollama_service
+    
+    breaker = get_ollama_service().breaker
+    if breaker is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(breaker.snapshot(), enabled=True)), 200
+
+
+@guidance_bp.route('/ai/cache', methods=['GET'])
+@jwt_required()
+def ai_cache_stats():
+    """Statistiques du cache de réponses IA du worker courant"""
+    from app.services.ollama_service import get_ollama_service
+    
+    service = get_ollama_service()
+    semantic = service.semantic_index.stats() if service.semantic_index is not None else None
+    if service.cache is None:
+        return jsonify({'enabled': False, 'semantic': semantic}), 200
+    return jsonify(dict(service.cache.stats(), enabled=True, semantic=semantic)), 200
+
+
+@guidance_bp.route('/ai/backends', methods=['GET'])
+@jwt_required()
+def ai_backends():
+    """Serveurs Ollama du pool : santé, modèles et requêtes en cours"""
+    from app.services.ollama_service import get_ollama_service
+    
+    return jsonify({'backends': get_ollama_service().pool.stats()}), 200
+
+
+@guidance_bp.route('/ai/routing', methods=['GET'])
+@jwt_required()
+def ai_routing_stats():
+    """Modèles du routage IA et débits mesurés par le worker courant"""
+    from app.services.ollama_service import get_ollama_service
+    
+    router = get_ollama_service().router
+    if router is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(router.stats(), enabled=True)), 200
+
+
+@guidance_bp.route('/ai/telemetry', methods=['GET'])
+@jwt_required()
+def ai_telemetry():
+    """Débit (tokens/s) et percentiles de latence par modèle, à partir des requêtes de l'association
+    
+    Paramètre : days (fenêtre, 7 par défaut). Vue de toute l'instance : flask ai-telemetry.
+    """
+    try:
+        from app.services.ai_telemetry import telemetry_summary
+        
+        association_id = get_jwt_identity()
+        days = min(max(request.args.get('days', 7, type=int), 1), 365)
+        return jsonify(telemetry_summary(days, association_id)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 # =============================================================================
 # ROUTES STATISTIQUES & ANALYTICS
 # =============================================================================
@@ -1,47 +1,124 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models.member import Member
+from app.services.collection_versions import conditional_get
+from app.models.member import Member, serialize_member
+from app.services.member_import import ImportFileError, import_members
+from app.services.member_search import TYPEAHEAD_FIELDS, TYPEAHEAD_MAX_LIMIT, search_filter, typeahead
+from app.services.pagination import decode_cursor, encode_cursor, page_response, parse_fields, parse_limit
+from sqlalchemy import func, tuple_
 from app.models.association import Association
 import traceback
 
 members_bp = Blueprint('members', __name__)
 
+# Tris disponibles pour la pagination par clé : colonnes de la clé, dans l'ordre
+SORT_KEYS = {
+    'name': (Member.last_name, Member.id),
+    'id': (Member.id,)
+}
+
+
+def _member_filters(association_id):
+    """Critères communs à la liste et au comptage des membres"""
+    search = request.args.get('search', '')
+    role = request.args.get('role', '')
+    status = request.args.get('status', '')
+    
+    criteria = [Member.association_id == association_id]
+    matches = search_filter(search) if search else None
+    if matches is not None:
+        criteria.append(matches)
+    if role:
+        criteria.append(Member.role == role)
+    if status:
+        criteria.append(Member.status == status)
+    return criteria
+
+
 @members_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get('members')
 def get_members():
+    """Liste des membres
+    
+    Sans limit ni cursor : liste complète (format historique). Avec limit et/ou
+    cursor : page {items, next_cursor, has_more} triée par (last_name, id)
+    ou par id (sort=id) ; include_total=true ajoute le nombre total.
+    fields=firstName,lastName,... ne lit que les colonnes demandées.
+    """
     try:
         association_id = get_jwt_identity()
+        criteria = _member_filters(association_id)
+        paginated = 'limit' in request.args or 'cursor' in request.args
+        
+        try:
+            fields = parse_fields(request.args.get('fields'), Member.API_FIELDS)
+            sort = request.args.get('sort', 'name')
+            if sort not in SORT_KEYS:
+                raise ValueError('Tri inconnu (name ou id)')
+            key_columns = SORT_KEYS[sort]
+            limit = parse_limit(request.args.get('limit')) if paginated else None
+            after = None
+            if request.args.get('cursor'):
+                after = decode_cursor(request.args['cursor'], sort, len(key_columns))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not paginated and fields is None:
+            members = Member.query.filter(*criteria).all()
+            return jsonify([member.to_dict() for member in members]), 200
         
-        # Paramètres de filtrage
-        search = request.args.get('search', '')
-        role = request.args.get('role', '')
-        status = request.args.get('status', '')
+        fields = fields or list(Member.API_FIELDS)
+        # Seules les colonnes demandées (et celles de la clé de tri) sont lues
+        names = [Member.API_FIELDS[field] for field in fields]
+        names += [column.key for column in key_columns if column.key not in names]
+        query = db.session.query(*[getattr(Member, name) for name in names]).filter(*criteria)
         
-        # Query de base
-        query = Member.query.filter_by(association_id=association_id)
+        if not paginated:
+            return jsonify([serialize_member(row, fields) for row in query.all()]), 200
         
-        # Filtres
-        if search:
-            query = query.filter(
-                (Member.first_name.ilike(f'%{search}%')) |
-                (Member.last_name.ilike(f'%{search}%')) |
-                (Member.email.ilike(f'%{search}%'))
-            )
+        if after is not None:
+            query = query.filter(tuple_(*key_columns) > tuple_(*after))
+        rows = query.order_by(*key_columns).limit(limit + 1).all()
         
-        if role:
-            query = query.filter_by(role=role)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort, [getattr(last, column.key) for column in key_columns])
         
-        if status:
-            query = query.filter_by(status=status)
+        total = None
+        if request.args.get('include_total', '').lower() in ('1', 'true'):
+            total = db.session.query(func.count(Member.id)).filter(*criteria).scalar()
         
-        members = query.all()
-        return jsonify([member.to_dict() for member in members]), 200
+        return jsonify(page_response([serialize_member(row, fields) for row in rows], next_cursor, total)), 200
         
     except Exception as e:
         import traceback
         return jsonify({'error': 'Erreur lors de la récupération des membres', 'details': str(e), 'trace': traceback.format_exc()}), 500
 
+@members_bp.route('/search', methods=['GET'])
+@jwt_required()
+@conditional_get('members')
+def search_members():
+    """Autocomplétion : meilleures correspondances de q (nom, prénom ou email, sans accents)"""
+    try:
+        association_id = get_jwt_identity()
+        term = request.args.get('q', '')
+        try:
+            limit = int(request.args.get('limit') or 10)
+        except ValueError:
+            return jsonify({'error': 'limit doit être un entier'}), 400
+        if limit < 1:
+            return jsonify({'error': 'limit doit être positif'}), 400
+        
+        rows = typeahead(association_id, term, min(limit, TYPEAHEAD_MAX_LIMIT))
+        return jsonify({'query': term, 'results': [serialize_member(row, TYPEAHEAD_FIELDS) for row in rows]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Erreur lors de la recherche des membres', 'details': str(e)}), 500
+
 @members_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_member():
@@ -79,6 +156,36 @@ def create_member():
         db.session.rollback()
         return jsonify({'error': 'Erreur lors de la création du membre: ' + str(e)}), 500
 
+@members_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_members_file():
+    """Import groupé de membres (champ multipart file, CSV ou XLSX)
+    
+    Colonnes : prénom, nom, email, téléphone, et en option rôle et statut.
+    Répond avec le bilan {rows, imported, rejected, errors[{line, email, error}]} ;
+    dry_run=true valide le fichier sans rien enregistrer.
+    """
+    try:
+        association_id = get_jwt_identity()
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'error': 'Aucun fichier fourni'}), 400
+        
+        extension = upload.filename.rsplit('.', 1)[-1].lower() if '.' in upload.filename else ''
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true')
+        try:
+            report = import_members(upload.stream, extension, int(association_id), dry_run=dry_run)
+        except ImportFileError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result = report.to_dict()
+        result['dry_run'] = dry_run
+        return jsonify(result), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': "Erreur lors de l'import des membres: " + str(e)}), 500
+
 @members_bp.route('/<int:member_id>', methods=['GET', 'OPTIONS'])
 @members_bp.route('/<int:member_id>/', methods=['GET', 'OPTIONS'])
 def get_member(member_id):
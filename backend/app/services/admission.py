@@ -0,0 +1,155 @@
+# Contrôle d'admission des générations IA avec file équitable par association
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class AdmissionRejected(Exception):
+    """File d'attente pleine ou délai d'attente dépassé"""
+
+    def __init__(self, retry_after: int, message: str = "Assistant IA saturé, réessayez plus tard"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('tenant', 'start_tag', 'finish_tag', 'granted', 'cancelled', 'event')
+
+    def __init__(self, tenant: str, start_tag: float, finish_tag: float):
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.granted = False
+        self.cancelled = False
+        self.event = threading.Event()
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Lit des poids au format 'association_id:poids,association_id:poids'"""
+    weights = {}
+    for item in (value or '').split(','):
+        if ':' in item:
+            tenant, weight = item.split(':', 1)
+            weights[tenant.strip()] = float(weight)
+    return weights
+
+
+class FairAdmissionController:
+    """Limite le nombre de générations simultanées et partage l'attente entre associations.
+
+    Au-delà de max_in_flight, les demandes attendent dans une file ordonnée par
+    étiquette de fin virtuelle (weighted fair queuing) : une association très
+    active n'avance qu'à proportion de son poids, les autres passent devant.
+    Quand la file est pleine, la demande est refusée avec un délai de réessai.
+    """
+
+    def __init__(self, max_in_flight: int = 2, max_queue: int = 16, queue_timeout: float = 30.0,
+                 weights: Optional[Dict[str, float]] = None, max_queue_per_tenant: Optional[int] = None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_per_tenant = max_queue_per_tenant or max_queue
+        self.queue_timeout = queue_timeout
+        self.weights = weights or {}
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._heap: List[Any] = []
+        self._queued_by_tenant: Dict[str, int] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        self._avg_service_time = 5.0  # secondes, moyenne glissante
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _weight(self, tenant: str) -> float:
+        return max(self.weights.get(tenant, 1.0), 0.01)
+
+    def _queued(self) -> int:
+        return sum(self._queued_by_tenant.values())
+
+    def _retry_after(self) -> int:
+        """Estimation du temps avant qu'une place se libère"""
+        rounds = (self._queued() + 1) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(rounds * self._avg_service_time))
+
+    def acquire(self, tenant: str) -> float:
+        """Réserve une place ; retourne le temps d'attente en secondes"""
+        tenant = str(tenant or '')
+        started = time.monotonic()
+
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._heap:
+                self._in_flight += 1
+                self.admitted += 1
+                return 0.0
+
+            if (self._queued() >= self.max_queue or
+                    self._queued_by_tenant.get(tenant, 0) >= self.max_queue_per_tenant):
+                self.rejected += 1
+                raise AdmissionRejected(self._retry_after())
+
+            start_tag = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+            finish_tag = start_tag + 1.0 / self._weight(tenant)
+            self._last_finish[tenant] = finish_tag
+            waiter = _Waiter(tenant, start_tag, finish_tag)
+            heapq.heappush(self._heap, (finish_tag, next(self._sequence), waiter))
+            self._queued_by_tenant[tenant] = self._queued_by_tenant.get(tenant, 0) + 1
+
+        waiter.event.wait(self.queue_timeout)
+
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued_by_tenant[tenant] -= 1
+                self.timed_out += 1
+                raise AdmissionRejected(self._retry_after())
+            self.admitted += 1
+        return time.monotonic() - started
+
+    def release(self, service_time: Optional[float] = None):
+        """Libère une place et la donne à la demande en attente la plus prioritaire"""
+        with self._lock:
+            if service_time is not None:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                self._queued_by_tenant[waiter.tenant] -= 1
+                self._virtual_time = max(self._virtual_time, waiter.start_tag)
+                waiter.granted = True
+                waiter.event.set()
+                return  # La place passe directement à la demande réveillée
+            self._in_flight -= 1
+
+    @contextmanager
+    def slot(self, tenant: str) -> Iterator[float]:
+        """Contexte réservant une place pendant la génération ; fournit le temps d'attente"""
+        wait_time = self.acquire(tenant)
+        started = time.monotonic()
+        try:
+            yield wait_time
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """État du limiteur pour le monitoring"""
+        with self._lock:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'in_flight': self._in_flight,
+                'queued': self._queued(),
+                'max_queue': self.max_queue,
+                'queued_by_association': {t: n for t, n in self._queued_by_tenant.items() if n},
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_service_time': round(self._avg_service_time, 3)
+            }
@@ -0,0 +1,71 @@
+# Enregistrement et mise en forme des échanges avec l'assistant IA
+import uuid
+from typing import Any, Dict, Optional
+
+from app import db
+from app.models.guidance import AIConversation, AIQuery
+from app.services.ai_telemetry import telemetry_fields
+
+
+def save_ai_query(association_id: str, data: Dict[str, Any], context: Dict[str, Any],
+                  ai_result: Dict[str, Any], commit: bool = True) -> AIQuery:
+    """Enregistre la requête IA et sa réponse (et le tour de conversation le cas échéant)"""
+    record_id = str(uuid.uuid4())
+    # Une réponse de conversation dépend des échanges précédents : pas de réutilisation
+    embedding = None if data.get('conversation_id') else _index_answer(record_id, data['query'], context, ai_result)
+    ai_query_record = AIQuery(
+        id=record_id,
+        association_id=association_id,
+        diagnostic_id=data.get('diagnostic_id'),
+        conversation_id=data.get('conversation_id'),
+        query=data['query'],
+        context=context,
+        response=ai_result['response'],
+        suggestions=ai_result['suggestions'],
+        related_resources=ai_result['related_resources'],
+        follow_up_questions=ai_result['follow_up_questions'],
+        confidence=ai_result['confidence'],
+        model_used=ai_result.get('model_used'),
+        embedding=embedding,
+        **telemetry_fields(ai_result)
+    )
+
+    db.session.add(ai_query_record)
+    if ai_query_record.conversation_id:
+        from app.services.ai_conversation import record_turn
+        
+        conversation = db.session.get(AIConversation, ai_query_record.conversation_id)
+        if conversation is not None:
+            record_turn(conversation, data['query'], ai_result)
+    if commit:
+        db.session.commit()
+    return ai_query_record
+
+
+def _index_answer(record_id: str, query: str, context: Dict[str, Any],
+                  ai_result: Dict[str, Any]) -> Optional[bytes]:
+    """Ajoute une réponse générée à l'index sémantique ; retourne l'embedding à stocker"""
+    from app.services.ollama_service import get_ollama_service
+    from app.services.semantic_index import encode_embedding
+
+    if ai_result.get('model_used') == 'fallback' or ai_result.get('cached') or ai_result.get('incomplete'):
+        return None
+    service = get_ollama_service()
+    if not service.semantic_index_available():
+        return None
+    vector = service.semantic_index.add(record_id, query, context, ai_result)
+    return encode_embedding(vector) if vector is not None else None
+
+
+def ai_result_payload(ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Réponse JSON renvoyée au client pour un résultat IA"""
+    return {
+        'response': ai_result['response'],
+        'suggestions': ai_result['suggestions'],
+        'related_resources': ai_result['related_resources'],
+        'follow_up_questions': ai_result['follow_up_questions'],
+        'confidence': ai_result['confidence'],
+        'model_used': ai_result.get('model_used'),
+        'timestamp': ai_result.get('timestamp'),
+        'metrics': ai_result.get('metrics')
+    }
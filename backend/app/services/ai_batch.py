@@ -0,0 +1,82 @@
+# Requêtes IA groupées : dédoublonnage puis génération concurrente
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask
+
+from app import db
+from app.services.admission import AdmissionRejected
+from app.services.ai_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def plan_batch(queries: List[Any], association_id: str) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Dédoublonne les requêtes d'un lot.
+
+    Retourne (requêtes uniques, position de la requête unique pour chaque
+    entrée du lot). Deux entrées sont identiques si elles ont la même clé de
+    cache (question normalisée + contexte du prompt) et le même modèle.
+    Lève ValueError si une entrée n'a pas de question.
+    """
+    unique: List[Dict[str, Any]] = []
+    positions: Dict[Tuple, int] = {}
+    mapping: List[int] = []
+    for entry in queries:
+        if isinstance(entry, str):
+            entry = {'query': entry}
+        if not isinstance(entry, dict) or not str(entry.get('query') or '').strip():
+            raise ValueError('Chaque requête du lot doit contenir un champ query')
+
+        context = dict(entry.get('context') or {})
+        context['associationId'] = association_id
+        key = (make_cache_key(entry['query'], context), entry.get('model'))
+        if key not in positions:
+            positions[key] = len(unique)
+            unique.append({
+                'query': entry['query'],
+                'context': context,
+                'model': entry.get('model'),
+                'diagnostic_id': entry.get('diagnostic_id')
+            })
+        mapping.append(positions[key])
+    return unique, mapping
+
+
+def batch_concurrency(service, requested: Optional[int] = None) -> int:
+    """Générations simultanées d'un lot : jamais plus que la limite d'admission"""
+    limit = service.admission.max_in_flight if service.admission else len(service.pool.backends)
+    if requested:
+        limit = min(limit, requested)
+    return max(1, limit)
+
+
+def run_batch(app: Flask, service, items: List[Dict[str, Any]],
+              max_in_flight: int) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """Génère les réponses en parallèle ; produit (position, résultat, erreur) dans l'ordre d'achèvement"""
+
+    def generate(item):
+        with app.app_context():
+            try:
+                return service.generate_response(query=item['query'], context=item['context'],
+                                                 model=item['model'])
+            finally:
+                db.session.remove()
+
+    workers = max(1, min(max_in_flight, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-batch') as executor:
+        futures = {executor.submit(generate, item): position for position, item in enumerate(items)}
+        for future in as_completed(futures):
+            error = future.exception()
+            if error is not None and not isinstance(error, AdmissionRejected):
+                logger.error(f"Erreur génération IA (lot): {error}")
+            yield futures[future], (None if error else future.result()), error
+
+
+def error_payload(error: Exception) -> Dict[str, Any]:
+    """Résultat d'une requête du lot en échec"""
+    payload = {'error': str(error)}
+    if isinstance(error, AdmissionRejected):
+        payload['retry_after'] = error.retry_after
+    return payload
@@ -0,0 +1,114 @@
+# Cache des réponses de l'assistant IA
+import copy
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Champs du contexte dont dépend le prompt organisationnel
+# (l'association aussi : le prompt contient des extraits de ses propres ressources)
+CONTEXT_KEY_FIELDS = ('maturityLevel', 'currentPage', 'userRole', 'associationId')
+
+# Champs propres à une génération, non conservés en cache
+GENERATION_FIELDS = ('metrics', 'queue_wait_ms')
+
+
+def normalize_query(query: str) -> str:
+    """Normalise une question : minuscules, sans accents ni ponctuation finale"""
+    text = unicodedata.normalize('NFKD', query or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return text.rstrip(' ?!.;:')
+
+
+def make_cache_key(query: str, context: Dict[str, Any]) -> Tuple:
+    """Clé de cache : question normalisée + champs de contexte utilisés par le prompt"""
+    context = context or {}
+    return (normalize_query(query),) + tuple(str(context.get(field, '')) for field in CONTEXT_KEY_FIELDS)
+
+
+class AIResponseCache:
+    """Cache LRU avec expiration des réponses IA enrichies"""
+
+    def __init__(self, max_entries: int = 500, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Retourne une copie de la réponse en cache, ou None"""
+        key = make_cache_key(query, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = copy.deepcopy(entry[1])
+
+        result['cached'] = True
+        result['timestamp'] = datetime.utcnow().isoformat()
+        return result
+
+    def set(self, query: str, context: Dict[str, Any], result: Dict[str, Any]):
+        """Mémorise une réponse (les réponses de secours ne sont jamais mises en cache)"""
+        if result.get('model_used') == 'fallback':
+            return
+        key = make_cache_key(query, context)
+        # Les mesures appartiennent à la génération d'origine, pas aux réponses servies depuis le cache
+        result = {field: value for field, value in result.items() if field not in GENERATION_FIELDS}
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def warm_up(self, records: Iterable[Any]) -> int:
+        """Préremplit le cache à partir d'objets AIQuery (du plus ancien au plus récent)"""
+        count = 0
+        for record in records:
+            self.set(record.query, record.context or {}, {
+                'response': record.response,
+                'suggestions': record.suggestions or [],
+                'related_resources': record.related_resources or [],
+                'follow_up_questions': record.follow_up_questions or [],
+                'confidence': record.confidence,
+                'model_used': record.model_used,
+                'timestamp': record.created_at.isoformat() if record.created_at else None
+            })
+            count += 1
+        logger.info(f"Cache IA préchargé avec {count} réponses")
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs de cache pour le monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,105 @@
+# Fils de conversation de l'assistant IA : contexte borné d'un tour à l'autre
+import re
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app import db
+from app.models.guidance import AIConversation, AIQuery
+from app.services.generation_budget import estimate_tokens, trim_to_tokens
+
+# Tours conservés mot pour mot dans le prompt (les plus anciens passent dans le résumé)
+WINDOW_TURNS = 3
+
+# Budgets en tokens du résumé stocké et d'une réponse citée dans l'historique
+SUMMARY_TOKENS = 200
+ANSWER_TOKENS = 150
+
+
+def create_conversation(association_id: str, title: Optional[str] = None) -> AIConversation:
+    conversation = AIConversation(id=str(uuid.uuid4()), association_id=association_id,
+                                  title=title, turn_count=0)
+    db.session.add(conversation)
+    db.session.commit()
+    return conversation
+
+
+def get_conversation(association_id: str, conversation_id: str) -> Optional[AIConversation]:
+    """Conversation de l'association, None si elle n'existe pas ou appartient à une autre"""
+    conversation = db.session.get(AIConversation, conversation_id)
+    if conversation is None or conversation.association_id != association_id:
+        return None
+    return conversation
+
+
+def conversation_state(conversation: AIConversation) -> Dict[str, Any]:
+    """État transmis au service Ollama : contexte Ollama, résumé et derniers tours"""
+    recent = db.session.query(AIQuery.query, AIQuery.response).filter(
+        AIQuery.conversation_id == conversation.id
+    ).order_by(AIQuery.created_at.desc()).limit(WINDOW_TURNS).all()
+    return {
+        'id': conversation.id,
+        'model': conversation.model,
+        'ollama_context': conversation.ollama_context,
+        'summary': conversation.summary or '',
+        'turns': [(query, response) for query, response in reversed(recent)]
+    }
+
+
+def _first_sentence(text: str, max_words: int = 30) -> str:
+    sentence = re.split(r'(?<=[.!?])\s', (text or '').strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return ' '.join(words[:max_words]) + (' …' if len(words) > max_words else '')
+
+
+def summarize_turn(query: str, response: str) -> str:
+    """Résumé extractif d'un tour : la question et la première phrase de la réponse"""
+    return f"- {query.strip()} → {_first_sentence(response)}"
+
+
+def build_history(state: Dict[str, Any], max_tokens: int) -> str:
+    """Bloc d'historique pour le prompt, borné à max_tokens quel que soit le nombre de tours.
+
+    Les derniers tours sont cités (réponses tronquées), du plus récent au plus
+    ancien tant que le budget le permet ; le reste du budget va au résumé.
+    """
+    if max_tokens <= 0 or not (state.get('turns') or state.get('summary')):
+        return ''
+
+    remaining = max_tokens
+    exchanges: List[str] = []
+    for query, response in reversed(state.get('turns') or []):
+        exchange = f"Q: {query.strip()}\nR: {trim_to_tokens(response.strip(), ANSWER_TOKENS)}"
+        tokens = estimate_tokens(exchange)
+        if tokens > remaining:
+            break
+        exchanges.insert(0, exchange)
+        remaining -= tokens
+
+    blocks = []
+    summary = state.get('summary') or ''
+    if summary and remaining > 32:
+        blocks.append("RÉSUMÉ DES ÉCHANGES PRÉCÉDENTS:\n" + trim_to_tokens(summary, remaining - 16, keep='tail'))
+    if exchanges:
+        blocks.append("DERNIERS ÉCHANGES:\n" + '\n'.join(exchanges))
+    return '\n\n'.join(blocks) + '\n\n' if blocks else ''
+
+
+def record_turn(conversation: AIConversation, query: str, ai_result: Dict[str, Any]):
+    """Met à jour la conversation après l'enregistrement d'un tour (sans commit)"""
+    conversation.turn_count = (conversation.turn_count or 0) + 1
+    if not conversation.title:
+        conversation.title = query.strip()[:255]
+
+    if ai_result.get('model_used') != 'fallback':
+        # Tokens valables uniquement avec le modèle qui les a produits
+        conversation.model = ai_result.get('model_used')
+        conversation.ollama_context = ai_result.get('ollama_context')
+
+    # Le tour qui sort de la fenêtre glissante rejoint le résumé
+    recent = db.session.query(AIQuery.query, AIQuery.response).filter(
+        AIQuery.conversation_id == conversation.id
+    ).order_by(AIQuery.created_at.desc()).limit(WINDOW_TURNS + 1).all()
+    if len(recent) > WINDOW_TURNS:
+        evicted_query, evicted_response = recent[-1]
+        summary = '\n'.join(filter(None, [conversation.summary, summarize_turn(evicted_query, evicted_response)]))
+        conversation.summary = trim_to_tokens(summary, SUMMARY_TOKENS, keep='tail')
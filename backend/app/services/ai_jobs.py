@@ -0,0 +1,230 @@
+# File d'attente persistante des requêtes IA asynchrones
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from flask import Flask, current_app
+
+from app import db
+from app.models.guidance import AIJob, AIJobStatus
+from app.services.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_ai_job(association_id: str, data: Dict[str, Any], context: Dict[str, Any]) -> AIJob:
+    """Enregistre une requête IA à traiter en arrière-plan"""
+    job = AIJob(
+        id=str(uuid.uuid4()),
+        association_id=association_id,
+        status=AIJobStatus.PENDING,
+        payload={
+            'query': data['query'],
+            'context': context,
+            'model': data.get('model'),
+            'diagnostic_id': data.get('diagnostic_id'),
+            'conversation_id': data.get('conversation_id')
+        }
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+class AIJobRunner:
+    """Pool borné de threads exécutant les requêtes IA stockées en base.
+
+    L'état des requêtes vit dans la table ai_jobs : une requête en attente
+    survit au redémarrage d'un worker et est reprise par le premier runner
+    qui appelle recover().
+    """
+
+    def __init__(self, app: Flask, max_workers: int = 2, stale_after: int = 300, max_attempts: int = 3):
+        self.app = app
+        self.max_workers = max_workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-job')
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str) -> Future:
+        """Planifie l'exécution d'une requête dans le pool"""
+        future = self.executor.submit(self._run_in_context, job_id)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def wait_idle(self, timeout: Optional[float] = None):
+        """Attend la fin des requêtes planifiées par ce runner"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+    def recover(self) -> int:
+        """Remet en file les requêtes abandonnées et planifie toutes celles en attente"""
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        db.session.query(AIJob).filter(
+            AIJob.status == AIJobStatus.RUNNING,
+            AIJob.started_at < stale_before
+        ).update({AIJob.status: AIJobStatus.PENDING}, synchronize_session=False)
+        db.session.commit()
+
+        pending_ids = [job_id for (job_id,) in db.session.query(AIJob.id).filter(
+            AIJob.status == AIJobStatus.PENDING
+        ).order_by(AIJob.created_at).all()]
+        for job_id in pending_ids:
+            self.submit(job_id)
+        if pending_ids:
+            logger.info(f"{len(pending_ids)} requêtes IA reprises")
+        return len(pending_ids)
+
+    def _run_in_context(self, job_id: str):
+        with self.app.app_context():
+            try:
+                self.run_job(job_id)
+            finally:
+                db.session.remove()
+
+    def _claim(self, job_id: str) -> bool:
+        """Passe la requête en cours d'exécution, sauf si un autre worker l'a déjà prise"""
+        claimed = db.session.query(AIJob).filter(
+            AIJob.id == job_id,
+            AIJob.status == AIJobStatus.PENDING
+        ).update({
+            AIJob.status: AIJobStatus.RUNNING,
+            AIJob.started_at: datetime.utcnow(),
+            AIJob.attempts: AIJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def run_job(self, job_id: str, retry_in_pool: bool = True) -> Optional[AIJob]:
+        """Exécute une requête IA (à appeler dans un contexte d'application)"""
+        from app.services.ai_assistant import save_ai_query
+        from app.services.ollama_service import get_ollama_service
+
+        if not self._claim(job_id):
+            return None
+
+        job = db.session.get(AIJob, job_id)
+        payload = job.payload
+        try:
+            # L'état de la conversation est relu au moment de l'exécution
+            conversation = None
+            if payload.get('conversation_id'):
+                from app.services.ai_conversation import conversation_state, get_conversation
+
+                thread = get_conversation(job.association_id, payload['conversation_id'])
+                conversation = conversation_state(thread) if thread is not None else None
+            ai_result = get_ollama_service().generate_response(
+                query=payload['query'],
+                context=payload.get('context') or {},
+                model=payload.get('model'),
+                conversation=conversation
+            )
+        except AdmissionRejected as e:
+            # Saturation : la requête retourne en file sans consommer de tentative
+            job.status = AIJobStatus.PENDING
+            job.attempts -= 1
+            db.session.commit()
+            if retry_in_pool:
+                timer = threading.Timer(e.retry_after, self.submit, args=(job_id,))
+                timer.daemon = True
+                timer.start()
+            return job
+        except Exception as e:
+            return self._record_failure(job_id, e, retry_in_pool)
+
+        try:
+            record = save_ai_query(job.association_id, payload, payload.get('context') or {},
+                                   ai_result, commit=False)
+            job.ai_query_id = record.id
+            job.status = AIJobStatus.COMPLETED
+            job.error = None
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return self._record_failure(job_id, e, retry_in_pool)
+        return job
+
+    def _record_failure(self, job_id: str, error: Exception, retry_in_pool: bool) -> AIJob:
+        """Remet la requête en file, ou la marque en échec après max_attempts tentatives"""
+        logger.error(f"Échec de la requête IA {job_id}: {error}")
+        job = db.session.get(AIJob, job_id)
+        job.error = str(error)
+        if job.attempts >= self.max_attempts:
+            job.status = AIJobStatus.FAILED
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = AIJobStatus.PENDING
+        db.session.commit()
+        if job.status == AIJobStatus.PENDING and retry_in_pool:
+            self.submit(job_id)
+        return job
+
+    def run_pending(self) -> List[str]:
+        """Traite dans le thread courant toutes les requêtes en attente (commande CLI)"""
+        processed = []
+        while True:
+            job_id = db.session.query(AIJob.id).filter(
+                AIJob.status == AIJobStatus.PENDING
+            ).order_by(AIJob.created_at).limit(1).scalar()
+            if job_id is None:
+                return processed
+            if self.run_job(job_id, retry_in_pool=False) is not None:
+                processed.append(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+
+# Runner partagé par le processus (un worker gunicorn = un pool)
+_runner_instance: Optional[AIJobRunner] = None
+_runner_pid: Optional[int] = None
+_runner_lock = threading.Lock()
+
+
+def get_ai_job_runner() -> AIJobRunner:
+    """Retourne le runner du worker courant, créé (et la file reprise) au premier appel"""
+    global _runner_instance, _runner_pid
+
+    if _runner_instance is not None and _runner_pid == os.getpid():
+        return _runner_instance
+
+    with _runner_lock:
+        if _runner_instance is None or _runner_pid != os.getpid():
+            config = current_app.config
+            _runner_instance = AIJobRunner(
+                current_app._get_current_object(),
+                max_workers=config.get('AI_JOBS_WORKERS', 2),
+                stale_after=config.get('AI_JOBS_STALE_AFTER', 300),
+                max_attempts=config.get('AI_JOBS_MAX_ATTEMPTS', 3)
+            )
+            _runner_pid = os.getpid()
+            try:
+                _runner_instance.recover()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Reprise de la file IA impossible: {e}")
+        return _runner_instance
+
+
+def reset_ai_job_runner():
+    """Arrête et oublie le runner partagé (tests, changement de configuration)"""
+    global _runner_instance, _runner_pid
+    with _runner_lock:
+        if _runner_instance is not None:
+            _runner_instance.shutdown(wait=True)
+        _runner_instance = None
+        _runner_pid = None
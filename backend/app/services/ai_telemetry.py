@@ -0,0 +1,121 @@
+# Télémétrie des générations Ollama : mesures par requête et agrégats par modèle
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Mesures Ollama (voir generation_budget.extract_metrics) enregistrées sur AIQuery
+METRIC_FIELDS = ('total_duration_ms', 'load_duration_ms', 'prompt_eval_count', 'prompt_eval_duration_ms',
+                 'eval_count', 'eval_duration_ms')
+
+# Au-delà, le chargement compte comme un démarrage à froid du modèle
+COLD_LOAD_MS = 1000
+
+
+def estimate_confidence(response: str, metrics: Optional[Dict[str, Any]]) -> float:
+    """Confiance déduite du déroulement de la génération.
+
+    Ollama ne renvoie pas de probabilités : une réponse vide ou coupée par
+    num_predict (done_reason 'length') est peu fiable, une réponse terminée
+    normalement l'est davantage, et chaque extrait de ressource ajouté au
+    prompt l'ancre un peu plus dans les données de l'association.
+    """
+    if not (response or '').strip():
+        return 0.0
+    metrics = metrics or {}
+    done_reason = metrics.get('done_reason')
+    if done_reason == 'stop':
+        confidence = 0.75
+    elif done_reason == 'length':
+        confidence = 0.45
+    else:
+        confidence = 0.6  # Flux interrompu ou compteurs absents
+    snippets = (metrics.get('grounding') or {}).get('snippets') or 0
+    return round(min(0.9, confidence + 0.05 * min(snippets, 3)), 2)
+
+
+def telemetry_fields(ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Colonnes de télémétrie d'un AIQuery (vides pour les réponses réutilisées ou de secours)"""
+    if ai_result.get('cached') or ai_result.get('model_used') == 'fallback':
+        return {field: None for field in METRIC_FIELDS + ('queue_wait_ms',)}
+    metrics = ai_result.get('metrics') or {}
+    fields = {field: metrics.get(field) for field in METRIC_FIELDS}
+    fields['queue_wait_ms'] = ai_result.get('queue_wait_ms')
+    return fields
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Percentile (rang le plus proche) d'une liste triée"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def aggregate_model_stats(rows: List[Any]) -> Dict[str, Any]:
+    """Agrège des lignes (model_used, total, load, prompt_eval_count, eval_count, eval_duration, queue_wait)"""
+    by_model: Dict[str, Dict[str, List[float]]] = {}
+    for model, total, load, prompt_count, eval_count, eval_duration, queue_wait in rows:
+        series = by_model.setdefault(model or 'inconnu', {
+            'total': [], 'load': [], 'prompt': [], 'eval_count': [], 'eval_duration': [], 'queue': []
+        })
+        for key, value in (('total', total), ('load', load), ('prompt', prompt_count), ('queue', queue_wait)):
+            if value is not None:
+                series[key].append(value)
+        if eval_count and eval_duration:
+            series['eval_count'].append(eval_count)
+            series['eval_duration'].append(eval_duration)
+
+    stats = {}
+    for model, series in by_model.items():
+        latencies = sorted(series['total'])
+        queue = sorted(series['queue'])
+        eval_seconds = sum(series['eval_duration']) / 1000
+        stats[model] = {
+            'queries': len(latencies),
+            # Débit global : tokens générés / temps de génération cumulé
+            'tokens_per_second': round(sum(series['eval_count']) / eval_seconds, 2) if eval_seconds else None,
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else None
+            },
+            'queue_wait_ms': {'p50': percentile(queue, 50), 'p95': percentile(queue, 95)},
+            'avg_load_duration_ms': _mean(series['load']),
+            'cold_loads': sum(1 for value in series['load'] if value > COLD_LOAD_MS),
+            'avg_prompt_tokens': _mean(series['prompt']),
+            'avg_eval_tokens': _mean(series['eval_count'])
+        }
+    return stats
+
+
+def telemetry_summary(days: int = 7, association_id: Optional[str] = None) -> Dict[str, Any]:
+    """Statistiques de performance par modèle sur les derniers jours"""
+    from app import db
+    from app.models.guidance import AIQuery
+
+    since = datetime.utcnow() - timedelta(days=days)
+    base = db.session.query(AIQuery).filter(AIQuery.created_at >= since)
+    if association_id:
+        base = base.filter(AIQuery.association_id == association_id)
+
+    rows = base.filter(AIQuery.total_duration_ms.isnot(None)).with_entities(
+        AIQuery.model_used, AIQuery.total_duration_ms, AIQuery.load_duration_ms, AIQuery.prompt_eval_count,
+        AIQuery.eval_count, AIQuery.eval_duration_ms, AIQuery.queue_wait_ms
+    ).all()
+    total = base.count()
+    fallback = base.filter(AIQuery.model_used == 'fallback').count()
+
+    return {
+        'since': since.isoformat(),
+        'queries': total,
+        'generated': len(rows),
+        'fallback': fallback,
+        # Réponses servies sans génération (cache, index sémantique) ou sans compteurs
+        'reused': total - len(rows) - fallback,
+        'models': aggregate_model_stats(rows)
+    }
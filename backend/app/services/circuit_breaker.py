@@ -0,0 +1,204 @@
+# Disjoncteur (circuit breaker) protégeant les appels à Ollama
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows : état partagé entre threads uniquement
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _initial_state() -> Dict[str, Any]:
+    return {
+        'state': CLOSED,
+        'window': [],  # [horodatage, succès, lent]
+        'opened_at': None,
+        'open_until': None,
+        'probe_started_at': None,
+        'opened_count': 0
+    }
+
+
+class LocalBreakerStore:
+    """État du disjoncteur en mémoire (un seul processus)"""
+
+    def __init__(self):
+        self._state = _initial_state()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            yield self._state
+
+
+class FileBreakerStore:
+    """État du disjoncteur dans un fichier JSON verrouillé, partagé par les workers gunicorn"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        with self._lock, open(self.path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                before = json.dumps(state)
+                yield state
+                if json.dumps(state) != before:  # Lecture seule : pas de réécriture
+                    self._write(state)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return _initial_state()
+
+    def _write(self, state: Dict[str, Any]):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.breaker-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+class CircuitBreaker:
+    """Disjoncteur fermé / ouvert / semi-ouvert piloté par le taux d'échec et la latence.
+
+    Fermé : tous les appels passent et leur issue est mémorisée sur une
+    fenêtre glissante. Au-delà des seuils d'échec ou de lenteur, le circuit
+    s'ouvre : les appels sont refusés immédiatement pendant cooldown secondes.
+    Ensuite une seule requête sonde est autorisée (semi-ouvert) ; son succès
+    referme le circuit, son échec le rouvre.
+    """
+
+    def __init__(self, store=None, failure_rate_threshold: float = 0.5, slow_rate_threshold: float = 0.8,
+                 slow_call_threshold: float = 20.0, min_calls: int = 5, window_size: int = 20,
+                 window_seconds: float = 60.0, cooldown: float = 30.0, probe_timeout: float = 60.0):
+        self.store = store or LocalBreakerStore()
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_rate_threshold = slow_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.min_calls = min_calls
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+
+    def is_open(self) -> bool:
+        """Circuit ouvert et délai de refroidissement non écoulé (sans effet de bord)"""
+        with self.store.transaction() as state:
+            return state['state'] == OPEN and time.time() < state['open_until']
+
+    def allow_request(self) -> bool:
+        """L'appel peut-il partir vers Ollama ?"""
+        now = time.time()
+        with self.store.transaction() as state:
+            if state['state'] == CLOSED:
+                return True
+            if state['state'] == OPEN:
+                if now < state['open_until']:
+                    return False
+                state['state'] = HALF_OPEN
+                state['probe_started_at'] = now
+                logger.info("Circuit Ollama semi-ouvert : requête sonde autorisée")
+                return True
+            # Semi-ouvert : une seule sonde à la fois (relancée si elle a disparu)
+            if state['probe_started_at'] and now - state['probe_started_at'] < self.probe_timeout:
+                return False
+            state['probe_started_at'] = now
+            return True
+
+    def record_success(self, latency: float):
+        now = time.time()
+        slow = latency >= self.slow_call_threshold
+        with self.store.transaction() as state:
+            if state['state'] == HALF_OPEN:
+                if slow:
+                    self._open(state, now)
+                else:
+                    state.update(_initial_state(), opened_count=state['opened_count'])
+                    logger.info("Circuit Ollama refermé")
+                return
+            self._append(state, now, True, slow)
+            self._evaluate(state, now)
+
+    def record_failure(self):
+        now = time.time()
+        with self.store.transaction() as state:
+            if state['state'] == HALF_OPEN:
+                self._open(state, now)
+                return
+            self._append(state, now, False, False)
+            self._evaluate(state, now)
+
+    def _append(self, state: Dict[str, Any], now: float, success: bool, slow: bool):
+        window = [entry for entry in state['window'] if now - entry[0] <= self.window_seconds]
+        window.append([now, success, slow])
+        state['window'] = window[-self.window_size:]
+
+    def _rates(self, state: Dict[str, Any]):
+        window = state['window']
+        if not window:
+            return 0, 0.0, 0.0
+        failures = sum(1 for _, success, _ in window if not success)
+        slow = sum(1 for _, _, is_slow in window if is_slow)
+        return len(window), failures / len(window), slow / len(window)
+
+    def _evaluate(self, state: Dict[str, Any], now: float):
+        if state['state'] != CLOSED:
+            return
+        calls, failure_rate, slow_rate = self._rates(state)
+        if calls >= self.min_calls and (failure_rate >= self.failure_rate_threshold or
+                                        slow_rate >= self.slow_rate_threshold):
+            self._open(state, now)
+
+    def _open(self, state: Dict[str, Any], now: float):
+        state['state'] = OPEN
+        state['opened_at'] = now
+        state['open_until'] = now + self.cooldown
+        state['probe_started_at'] = None
+        state['window'] = []
+        state['opened_count'] += 1
+        logger.warning(f"Circuit Ollama ouvert pour {self.cooldown}s")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """État du disjoncteur pour le monitoring"""
+        with self.store.transaction() as state:
+            calls, failure_rate, slow_rate = self._rates(state)
+            open_until = state['open_until'] if state['state'] == OPEN else None
+            return {
+                'state': state['state'],
+                'calls_in_window': calls,
+                'failure_rate': round(failure_rate, 3),
+                'slow_rate': round(slow_rate, 3),
+                'opened_count': state['opened_count'],
+                'open_until': open_until,
+                'retry_in': max(0.0, round(open_until - time.time(), 1)) if open_until else 0.0
+            }
+
+
+def build_breaker_store(state_file: Optional[str]):
+    """Fichier partagé si un chemin est configuré, sinon état en mémoire"""
+    if state_file:
+        return FileBreakerStore(state_file)
+    return LocalBreakerStore()
@@ -0,0 +1,174 @@
+# Versions des collections par association : ETag et réponses 304
+#
+# Chaque écriture ORM (membres, événements, cotisations, finances,
+# guidance) incrémente, dans la même transaction, le compteur de la
+# collection touchée (table collection_versions). Les listes dérivent leur
+# ETag de ce compteur : un If-None-Match à jour est servi en 304 après une
+# seule lecture par clé primaire, sans requête sur les tables de données.
+#
+# Les écritures groupées hors ORM (insert()/delete() Core) ne déclenchent
+# pas les événements de session : elles appellent bump_versions elles-mêmes.
+import functools
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.collection_version import CollectionVersion
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ('members', 'events', 'cotisations', 'finances', 'guidance', 'conversations')
+
+# Les listes peuvent être conservées par le navigateur mais doivent être revalidées
+CACHE_CONTROL = 'private, no-cache'
+
+UPSERT_DIALECTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+
+def _collection_of(record, session) -> Tuple[str, ...]:
+    """(collection, association) touchées par un enregistrement, ou () s'il n'est pas suivi"""
+    from app.models.cotisation import Cotisation
+    from app.models.event import Event
+    from app.models.guidance import (AIConversation, ComplianceCheck, OrganizationalDiagnostic,
+                                     Recommendation, SmartInsight)
+    from app.models.member import Member
+    from app.models.transaction import Transaction
+
+    if isinstance(record, Member):
+        return ('members', record.association_id)
+    if isinstance(record, Event):
+        return ('events', record.association_id)
+    if isinstance(record, Transaction):
+        return ('finances', record.association_id)
+    if isinstance(record, Cotisation):
+        member = record.member
+        if member is None and record.member_id is not None:
+            with session.no_autoflush:
+                member = session.get(Member, record.member_id)
+        return ('cotisations', member.association_id) if member is not None else ()
+    if isinstance(record, OrganizationalDiagnostic):
+        return ('guidance', record.association_id)
+    if isinstance(record, (ComplianceCheck, Recommendation, SmartInsight)):
+        if record.diagnostic_id is None:
+            return ()
+        with session.no_autoflush:
+            diagnostic = session.get(OrganizationalDiagnostic, record.diagnostic_id)
+        return ('guidance', diagnostic.association_id) if diagnostic is not None else ()
+    if isinstance(record, AIConversation):
+        return ('conversations', record.association_id)
+    return ()
+
+
+def _collect_versions(session, flush_context, instances):
+    """before_flush : collections modifiées, avant que les lignes supprimées ne disparaissent"""
+    touched: Set[Tuple[int, str]] = set()
+    records = list(session.new) + list(session.deleted)
+    records += [record for record in session.dirty if session.is_modified(record)]
+    for record in records:
+        key = _collection_of(record, session)
+        if key and key[1] is not None:
+            touched.add((int(key[1]), key[0]))
+    if touched:
+        bump_versions(session, touched)
+
+
+def bump_versions(session, keys: Iterable[Tuple[int, str]]):
+    """Incrémente les versions (association, collection) dans la transaction en cours"""
+    connection = session.connection()
+    table = CollectionVersion.__table__
+    dialect = connection.dialect.name
+    for association_id, collection in sorted(set(keys)):
+        now = datetime.utcnow()
+        if dialect in UPSERT_DIALECTS:
+            # INSERT ... ON CONFLICT : pas de course entre deux premières écritures simultanées
+            stmt = UPSERT_DIALECTS[dialect](table).values(association_id=association_id, collection=collection,
+                                                          version=1, updated_at=now)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.association_id, table.c.collection],
+                set_={'version': table.c.version + 1, 'updated_at': now}
+            ))
+            continue
+        updated = connection.execute(
+            table.update()
+            .where(table.c.association_id == association_id, table.c.collection == collection)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(association_id=association_id, collection=collection,
+                                                     version=1, updated_at=now))
+
+
+def register_version_events():
+    """Branche l'incrément des versions sur les sessions SQLAlchemy"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, 'before_flush', _collect_versions):
+        event.listen(Session, 'before_flush', _collect_versions)
+
+
+def get_versions(session, association_id: int, collections: Iterable[str]) -> Dict[str, int]:
+    """Versions courantes (0 pour une collection jamais modifiée)"""
+    collections = list(collections)
+    rows = session.execute(
+        select(CollectionVersion.collection, CollectionVersion.version).where(
+            CollectionVersion.association_id == association_id,
+            CollectionVersion.collection.in_(collections)
+        )
+    ).all()
+    versions = dict.fromkeys(collections, 0)
+    versions.update(dict(rows))
+    return versions
+
+
+def make_etag(association_id: int, versions: Dict[str, int], extra: Optional[str] = None) -> str:
+    """ETag faible : même contenu tant qu'aucune des collections n'a changé"""
+    parts = '.'.join(f'{collection}{versions[collection]}' for collection in sorted(versions))
+    etag = f'a{association_id}-{parts}'
+    return f'{etag}-{extra}' if extra else etag
+
+
+def conditional_get(*collections: str, extra: Optional[Callable[[], str]] = None) -> Callable:
+    """Décorateur des listes : ETag dérivé des versions et 304 si If-None-Match est à jour.
+
+    À placer sous @jwt_required(). La version est lue avant la requête de
+    données : une écriture concurrente donne au pire un ETag plus ancien
+    que la réponse, jamais l'inverse. extra() complète l'ETag quand la
+    réponse dépend aussi d'autre chose que les données (la date du jour...).
+    """
+    unknown = set(collections) - set(COLLECTIONS)
+    if unknown:
+        raise ValueError(f"Collections inconnues: {', '.join(sorted(unknown))}")
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            from app import db
+
+            try:
+                association_id = int(get_jwt_identity())
+                etag = make_etag(association_id, get_versions(db.session, association_id, collections),
+                                 extra() if extra else None)
+            except Exception as e:
+                # Sans version, la liste est servie normalement (sans ETag)
+                logger.warning(f"Version des collections indisponible: {e}")
+                db.session.rollback()
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = CACHE_CONTROL
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+# Indicateurs du tableau de bord calculés en quelques requêtes groupées
+#
+# Remplace les appels séparés du frontend (membres, événements, stats des
+# cotisations et des finances, analytics de guidance) : chaque bloc est une
+# seule requête GROUP BY ou à sommes conditionnelles, sans charger de lignes.
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, distinct, func
+
+from app import db
+from app.models.cotisation import Cotisation
+from app.models.event import Event
+from app.models.guidance import OrganizationalDiagnostic, Recommendation, RecommendationStatus
+from app.models.member import Member
+from app.models.transaction import FinanceMonthlyRollup, TransactionType
+
+# Événements à venir détaillés
+UPCOMING_EVENTS_LIMIT = 5
+
+OPEN_RECOMMENDATION_STATUSES = (RecommendationStatus.PENDING, RecommendationStatus.IN_PROGRESS)
+
+
+def _member_stats(association_id: int) -> Dict[str, Any]:
+    rows = db.session.query(Member.status, Member.role, func.count(Member.id)).filter(
+        Member.association_id == association_id
+    ).group_by(Member.status, Member.role).all()
+    by_status: Dict[str, int] = {}
+    by_role: Dict[str, int] = {}
+    for status, role, count in rows:
+        by_status[status] = by_status.get(status, 0) + count
+        by_role[role] = by_role.get(role, 0) + count
+    return {'total': sum(by_status.values()), 'by_status': by_status, 'by_role': by_role}
+
+
+def _event_stats(association_id: int, today: date) -> Dict[str, Any]:
+    start_of_day = datetime.combine(today, time.min)
+    upcoming = Event.start_date >= start_of_day
+    total, upcoming_count = db.session.query(
+        func.count(Event.id), func.coalesce(func.sum(case((upcoming, 1), else_=0)), 0)
+    ).filter(Event.association_id == association_id).one()
+    next_events = db.session.query(
+        Event.id, Event.title, Event.start_date, Event.location, Event.event_type, Event.status
+    ).filter(Event.association_id == association_id, upcoming).order_by(
+        Event.start_date, Event.id
+    ).limit(UPCOMING_EVENTS_LIMIT).all()
+    return {
+        'total': total,
+        'upcoming_count': upcoming_count,
+        'upcoming': [{
+            'id': str(event.id),
+            'title': event.title,
+            'startDate': event.start_date.isoformat(),
+            'location': event.location,
+            'type': event.event_type,
+            'status': event.status
+        } for event in next_events]
+    }
+
+
+def _cotisation_stats(association_id: int, year: int, active_members: int) -> Dict[str, Any]:
+    rows = db.session.query(
+        Cotisation.status, func.count(Cotisation.id), func.coalesce(func.sum(Cotisation.amount), 0),
+        func.count(distinct(Cotisation.member_id))
+    ).join(Member).filter(
+        Member.association_id == association_id, Cotisation.year == year
+    ).group_by(Cotisation.status).all()
+    by_status = {status: {'count': count, 'total': float(total)} for status, count, total, _ in rows}
+    paying_members = sum(members for status, _, _, members in rows if status == 'PAID')
+    return {
+        'year': year,
+        'by_status': by_status,
+        'collected': by_status.get('PAID', {}).get('total', 0.0),
+        'outstanding': sum(stats['total'] for status, stats in by_status.items() if status != 'PAID'),
+        'paying_members': paying_members,
+        'collection_rate': round(paying_members / active_members, 4) if active_members else None
+    }
+
+
+def _finance_stats(association_id: int, year: int) -> Dict[str, Any]:
+    # Lu dans les cumuls mensuels : quelques lignes par mois au lieu des transactions
+    income = FinanceMonthlyRollup.type == TransactionType.INCOME
+    expense = FinanceMonthlyRollup.type == TransactionType.EXPENSE
+    in_year = FinanceMonthlyRollup.year == year
+
+    def total(condition):
+        return func.coalesce(func.sum(case((condition, FinanceMonthlyRollup.total), else_=0)), 0)
+
+    row = db.session.query(
+        total(income), total(expense), total(and_(income, in_year)), total(and_(expense, in_year)),
+        func.coalesce(func.sum(FinanceMonthlyRollup.count), 0)
+    ).filter(FinanceMonthlyRollup.association_id == association_id).one()
+    all_income, all_expenses, year_income, year_expenses, count = row
+    return {
+        'balance': float(all_income) - float(all_expenses),
+        'transactions_count': int(count),
+        'year': {
+            'income': float(year_income),
+            'expenses': float(year_expenses),
+            'net': float(year_income) - float(year_expenses)
+        }
+    }
+
+
+def _recommendation_stats(association_id: int) -> Dict[str, Any]:
+    rows = db.session.query(Recommendation.priority, func.count(Recommendation.id)).join(
+        OrganizationalDiagnostic
+    ).filter(
+        OrganizationalDiagnostic.association_id == str(association_id),
+        Recommendation.status.in_(OPEN_RECOMMENDATION_STATUSES)
+    ).group_by(Recommendation.priority).all()
+    by_priority = {priority.value: count for priority, count in rows}
+    return {'open': sum(by_priority.values()), 'by_priority': by_priority}
+
+
+def dashboard_summary(association_id: int, year: Optional[int] = None,
+                      today: Optional[date] = None) -> Dict[str, Any]:
+    """KPI du tableau de bord d'une association (six requêtes agrégées)"""
+    today = today or date.today()
+    year = year or today.year
+    members = _member_stats(association_id)
+    return {
+        'generated_at': datetime.utcnow().isoformat(),
+        'date': today.isoformat(),
+        'members': members,
+        'events': _event_stats(association_id, today),
+        'cotisations': _cotisation_stats(association_id, year, members['by_status'].get('ACTIVE', 0)),
+        'finances': _finance_stats(association_id, year),
+        'recommendations': _recommendation_stats(association_id)
+    }
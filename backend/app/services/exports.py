@@ -0,0 +1,220 @@
+# Exports CSV / XLSX / NDJSON diffusés par morceaux
+#
+# Les lignes sont lues par paquets (yield_per : curseur côté serveur sous
+# PostgreSQL) et écrites au fil de l'eau dans la réponse : la mémoire
+# utilisée ne dépend pas du nombre de lignes exportées.
+import csv
+import io
+import json
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app import db
+from app.models.cotisation import Cotisation
+from app.models.event import Event
+from app.models.member import Member
+from app.models.transaction import Transaction, TransactionType
+
+# Lignes lues par aller-retour avec la base
+EXPORT_BATCH_SIZE = 1000
+
+# Taille des morceaux de réponse (octets)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Premiers caractères qu'un tableur lit comme une formule (injection CSV/XLSX)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+class ExportSpec:
+    """Jeu de données exportable : colonnes, portée par association et filtres acceptés"""
+
+    def __init__(self, columns: Sequence[Tuple[str, Any]], scope: Callable[[Any], Any],
+                 filters: Dict[str, Tuple[Any, Callable[[str], Any]]], order_by: Any, joins: Sequence[Any] = ()):
+        self.columns = columns
+        self.scope = scope
+        self.filters = filters
+        self.order_by = order_by
+        self.joins = joins
+
+    @property
+    def headers(self) -> List[str]:
+        return [header for header, _ in self.columns]
+
+    def statement(self, association_id, args: Dict[str, str]):
+        """Requête de l'export ; lève ValueError si un filtre est invalide"""
+        stmt = select(*[column for _, column in self.columns])
+        for target in self.joins:
+            stmt = stmt.join(target)
+        stmt = stmt.where(self.scope(association_id))
+        for name, (column, parse) in self.filters.items():
+            if args.get(name):
+                try:
+                    value = parse(args[name])
+                except (KeyError, ValueError):
+                    raise ValueError(f'Filtre {name} invalide')
+                stmt = stmt.where(column == value)
+        return stmt.order_by(self.order_by)
+
+
+def _upper(value: str) -> str:
+    return value.upper()
+
+
+EXPORTS = {
+    'members': ExportSpec(
+        columns=[(field, getattr(Member, column)) for field, column in Member.API_FIELDS.items()],
+        scope=lambda association_id: Member.association_id == association_id,
+        filters={'status': (Member.status, _upper), 'role': (Member.role, _upper)},
+        order_by=Member.id
+    ),
+    'events': ExportSpec(
+        columns=[('id', Event.id), ('title', Event.title), ('description', Event.description),
+                 ('startDate', Event.start_date), ('endDate', Event.end_date), ('location', Event.location),
+                 ('type', Event.event_type), ('status', Event.status), ('maxParticipants', Event.max_participants),
+                 ('createdBy', Event.created_by), ('created_at', Event.created_at),
+                 ('updated_at', Event.updated_at)],
+        scope=lambda association_id: Event.association_id == association_id,
+        filters={'status': (Event.status, _upper), 'type': (Event.event_type, _upper)},
+        order_by=Event.id
+    ),
+    'cotisations': ExportSpec(
+        columns=[('id', Cotisation.id), ('member_id', Cotisation.member_id), ('member_email', Member.email),
+                 ('amount', Cotisation.amount), ('payment_date', Cotisation.payment_date),
+                 ('payment_method', Cotisation.payment_method), ('status', Cotisation.status),
+                 ('year', Cotisation.year), ('notes', Cotisation.notes), ('created_at', Cotisation.created_at)],
+        scope=lambda association_id: Member.association_id == association_id,
+        filters={'status': (Cotisation.status, _upper), 'year': (Cotisation.year, int)},
+        order_by=Cotisation.id,
+        joins=[Member]
+    ),
+    'transactions': ExportSpec(
+        columns=[('id', Transaction.id), ('date', Transaction.date), ('description', Transaction.description),
+                 ('amount', Transaction.amount), ('type', Transaction.type), ('category', Transaction.category),
+                 ('receipt', Transaction.receipt), ('notes', Transaction.notes),
+                 ('created_by', Transaction.created_by), ('created_at', Transaction.created_at)],
+        scope=lambda association_id: Transaction.association_id == association_id,
+        filters={'type': (Transaction.type, lambda value: TransactionType[value.upper()]),
+                 'category': (Transaction.category, str)},
+        order_by=Transaction.id
+    )
+}
+
+
+def export_value(value: Any) -> Any:
+    """Valeur sérialisable (JSON, CSV, cellule XLSX)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def spreadsheet_value(value: Any) -> Any:
+    """Texte commençant par un caractère de formule préfixé d'une apostrophe (lu comme du texte)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def spreadsheet_row(row: Sequence[Any]) -> List[Any]:
+    return [spreadsheet_value(value) for value in row]
+
+
+def iter_rows(stmt, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence[Any]]:
+    """Lignes de la requête, lues par paquets de batch_size"""
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        for row in result:
+            yield [export_value(value) for value in row]
+    finally:
+        result.close()
+
+
+def _buffered(pieces: Iterator[str]) -> Iterator[bytes]:
+    """Regroupe de petits fragments en morceaux d'environ EXPORT_CHUNK_BYTES"""
+    buffer: List[bytes] = []
+    size = 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def csv_chunks(headers: List[str], rows: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    def lines():
+        line = io.StringIO()
+        writer = csv.writer(line)
+        line.write('\ufeff')  # BOM : accents lus correctement par Excel
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(spreadsheet_row(row))
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+        yield line.getvalue()  # En-têtes seuls si l'export est vide
+
+    return _buffered(lines())
+
+
+def ndjson_chunks(headers: List[str], rows: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    return _buffered(json.dumps(dict(zip(headers, row)), ensure_ascii=False) + '\n' for row in rows)
+
+
+def xlsx_chunks(headers: List[str], rows: Iterator[Sequence[Any]], title: str) -> Iterator[bytes]:
+    """Classeur en écriture seule : les lignes partent sur disque, puis le fichier est diffusé.
+
+    Le format XLSX est une archive zip dont l'index est écrit en dernier :
+    il ne peut pas être envoyé avant d'être complet. Le classeur est donc
+    construit dans un fichier temporaire (mémoire constante) puis relu par
+    morceaux.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(spreadsheet_row(row))
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_chunks(dataset: str, export_format: str, association_id, args: Optional[Dict[str, str]] = None,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Contenu de l'export par morceaux ; lève ValueError (jeu, format ou filtre inconnu) avant toute lecture"""
+    spec = EXPORTS.get(dataset)
+    if spec is None:
+        raise ValueError(f"Export inconnu (disponibles : {', '.join(EXPORTS)})")
+    if export_format not in FORMATS:
+        raise ValueError(f"Format inconnu (disponibles : {', '.join(FORMATS)})")
+    stmt = spec.statement(association_id, args or {})
+    rows = iter_rows(stmt, batch_size)
+    if export_format == 'csv':
+        return csv_chunks(spec.headers, rows)
+    if export_format == 'ndjson':
+        return ndjson_chunks(spec.headers, rows)
+    return xlsx_chunks(spec.headers, rows, dataset)
@@ -0,0 +1,146 @@
+# Cumuls mensuels des finances (table finance_monthly_rollups)
+#
+# Chaque création, modification ou suppression de transaction ajuste, dans
+# la même transaction SQL, la ligne (association, année, mois, type,
+# catégorie) concernée : statistiques et séries temporelles se lisent en
+# O(mois) au lieu de O(transactions). rebuild_rollups recalcule la table
+# depuis les transactions (reprise de l'existant, écritures hors ORM).
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, extract, func, inspect, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.models.transaction import FinanceMonthlyRollup, Transaction
+
+# Champs d'une transaction qui déterminent sa ligne de cumul et sa contribution
+ROLLUP_FIELDS = ('association_id', 'date', 'type', 'category', 'amount')
+
+UPSERT_DIALECTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+RollupKey = Tuple[int, int, int, Any, str]
+
+
+def rollup_key(values: Dict[str, Any]) -> RollupKey:
+    """Ligne de cumul d'une transaction : (association, année, mois, type, catégorie)"""
+    return (int(values['association_id']), values['date'].year, values['date'].month, values['type'],
+            values['category'])
+
+
+def _current_values(record) -> Dict[str, Any]:
+    return {field: getattr(record, field) for field in ROLLUP_FIELDS}
+
+
+def _previous_values(session, record) -> Optional[Dict[str, Any]]:
+    """Valeurs enregistrées avant modification (None si aucun champ du cumul n'a changé)"""
+    state = inspect(record)
+    values = {}
+    changed = False
+    unknown = False
+    for field in ROLLUP_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+            changed = True
+        elif history.added:
+            unknown = changed = True  # Attribut modifié alors qu'il n'était pas chargé
+        else:
+            values[field] = getattr(record, field)
+    if not changed:
+        return None
+    if unknown:
+        row = session.execute(
+            select(*[getattr(Transaction, field) for field in ROLLUP_FIELDS]).where(Transaction.id == record.id)
+        ).one()
+        values = dict(zip(ROLLUP_FIELDS, row))
+    return values
+
+
+def _collect_rollup_deltas(session, flush_context, instances):
+    """before_flush : contributions retirées et ajoutées par les transactions modifiées"""
+    deltas: Dict[RollupKey, list] = defaultdict(lambda: [0.0, 0])
+
+    def add(values, sign):
+        delta = deltas[rollup_key(values)]
+        delta[0] += sign * values['amount']
+        delta[1] += sign
+
+    for record in session.new:
+        if isinstance(record, Transaction):
+            add(_current_values(record), 1)
+    for record in session.deleted:
+        if isinstance(record, Transaction):
+            add(_previous_values(session, record) or _current_values(record), -1)
+    for record in session.dirty:
+        if isinstance(record, Transaction) and record not in session.deleted:
+            previous = _previous_values(session, record)
+            if previous is not None:
+                add(previous, -1)
+                add(_current_values(record), 1)
+
+    if deltas:
+        apply_deltas(session, {key: tuple(delta) for key, delta in deltas.items() if delta != [0.0, 0]})
+
+
+def apply_deltas(session, deltas: Dict[RollupKey, Tuple[float, int]]):
+    """Ajoute (montant, nombre) aux lignes de cumul ; les lignes vidées sont supprimées"""
+    connection = session.connection()
+    table = FinanceMonthlyRollup.__table__
+    upsert = UPSERT_DIALECTS.get(connection.dialect.name)
+    for (association_id, year, month, transaction_type, category), (amount, count) in sorted(
+            deltas.items(), key=lambda item: (item[0][:3], item[0][3].name, item[0][4])):
+        key = (table.c.association_id == association_id, table.c.year == year, table.c.month == month,
+               table.c.type == transaction_type, table.c.category == category)
+        values = dict(association_id=association_id, year=year, month=month, type=transaction_type,
+                      category=category, total=amount, count=count)
+        if upsert is not None:
+            # INSERT ... ON CONFLICT : incrément atomique même entre écritures concurrentes
+            stmt = upsert(table).values(**values)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.association_id, table.c.year, table.c.month, table.c.type,
+                                table.c.category],
+                set_={'total': table.c.total + stmt.excluded.total, 'count': table.c.count + stmt.excluded.count}
+            ))
+        else:
+            updated = connection.execute(table.update().where(*key).values(
+                total=table.c.total + amount, count=table.c.count + count))
+            if updated.rowcount == 0:
+                connection.execute(table.insert().values(**values))
+        if count < 0:
+            connection.execute(table.delete().where(*key, table.c.count <= 0))
+
+
+def register_rollup_events():
+    """Branche la mise à jour des cumuls mensuels sur les sessions SQLAlchemy"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, 'before_flush', _collect_rollup_deltas):
+        event.listen(Session, 'before_flush', _collect_rollup_deltas)
+
+
+def rebuild_rollups(session, association_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalcule les cumuls depuis les transactions (toutes les associations par défaut) ; retourne le nombre de lignes"""
+    year = extract('year', Transaction.date)
+    month = extract('month', Transaction.date)
+    source = select(
+        Transaction.association_id, year, month, Transaction.type, Transaction.category,
+        func.sum(Transaction.amount), func.count(Transaction.id)
+    ).group_by(Transaction.association_id, year, month, Transaction.type, Transaction.category)
+    clear = delete(FinanceMonthlyRollup)
+    if association_ids is not None:
+        association_ids = list(association_ids)
+        source = source.where(Transaction.association_id.in_(association_ids))
+        clear = clear.where(FinanceMonthlyRollup.association_id.in_(association_ids))
+
+    session.execute(clear)
+    session.execute(insert(FinanceMonthlyRollup).from_select(
+        ['association_id', 'year', 'month', 'type', 'category', 'total', 'count'], source
+    ))
+    query = select(func.count()).select_from(FinanceMonthlyRollup)
+    if association_ids is not None:
+        query = query.where(FinanceMonthlyRollup.association_id.in_(association_ids))
+    rows = session.execute(query).scalar()
+    session.commit()
+    return rows
@@ -0,0 +1,129 @@
+# Statistiques financières lues dans les cumuls mensuels
+#
+# Les totaux par type et catégorie se lisent dans finance_monthly_rollups
+# (voir finance_rollups) : une requête GROUP BY sur quelques lignes par mois,
+# quel que soit le nombre de transactions. Seules les transactions récentes
+# sont lues dans la table des transactions, par l'index (association_id, date).
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+
+from app import db
+from app.models.transaction import FinanceMonthlyRollup, Transaction, TransactionType
+
+# Transactions récentes renvoyées avec les statistiques
+RECENT_TRANSACTIONS_LIMIT = 5
+
+# Mois maximum d'une série temporelle
+MAX_SERIES_MONTHS = 120
+
+
+def period_bounds(year: Optional[int], month: Optional[int]) -> Optional[Tuple[date, date]]:
+    """Intervalle [début, fin) d'une année ou d'un mois ; None sans année. Lève ValueError si invalide."""
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError('Mois invalide (1 à 12)')
+    if year is None:
+        return None
+    if not 1 <= year <= 9998:
+        raise ValueError('Année invalide')
+    if month is None:
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return date(year, month, 1), end
+
+
+def finance_stats(association_id, year: Optional[int] = None, month: Optional[int] = None) -> Dict[str, Any]:
+    """Totaux, solde et répartition par catégorie (format de GET /api/finances/stats)"""
+    period_bounds(year, month)  # Validation
+    criteria = [FinanceMonthlyRollup.association_id == int(association_id)]
+    if year is not None:
+        criteria.append(FinanceMonthlyRollup.year == year)
+    if month is not None:
+        criteria.append(FinanceMonthlyRollup.month == month)
+    rows = db.session.query(
+        FinanceMonthlyRollup.type, FinanceMonthlyRollup.category,
+        func.sum(FinanceMonthlyRollup.total), func.sum(FinanceMonthlyRollup.count)
+    ).filter(*criteria).group_by(FinanceMonthlyRollup.type, FinanceMonthlyRollup.category).all()
+
+    total_income = 0
+    total_expenses = 0
+    count = 0
+    categories_stats: Dict[str, Dict[str, Any]] = {}
+    for transaction_type, category, amount, category_count in rows:
+        stats = categories_stats.setdefault(category, {'income': 0, 'expenses': 0, 'count': 0})
+        if transaction_type == TransactionType.INCOME:
+            stats['income'] += amount
+            total_income += amount
+        else:
+            stats['expenses'] += amount
+            total_expenses += amount
+        stats['count'] += category_count
+        count += category_count
+
+    recent = Transaction.query.filter(
+        Transaction.association_id == association_id
+    ).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(RECENT_TRANSACTIONS_LIMIT).all()
+
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'balance': total_income - total_expenses,
+        'transactions_count': count,
+        'categories_stats': categories_stats,
+        'recent_transactions': [t.to_dict() for t in recent]
+    }
+
+
+def parse_month(value: str) -> Tuple[int, int]:
+    """'2025-03' -> (2025, 3) ; lève ValueError si le format est invalide"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise ValueError(f'Mois invalide: {value} (format AAAA-MM)')
+    period_bounds(year, month)
+    return year, month
+
+
+def _months(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def monthly_series(association_id, start: Tuple[int, int], end: Tuple[int, int],
+                   category: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Recettes, dépenses et solde de chaque mois de start à end inclus (mois sans transaction à zéro)"""
+    months = _months(start, end)
+    if not months:
+        raise ValueError('La fin de la période précède son début')
+    if len(months) > MAX_SERIES_MONTHS:
+        raise ValueError(f'Période trop longue ({MAX_SERIES_MONTHS} mois maximum)')
+
+    period = tuple_(FinanceMonthlyRollup.year, FinanceMonthlyRollup.month)
+    criteria = [FinanceMonthlyRollup.association_id == int(association_id),
+                period >= tuple_(*start), period <= tuple_(*end)]
+    if category:
+        criteria.append(FinanceMonthlyRollup.category == category)
+    rows = db.session.query(
+        FinanceMonthlyRollup.year, FinanceMonthlyRollup.month, FinanceMonthlyRollup.type,
+        func.sum(FinanceMonthlyRollup.total), func.sum(FinanceMonthlyRollup.count)
+    ).filter(*criteria).group_by(
+        FinanceMonthlyRollup.year, FinanceMonthlyRollup.month, FinanceMonthlyRollup.type
+    ).all()
+
+    totals = {key: {'income': 0, 'expenses': 0, 'count': 0} for key in months}
+    for year, month, transaction_type, amount, count in rows:
+        point = totals[(year, month)]
+        point['income' if transaction_type == TransactionType.INCOME else 'expenses'] += amount
+        point['count'] += count
+    return [{
+        'month': f'{year:04d}-{month:02d}',
+        'income': point['income'],
+        'expenses': point['expenses'],
+        'net': point['income'] - point['expenses'],
+        'count': point['count']
+    } for (year, month), point in totals.items()]
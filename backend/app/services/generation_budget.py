@@ -0,0 +1,84 @@
+# Budgets de génération de l'assistant IA (options Ollama réellement appliquées)
+import json
+import math
+from typing import Any, Dict, Optional
+
+# Approximation du nombre de caractères par token pour du français (tokenizers type llama)
+CHARS_PER_TOKEN = 4
+
+# num_predict : tokens générés au maximum ("maximum 300 mots" ~ 400 tokens)
+# num_ctx : taille de la fenêtre de contexte allouée par Ollama
+# prompt_tokens : budget du prompt (consigne + question + contexte ajouté)
+DEFAULT_BUDGET = {'num_predict': 400, 'num_ctx': 2048, 'prompt_tokens': 1200}
+
+BUDGET_PROFILES: Dict[str, Dict[str, int]] = {
+    'dashboard': {'num_predict': 250, 'num_ctx': 2048, 'prompt_tokens': 1000},
+    'diagnostic': {'num_predict': 500, 'num_ctx': 4096, 'prompt_tokens': 2500},
+    'governance': {'num_predict': 500, 'num_ctx': 4096, 'prompt_tokens': 2500},
+    'compliance': {'num_predict': 450, 'num_ctx': 4096, 'prompt_tokens': 2000},
+    'finance': {'num_predict': 400, 'num_ctx': 2048, 'prompt_tokens': 1200}
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation rapide du nombre de tokens d'un texte"""
+    return math.ceil(len(text or '') / CHARS_PER_TOKEN)
+
+
+def trim_to_tokens(text: str, max_tokens: int, keep: str = 'head') -> str:
+    """Tronque un texte à un budget de tokens, en conservant le début ('head') ou la fin ('tail')"""
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if keep == 'tail':
+        return text[len(text) - max_chars:]
+    return text[:max_chars]
+
+
+def parse_budget_profiles(value: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Profils par défaut, surchargés par un JSON {"page": {"num_predict": ...}}"""
+    profiles = {page: dict(budget) for page, budget in BUDGET_PROFILES.items()}
+    if value:
+        for page, overrides in json.loads(value).items():
+            profiles[page] = dict(profiles.get(page, DEFAULT_BUDGET), **overrides)
+    return profiles
+
+
+def get_budget(context: Dict[str, Any], profiles: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, int]:
+    """Budget applicable à la page courante (correspondance partielle, comme les ressources)"""
+    profiles = BUDGET_PROFILES if profiles is None else profiles
+    current_page = str((context or {}).get('currentPage', '')).lower()
+    for page, budget in profiles.items():
+        if page in current_page:
+            return dict(DEFAULT_BUDGET, **budget)
+    return dict(profiles.get('default', DEFAULT_BUDGET))
+
+
+def fit_prompt(instructions: str, query: str, budget: Dict[str, int]) -> str:
+    """Assemble consigne et question dans le budget de prompt (la question est tronquée en dernier recours)"""
+    remaining = budget['prompt_tokens'] - estimate_tokens(instructions)
+    return instructions + trim_to_tokens(query, max(remaining, 64))
+
+
+def extract_metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compteurs de performance renvoyés par Ollama (durées en nanosecondes converties en ms)"""
+    def ms(key):
+        value = result.get(key)
+        return round(value / 1e6, 1) if value is not None else None
+
+    eval_count = result.get('eval_count')
+    eval_duration = result.get('eval_duration')
+    tokens_per_second = None
+    if eval_count and eval_duration:
+        tokens_per_second = round(eval_count / (eval_duration / 1e9), 2)
+
+    return {
+        'total_duration_ms': ms('total_duration'),
+        'load_duration_ms': ms('load_duration'),
+        'prompt_eval_count': result.get('prompt_eval_count'),
+        'prompt_eval_duration_ms': ms('prompt_eval_duration'),
+        'eval_count': eval_count,
+        'eval_duration_ms': ms('eval_duration'),
+        'tokens_per_second': tokens_per_second,
+        'done_reason': result.get('done_reason')
+    }
@@ -0,0 +1,454 @@
+# Index BM25 des modèles de documents, recommandations et contrôles de conformité
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from heapq import nlargest
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+from app.services.generation_budget import estimate_tokens, trim_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Taille des passages indexés (en mots) : un extrait = un passage
+PASSAGE_WORDS = 60
+
+SOURCE_LABELS = {
+    'template': 'Modèle de document',
+    'recommendation': 'Recommandation',
+    'compliance': 'Conformité'
+}
+
+STOPWORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il je la le les leur lui ma mais me meme mes moi mon ne nos
+notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous est sont
+cette comment quel quelle quels quelles faire faut peut etre avoir plus tres tout tous toute toutes
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes indexés : minuscules sans accents, mots vides retirés, pluriels simples ramenés au singulier"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    terms = []
+    for word in re.findall(r'[a-z0-9]+', text):
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word[-1] in 'sx':
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def split_passages(text: str, size: int = PASSAGE_WORDS) -> List[str]:
+    words = (text or '').split()
+    return [' '.join(words[i:i + size]) for i in range(0, len(words), size)] or ['']
+
+
+class BM25Index:
+    """Index inversé BM25 sur des passages de documents.
+
+    Chaque document source est découpé en passages de PASSAGE_WORDS mots ;
+    la recherche ne parcourt que les listes des termes de la question, ce qui
+    reste de l'ordre de la milliseconde pour quelques milliers de documents.
+    Un passage rattaché à une association n'est visible que par elle.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.by_source: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add_document(self, source: str, source_id: str, association_id: Optional[str],
+                     title: str, text: str):
+        """Indexe (ou réindexe) un document source"""
+        self.remove_document(source, source_id)
+        for number, passage in enumerate(split_passages(text)):
+            terms = Counter(tokenize(f"{title} {passage}"))
+            if not terms:
+                continue
+            self._insert(f"{source}:{source_id}:{number}", {
+                'source': source,
+                'source_id': source_id,
+                'association_id': association_id,
+                'title': title,
+                'text': passage,
+                'length': sum(terms.values()),
+                'terms': dict(terms)
+            })
+
+    def _insert(self, key: str, doc: Dict[str, Any]):
+        self.docs[key] = doc
+        self.by_source[(doc['source'], doc['source_id'])].append(key)
+        self.total_length += doc['length']
+        for term, frequency in doc['terms'].items():
+            self.postings[term][key] = frequency
+
+    def remove_document(self, source: str, source_id: str):
+        for key in self.by_source.pop((source, source_id), []):
+            doc = self.docs.pop(key)
+            self.total_length -= doc['length']
+            for term in doc['terms']:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def search(self, query: str, association_id: Optional[str] = None, k: int = 3) -> List[Dict[str, Any]]:
+        """Les k passages les plus pertinents, visibles par l'association"""
+        if not self.docs:
+            return []
+        count = len(self.docs)
+        average_length = self.total_length / count
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                owner = self.docs[key]['association_id']
+                if owner is not None and owner != association_id:
+                    continue
+                length = self.docs[key]['length']
+                scores[key] += idf * frequency * (self.k1 + 1) / (
+                    frequency + self.k1 * (1 - self.b + self.b * length / average_length))
+
+        results = []
+        for key, score in nlargest(k, scores.items(), key=lambda item: item[1]):
+            doc = self.docs[key]
+            results.append({
+                'source': doc['source'],
+                'source_id': doc['source_id'],
+                'title': doc['title'],
+                'text': doc['text'],
+                'score': round(score, 3)
+            })
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': 1, 'k1': self.k1, 'b': self.b, 'docs': self.docs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BM25Index':
+        index = cls(k1=data.get('k1', 1.2), b=data.get('b', 0.75))
+        for key, doc in data.get('docs', {}).items():
+            index._insert(key, doc)
+        return index
+
+
+# =============================================================================
+# DOCUMENTS INDEXÉS
+# =============================================================================
+
+def _join(*parts: Any) -> str:
+    texts = []
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            texts.extend(str(item) for item in part)
+        elif part:
+            texts.append(str(part))
+    return '\n'.join(texts)
+
+
+def document_for(record, diagnostic_owner=None) -> Optional[Tuple[str, str, Optional[str], str, str]]:
+    """(source, id, association, titre, texte) d'un objet indexable, None sinon.
+
+    diagnostic_owner(diagnostic_id) retourne l'association d'un diagnostic.
+    """
+    from app.models.guidance import ComplianceCheck, DocumentTemplate, Recommendation
+
+    if isinstance(record, DocumentTemplate):
+        return ('template', record.id, None, record.name,
+                _join(record.description, record.template_content))
+    owner = diagnostic_owner(record.diagnostic_id) if diagnostic_owner else None
+    if isinstance(record, Recommendation):
+        return ('recommendation', record.id, owner, record.title,
+                _join(record.description, record.action_steps, record.impact))
+    if isinstance(record, ComplianceCheck):
+        return ('compliance', record.id, owner, record.title,
+                _join(record.description, record.action_items))
+    return None
+
+
+def _diagnostic_owner(session):
+    from app.models.guidance import OrganizationalDiagnostic
+
+    def owner(diagnostic_id):
+        if diagnostic_id is None:
+            return None
+        with session.no_autoflush:
+            diagnostic = session.get(OrganizationalDiagnostic, diagnostic_id)
+        return diagnostic.association_id if diagnostic else None
+    return owner
+
+
+def build_index(session) -> BM25Index:
+    """Construit l'index complet depuis la base"""
+    from app.models.guidance import ComplianceCheck, DocumentTemplate, Recommendation
+
+    index = BM25Index()
+    owner = _diagnostic_owner(session)
+    for model in (DocumentTemplate, Recommendation, ComplianceCheck):
+        for record in session.query(model).yield_per(500):
+            index.add_document(*document_for(record, owner))
+    return index
+
+
+# =============================================================================
+# INDEX PARTAGÉ PAR LES WORKERS
+# =============================================================================
+
+class GuidanceIndexStore:
+    """Index en mémoire, persisté dans un fichier JSON partagé par les workers.
+
+    Chaque écriture du fichier sérialise tout l'index (coût proportionnel au
+    corpus) : les modifications sont appliquées en mémoire tout de suite puis
+    écrites ensemble persist_delay secondes plus tard (0 = à chaque commit).
+    L'écriture se fait sous verrou, dans un fichier temporaire synchronisé
+    sur disque puis renommé (os.replace) : un arrêt brutal laisse l'ancien
+    index intact, jamais un fichier tronqué. Les autres workers rechargent
+    le fichier lorsque sa date de modification change ; les modifications
+    pas encore écrites sont alors réappliquées par-dessus.
+    """
+
+    def __init__(self, path: Optional[str] = None, persist_delay: float = 0.0):
+        self.path = path
+        self.persist_delay = persist_delay
+        self.index: Optional[BM25Index] = None
+        self._mtime: Optional[float] = None
+        self._pending: List[Tuple[str, Any]] = []  # Modifications pas encore écrites dans le fichier
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if not self.path or fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime if self.path else None
+        except OSError:
+            return None
+
+    def _load_file(self) -> bool:
+        mtime = self._file_mtime()
+        if mtime is None:
+            return False
+        with open(self.path) as f:
+            self.index = BM25Index.from_dict(json.load(f))
+        self._mtime = mtime
+        # Modifications de ce worker que le fichier relu ne contient pas encore
+        self._apply_to_index(self._pending)
+        return True
+
+    def _save_file(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.guidance-index-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.index.to_dict(), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._mtime = self._file_mtime()
+        self._pending = []
+
+    def _apply_to_index(self, changes: Iterable[Tuple[str, Any]]):
+        for action, payload in changes:
+            if action == 'upsert':
+                self.index.add_document(*payload)
+            else:
+                self.index.remove_document(*payload)
+
+    def get(self, session=None) -> Optional[BM25Index]:
+        """Index à jour : rechargé si un autre worker l'a modifié, construit s'il n'existe pas"""
+        with self._lock:
+            mtime = self._file_mtime()
+            if mtime is not None and mtime != self._mtime:
+                try:
+                    self._load_file()
+                except (OSError, ValueError) as e:
+                    logger.error(f"Lecture de l'index des ressources impossible: {e}")
+            if self.index is None and session is not None:
+                self.rebuild(session)
+            return self.index
+
+    def rebuild(self, session) -> BM25Index:
+        """Reconstruction complète (commande hors ligne ou premier démarrage)"""
+        index = build_index(session)
+        with self._lock, self._file_lock():
+            self.index = index
+            self._save_file()
+        return index
+
+    def apply(self, changes: Iterable[Tuple[str, Any]]):
+        """Applique des ajouts ('upsert', document) et suppressions ('delete', (source, id))"""
+        changes = list(changes)
+        if not changes:
+            return
+        with self._lock:
+            if self.path and self._file_mtime() != self._mtime:
+                self._load_file()
+            if self.index is None:
+                return  # Jamais construit dans ce processus : il le sera depuis la base
+            self._apply_to_index(changes)
+            if not self.path:
+                return
+            self._pending.extend(changes)
+            if self.persist_delay <= 0:
+                self.flush()
+            elif self._timer is None:
+                # Les commits suivants de la fenêtre partent avec la même écriture
+                self._timer = threading.Timer(self.persist_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Écrit dans le fichier les modifications en attente"""
+        with self._lock:
+            self._timer = None
+            if not self._pending:
+                return
+            try:
+                with self._file_lock():
+                    if self._file_mtime() != self._mtime:
+                        self._load_file()  # Fusion avec les écritures des autres workers
+                    self._save_file()
+            except Exception as e:
+                logger.error(f"Écriture de l'index des ressources impossible: {e}")
+
+
+def format_snippets(snippets: List[Dict[str, Any]], max_tokens: int) -> Tuple[str, int]:
+    """Bloc de contexte pour le prompt dans la limite de tokens ; retourne (texte, nombre d'extraits)"""
+    lines = []
+    remaining = max_tokens
+    for snippet in snippets:
+        label = SOURCE_LABELS.get(snippet['source'], snippet['source'])
+        line = f"- {label} « {snippet['title']} » : {snippet['text']}"
+        tokens = estimate_tokens(line)
+        if tokens > remaining:
+            if remaining >= 32:
+                lines.append(trim_to_tokens(line, remaining))
+            break
+        lines.append(line)
+        remaining -= tokens
+    if not lines:
+        return '', 0
+    return "RESSOURCES DE L'ASSOCIATION (extraits pertinents):\n" + '\n'.join(lines) + '\n\n', len(lines)
+
+
+# Instance partagée par le processus
+_store: Optional[GuidanceIndexStore] = None
+_store_pid: Optional[int] = None
+_store_lock = threading.Lock()
+
+
+def get_guidance_index_store() -> GuidanceIndexStore:
+    global _store, _store_pid
+    from flask import current_app, has_app_context
+
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            path = current_app.config.get('GUIDANCE_INDEX_PATH') if has_app_context() else None
+            delay = current_app.config.get('GUIDANCE_INDEX_PERSIST_DELAY', 0) if has_app_context() else 0
+            _store = GuidanceIndexStore(path or None, persist_delay=delay)
+            atexit.register(_store.flush)
+            _store_pid = os.getpid()
+        return _store
+
+
+def reset_guidance_index_store():
+    global _store, _store_pid
+    with _store_lock:
+        _store = None
+        _store_pid = None
+
+
+def search_guidance(query: str, association_id: Optional[str], k: int = 3) -> Tuple[List[Dict[str, Any]], float]:
+    """Recherche dans l'index partagé ; retourne (extraits, durée en ms)"""
+    from app import db
+
+    started = time.perf_counter()
+    index = get_guidance_index_store().get(db.session)
+    results = index.search(query, association_id, k) if index is not None else []
+    return results, round((time.perf_counter() - started) * 1000, 2)
+
+
+# =============================================================================
+# MISE À JOUR À L'ÉCRITURE
+# =============================================================================
+
+def _collect_changes(session, flush_context):
+    """after_flush : documents modifiés, calculés tant que la transaction est ouverte"""
+    from app.models.guidance import ComplianceCheck, DocumentTemplate, Recommendation
+
+    indexed = (DocumentTemplate, Recommendation, ComplianceCheck)
+    changes = session.info.setdefault('guidance_index_changes', [])
+    owner = _diagnostic_owner(session)
+    for record in list(session.new) + list(session.dirty):
+        if isinstance(record, indexed):
+            changes.append(('upsert', document_for(record, owner)))
+    for record in session.deleted:
+        if isinstance(record, indexed):
+            source = document_for(record)[0]
+            changes.append(('delete', (source, record.id)))
+
+
+def _apply_changes(session):
+    """after_commit : l'index n'est modifié qu'une fois les données validées"""
+    changes = session.info.pop('guidance_index_changes', None)
+    if changes:
+        try:
+            get_guidance_index_store().apply(changes)
+        except Exception as e:
+            logger.error(f"Mise à jour de l'index des ressources impossible: {e}")
+
+
+def _discard_changes(session):
+    session.info.pop('guidance_index_changes', None)
+
+
+def register_index_events():
+    """Branche la mise à jour incrémentale de l'index sur les sessions SQLAlchemy"""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if event.contains(Session, 'after_flush', _collect_changes):
+        return
+    event.listen(Session, 'after_flush', _collect_changes)
+    event.listen(Session, 'after_commit', _apply_changes)
+    event.listen(Session, 'after_rollback', _discard_changes)
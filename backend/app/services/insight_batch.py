@@ -0,0 +1,358 @@
+# Calcul nocturne des SmartInsights de toutes les associations
+import logging
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, distinct, func, insert
+
+from app import db
+from app.models.association import Association
+from app.models.cotisation import Cotisation
+from app.models.event import Event
+from app.models.guidance import InsightBatchRun, InsightType, OrganizationalDiagnostic, SmartInsight
+from app.models.member import Member
+from app.models.transaction import Transaction, TransactionType
+from app.services.collection_versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+NIGHTLY_SOURCE = 'nightly'
+
+# Associations lues, calculées et écrites ensemble (une transaction par lot)
+CHUNK_SIZE = 200
+
+# Rôles attendus dans le bureau
+KEY_ROLES = ('PRESIDENT', 'SECRETARY', 'TREASURER')
+
+
+# =============================================================================
+# LECTURE : agrégats SQL par lot d'associations
+# =============================================================================
+
+def _grouped(query, key) -> Dict[int, Any]:
+    return {row[0]: row for row in query.group_by(key).all()}
+
+
+def collect_stats(association_ids: List[int], today: date) -> Dict[int, Dict[str, Any]]:
+    """Indicateurs des associations du lot, calculés par la base (GROUP BY) sans charger les lignes"""
+    now = datetime.combine(today, datetime.min.time())
+    quarter_ago = now - timedelta(days=90)
+    year_ago = today - timedelta(days=365)
+
+    members = _grouped(db.session.query(
+        Member.association_id,
+        func.count(Member.id),
+        func.sum(case((Member.status == 'ACTIVE', 1), else_=0)),
+        func.sum(case((Member.join_date >= quarter_ago, 1), else_=0))
+    ).filter(Member.association_id.in_(association_ids)), Member.association_id)
+
+    roles: Dict[int, set] = {}
+    for association_id, role in db.session.query(Member.association_id, Member.role).filter(
+        Member.association_id.in_(association_ids),
+        Member.status == 'ACTIVE',
+        Member.role.in_(KEY_ROLES)
+    ).distinct():
+        roles.setdefault(association_id, set()).add(role)
+
+    cotisations = _grouped(db.session.query(
+        Member.association_id,
+        func.count(distinct(case((Cotisation.status == 'PAID', Cotisation.member_id)))),
+        func.sum(case((Cotisation.status == 'OVERDUE', 1), else_=0)),
+        func.sum(case((Cotisation.status == 'PENDING', 1), else_=0))
+    ).join(Cotisation, Cotisation.member_id == Member.id).filter(
+        Member.association_id.in_(association_ids),
+        Cotisation.year == today.year
+    ), Member.association_id)
+
+    events = _grouped(db.session.query(
+        Event.association_id,
+        func.sum(case((and_(Event.start_date >= now, Event.status != 'CANCELLED'), 1), else_=0)),
+        func.sum(case((and_(Event.start_date >= quarter_ago, Event.start_date < now,
+                            Event.status != 'CANCELLED'), 1), else_=0))
+    ).filter(Event.association_id.in_(association_ids)), Event.association_id)
+
+    finances = _grouped(db.session.query(
+        Transaction.association_id,
+        func.sum(case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0)),
+        func.sum(case((Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0)),
+        func.max(Transaction.date)
+    ).filter(
+        Transaction.association_id.in_(association_ids),
+        Transaction.date >= year_ago
+    ), Transaction.association_id)
+
+    stats = {}
+    for association_id in association_ids:
+        member_row = members.get(association_id)
+        cotisation_row = cotisations.get(association_id)
+        event_row = events.get(association_id)
+        finance_row = finances.get(association_id)
+        last_transaction = finance_row[3] if finance_row else None
+        stats[association_id] = {
+            'association_id': association_id,
+            'members': int(member_row[1]) if member_row else 0,
+            'active_members': int(member_row[2] or 0) if member_row else 0,
+            'new_members_90d': int(member_row[3] or 0) if member_row else 0,
+            'missing_roles': [role for role in KEY_ROLES if role not in roles.get(association_id, set())],
+            'paying_members': int(cotisation_row[1] or 0) if cotisation_row else 0,
+            'overdue_cotisations': int(cotisation_row[2] or 0) if cotisation_row else 0,
+            'pending_cotisations': int(cotisation_row[3] or 0) if cotisation_row else 0,
+            'upcoming_events': int(event_row[1] or 0) if event_row else 0,
+            'recent_events': int(event_row[2] or 0) if event_row else 0,
+            'income_12m': float(finance_row[1] or 0) if finance_row else 0.0,
+            'expense_12m': float(finance_row[2] or 0) if finance_row else 0.0,
+            'days_since_transaction': (today - last_transaction).days if last_transaction else None
+        }
+    return stats
+
+
+# =============================================================================
+# CALCUL : fonction pure exécutée dans les processus du pool
+# =============================================================================
+
+def _insight(kind: InsightType, category: str, title: str, description: str, priority: int,
+             actions: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        'type': kind.value,
+        'category': category,
+        'title': title,
+        'description': description,
+        'priority': priority,
+        'actionable': bool(actions),
+        'actions': actions or []
+    }
+
+
+def compute_insights(stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Insights d'une association à partir de ses indicateurs (les titres ne varient pas d'un jour à l'autre)"""
+    insights = []
+    members, active = stats['members'], stats['active_members']
+
+    if members >= 5 and active / members < 0.6:
+        insights.append(_insight(
+            InsightType.WARNING, 'membres', "Engagement des membres en baisse",
+            f"Seulement {active} membres actifs sur {members} ({active * 100 // members} %).", 4,
+            ["Contacter les membres inactifs", "Proposer une activité de remobilisation"]))
+    if members and stats['new_members_90d'] == 0:
+        insights.append(_insight(
+            InsightType.SUGGESTION, 'membres', "Aucune nouvelle adhésion depuis trois mois",
+            "Aucun membre n'a rejoint l'association au cours des 90 derniers jours.", 2,
+            ["Organiser une journée portes ouvertes", "Relayer les activités sur les réseaux sociaux"]))
+    elif stats['new_members_90d'] >= max(3, members // 10):
+        insights.append(_insight(
+            InsightType.ACHIEVEMENT, 'membres', "Dynamique d'adhésion positive",
+            f"{stats['new_members_90d']} nouveaux membres au cours des 90 derniers jours.", 1))
+    if members and stats['missing_roles']:
+        insights.append(_insight(
+            InsightType.WARNING, 'gouvernance', "Bureau incomplet",
+            f"Rôles sans titulaire actif : {', '.join(stats['missing_roles'])}.", 4,
+            ["Désigner les membres du bureau lors de la prochaine assemblée"]))
+
+    if active:
+        payment_rate = stats['paying_members'] / active
+        if payment_rate < 0.5:
+            insights.append(_insight(
+                InsightType.WARNING, 'cotisations', "Taux de cotisation faible",
+                f"{stats['paying_members']} membres actifs sur {active} ont réglé leur cotisation "
+                f"({int(payment_rate * 100)} %).", 4,
+                ["Rappeler l'échéance des cotisations", "Proposer le paiement par mobile money"]))
+        elif payment_rate >= 0.9:
+            insights.append(_insight(
+                InsightType.ACHIEVEMENT, 'cotisations', "Cotisations à jour",
+                f"{int(payment_rate * 100)} % des membres actifs ont réglé leur cotisation.", 1))
+    if stats['overdue_cotisations']:
+        insights.append(_insight(
+            InsightType.SUGGESTION, 'cotisations', "Cotisations en retard à relancer",
+            f"{stats['overdue_cotisations']} cotisations sont en retard de paiement.", 3,
+            ["Envoyer une relance aux membres concernés"]))
+
+    if members and stats['upcoming_events'] == 0:
+        insights.append(_insight(
+            InsightType.OPPORTUNITY, 'evenements', "Aucun événement planifié",
+            "Aucun événement n'est prévu : une activité régulière entretient l'engagement.", 2,
+            ["Planifier la prochaine réunion ou activité"]))
+    if stats['recent_events'] >= 3:
+        insights.append(_insight(
+            InsightType.ACHIEVEMENT, 'evenements', "Vie associative active",
+            f"{stats['recent_events']} événements organisés au cours des 90 derniers jours.", 1))
+
+    if stats['expense_12m'] > stats['income_12m']:
+        insights.append(_insight(
+            InsightType.WARNING, 'finances', "Dépenses supérieures aux recettes",
+            f"Sur 12 mois : {stats['expense_12m']:.0f} de dépenses pour {stats['income_12m']:.0f} de recettes.", 5,
+            ["Réviser le budget prévisionnel", "Rechercher des subventions ou partenariats"]))
+    days = stats['days_since_transaction']
+    if members and (days is None or days > 90):
+        insights.append(_insight(
+            InsightType.SUGGESTION, 'finances', "Suivi financier à reprendre",
+            "Aucune transaction enregistrée depuis plus de 90 jours.", 2,
+            ["Saisir les recettes et dépenses récentes"]))
+    return insights
+
+
+def _compute_chunk(stats_list: List[Dict[str, Any]]) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    return [(stats['association_id'], compute_insights(stats)) for stats in stats_list]
+
+
+# =============================================================================
+# ÉCRITURE : insertion groupée et point de reprise dans la même transaction
+# =============================================================================
+
+def _latest_diagnostics(association_ids: List[int]) -> Dict[str, str]:
+    """Diagnostic le plus récent de chaque association (les insights y sont rattachés)"""
+    latest: Dict[str, Tuple[datetime, str]] = {}
+    for association_id, diagnostic_id, performed_at in db.session.query(
+        OrganizationalDiagnostic.association_id, OrganizationalDiagnostic.id,
+        OrganizationalDiagnostic.performed_at
+    ).filter(OrganizationalDiagnostic.association_id.in_([str(i) for i in association_ids])):
+        if association_id not in latest or performed_at > latest[association_id][0]:
+            latest[association_id] = (performed_at, diagnostic_id)
+    return {association_id: diagnostic_id for association_id, (_, diagnostic_id) in latest.items()}
+
+
+def _write_chunk(run: InsightBatchRun, association_ids: List[int],
+                 results: List[Tuple[int, List[Dict[str, Any]]]], elapsed: float):
+    """Remplace les insights nocturnes du lot et avance le point de reprise (un seul commit)"""
+    diagnostics = _latest_diagnostics(association_ids)
+    diagnostic_ids = list(diagnostics.values())
+
+    dismissed = set()
+    if diagnostic_ids:
+        # Un insight ignoré par l'association n'est pas recréé
+        dismissed = set(db.session.query(SmartInsight.diagnostic_id, SmartInsight.title).filter(
+            SmartInsight.diagnostic_id.in_(diagnostic_ids),
+            SmartInsight.source == NIGHTLY_SOURCE,
+            SmartInsight.dismissed.is_(True)
+        ).all())
+        db.session.execute(delete(SmartInsight).where(
+            SmartInsight.diagnostic_id.in_(diagnostic_ids),
+            SmartInsight.source == NIGHTLY_SOURCE,
+            SmartInsight.dismissed.is_(False)
+        ))
+
+    now = datetime.utcnow()
+    rows = []
+    for association_id, insights in results:
+        diagnostic_id = diagnostics.get(str(association_id))
+        if diagnostic_id is None:
+            run.skipped += 1
+            continue
+        for insight in insights:
+            if (diagnostic_id, insight['title']) in dismissed:
+                continue
+            rows.append(dict(insight, id=str(uuid.uuid4()), diagnostic_id=diagnostic_id,
+                             type=InsightType(insight['type']), source=NIGHTLY_SOURCE, dismissed=False,
+                             created_at=now, updated_at=now))
+    if rows:
+        db.session.execute(insert(SmartInsight), rows)
+    if diagnostics:
+        # Insertion groupée hors ORM : versions des listes de guidance incrémentées ici
+        bump_versions(db.session, [(int(association_id), 'guidance') for association_id in diagnostics])
+
+    run.processed += len(results)
+    run.insights_created += len(rows)
+    run.last_association_id = max(association_ids)
+    run.elapsed_seconds += elapsed
+    db.session.commit()
+
+
+# =============================================================================
+# ORCHESTRATION
+# =============================================================================
+
+def _association_chunks(after_id: int, chunk_size: int, limit: Optional[int]) -> Iterator[List[int]]:
+    """Identifiants d'associations par lots, en ordre croissant (pagination par clé)"""
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        ids = [row[0] for row in db.session.query(Association.id).filter(
+            Association.id > after_id
+        ).order_by(Association.id).limit(size)]
+        if not ids:
+            return
+        yield ids
+        after_id = ids[-1]
+        if remaining is not None:
+            remaining -= len(ids)
+
+
+def _start_or_resume(restart: bool) -> InsightBatchRun:
+    run = db.session.query(InsightBatchRun).filter_by(status='running').order_by(
+        InsightBatchRun.started_at.desc()
+    ).first()
+    if run is not None and restart:
+        run.status = 'abandoned'
+        run = None
+    if run is None:
+        run = InsightBatchRun(id=str(uuid.uuid4()), status='running', reference_date=date.today(),
+                              last_association_id=0, processed=0, skipped=0, insights_created=0,
+                              elapsed_seconds=0.0)
+        db.session.add(run)
+    else:
+        logger.info(f"Reprise du calcul des insights après l'association {run.last_association_id}")
+    db.session.commit()
+    return run
+
+
+def run_insight_batch(workers: int = 0, chunk_size: int = CHUNK_SIZE, restart: bool = False,
+                      limit: Optional[int] = None,
+                      progress: Optional[Callable[[InsightBatchRun], None]] = None) -> InsightBatchRun:
+    """Calcule les insights de toutes les associations (à appeler dans un contexte d'application).
+
+    Les indicateurs sont lus par lots de chunk_size associations, les règles
+    s'exécutent dans un pool de `workers` processus (0 : dans le processus
+    courant) pendant la lecture du lot suivant, et chaque lot est écrit par
+    insertion groupée avec le point de reprise. Une exécution interrompue
+    reprend au lot suivant le dernier écrit, sauf si restart=True.
+    """
+    run = _start_or_resume(restart)
+    today = run.reference_date
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    per_task = max(1, chunk_size // (max(workers, 1) * 4))
+
+    def submit(stats_list):
+        if executor is None:
+            return _compute_chunk(stats_list)
+        # Le lot est découpé entre les processus ; le résultat est lu à l'écriture
+        parts = [stats_list[i:i + per_task] for i in range(0, len(stats_list), per_task)]
+        return [executor.submit(_compute_chunk, part) for part in parts]
+
+    def collect(pending):
+        if executor is None:
+            return pending
+        return [item for future in pending for item in future.result()]
+
+    mark = time.monotonic()
+
+    def flush(association_ids, pending):
+        nonlocal mark
+        results = collect(pending)
+        now = time.monotonic()
+        _write_chunk(run, association_ids, results, now - mark)
+        mark = now
+        if progress:
+            progress(run)
+
+    try:
+        previous = None
+        for association_ids in _association_chunks(run.last_association_id, chunk_size, limit):
+            pending = submit(list(collect_stats(association_ids, today).values()))
+            if previous is not None:
+                flush(*previous)
+            previous = (association_ids, pending)
+        if previous is not None:
+            flush(*previous)
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    run.status = 'completed'
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return run
@@ -0,0 +1,207 @@
+# Import groupé de membres depuis un fichier CSV ou XLSX
+#
+# Le fichier est lu ligne à ligne (jamais chargé en entier) et traité par
+# lots : validation, une seule requête par lot pour repérer les emails déjà
+# enregistrés, puis une insertion groupée et un commit par lot.
+import codecs
+import csv
+import re
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+
+from app import db
+from app.models.member import Member, member_search_text, normalize_search
+from app.services.collection_versions import bump_versions
+
+# Lignes validées et insérées ensemble
+IMPORT_CHUNK_SIZE = 1000
+
+# Erreurs détaillées renvoyées au maximum (les suivantes sont seulement comptées)
+MAX_REPORTED_ERRORS = 1000
+
+SUPPORTED_EXTENSIONS = ('csv', 'xlsx')
+
+# En-têtes acceptés pour chaque champ (comparés sans accents, casse ni séparateurs)
+HEADER_ALIASES = {
+    'first_name': ('firstname', 'prenom'),
+    'last_name': ('lastname', 'nom'),
+    'email': ('email', 'mail', 'courriel'),
+    'phone': ('phone', 'telephone', 'tel'),
+    'role': ('role', 'fonction'),
+    'status': ('status', 'statut')
+}
+REQUIRED_FIELDS = ('first_name', 'last_name', 'email', 'phone')
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class ImportFileError(ValueError):
+    """Fichier illisible ou en-têtes incomplets (rien n'est importé)"""
+
+
+def _header_key(value: Any) -> str:
+    return re.sub(r'[^a-z]', '', normalize_search(str(value or '')))
+
+
+def map_headers(headers: List[Any]) -> Dict[str, int]:
+    """Position de chaque champ connu dans la ligne d'en-têtes"""
+    aliases = {alias: field for field, names in HEADER_ALIASES.items() for alias in names}
+    positions = {}
+    for position, header in enumerate(headers):
+        field = aliases.get(_header_key(header))
+        if field and field not in positions:
+            positions[field] = position
+    missing = [field for field in REQUIRED_FIELDS if field not in positions]
+    if missing:
+        raise ImportFileError(f"Colonnes manquantes: {', '.join(missing)}")
+    return positions
+
+
+def _csv_rows(stream: IO[bytes]) -> Iterator[List[Any]]:
+    reader = codecs.getreader('utf-8-sig')(stream)
+    first = reader.readline()
+    delimiter = ';' if first.count(';') > first.count(',') else ','
+    yield next(csv.reader([first], delimiter=delimiter), [])
+    yield from csv.reader(reader, delimiter=delimiter)
+
+
+def _xlsx_rows(stream: IO[bytes]) -> Iterator[List[Any]]:
+    from openpyxl import load_workbook
+
+    # read_only : les lignes sont lues à la demande depuis l'archive
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def read_rows(stream: IO[bytes], extension: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(numéro de ligne, champs) de chaque ligne non vide du fichier"""
+    try:
+        rows = _xlsx_rows(stream) if extension == 'xlsx' else _csv_rows(stream)
+        headers = next(rows, None)
+        if not headers:
+            raise ImportFileError('Fichier vide')
+        positions = map_headers(headers)
+        for line, row in enumerate(rows, start=2):
+            values = {field: str(row[position]).strip() if position < len(row) and row[position] is not None else ''
+                      for field, position in positions.items()}
+            if any(values.values()):
+                yield line, values
+    except ImportFileError:
+        raise
+    except Exception as e:  # CSV mal encodé, archive XLSX corrompue...
+        raise ImportFileError(f'Fichier illisible: {e}')
+
+
+def validate_row(values: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Ligne prête à insérer, ou message d'erreur"""
+    missing = [field for field in REQUIRED_FIELDS if not values.get(field)]
+    if missing:
+        return None, f"Champs requis manquants: {', '.join(missing)}"
+    if not EMAIL_PATTERN.match(values['email']):
+        return None, 'Adresse email invalide'
+    too_long = [field for field in ('first_name', 'last_name', 'phone', 'email')
+                if len(values[field]) > Member.__table__.c[field].type.length]
+    if too_long:
+        return None, f"Valeur trop longue: {', '.join(too_long)}"
+    return {
+        'first_name': values['first_name'],
+        'last_name': values['last_name'],
+        'email': values['email'],
+        'phone': values['phone'],
+        'role': (values.get('role') or 'MEMBER').upper(),
+        'status': (values.get('status') or 'ACTIVE').upper()
+    }, None
+
+
+class ImportReport:
+    """Bilan d'un import : compteurs et erreurs ligne par ligne"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+
+    def error(self, line: int, email: str, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'email': email or None, 'error': message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'rejected': self.error_count,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+
+def _import_chunk(chunk: List[Tuple[int, Dict[str, str]]], association_id, seen: set,
+                  report: ImportReport, dry_run: bool):
+    valid = []
+    for line, values in chunk:
+        data, message = validate_row(values)
+        if message:
+            report.error(line, values.get('email'), message)
+        elif data['email'].lower() in seen:
+            report.error(line, data['email'], 'Email en double dans le fichier')
+        else:
+            seen.add(data['email'].lower())
+            valid.append((line, data))
+    if not valid:
+        return
+
+    # Un seul aller-retour pour les emails déjà enregistrés (toutes associations : email unique),
+    # comparés sans tenir compte de la casse comme les doublons du fichier
+    emails = [data['email'].lower() for _, data in valid]
+    existing = {email.lower() for email in db.session.execute(
+        select(Member.email).where(func.lower(Member.email).in_(emails))).scalars()}
+    now = datetime.utcnow()
+    rows = []
+    for line, data in valid:
+        if data['email'].lower() in existing:
+            report.error(line, data['email'], 'Cette adresse email est déjà utilisée')
+            continue
+        data.update(
+            association_id=association_id, join_date=now, created_at=now, updated_at=now,
+            # Insertion groupée : les événements ORM qui tiennent search_text à jour ne s'appliquent pas
+            search_text=member_search_text(data['first_name'], data['last_name'], data['email'])
+        )
+        rows.append(data)
+
+    if rows and not dry_run:
+        db.session.execute(insert(Member), rows)
+        bump_versions(db.session, [(int(association_id), 'members')])
+        db.session.commit()
+    report.imported += len(rows)
+
+
+def import_members(stream: IO[bytes], extension: str, association_id, chunk_size: int = IMPORT_CHUNK_SIZE,
+                   dry_run: bool = False) -> ImportReport:
+    """Importe les membres du fichier ; les lignes invalides ou en double sont rapportées, pas importées.
+
+    Chaque lot est validé puis enregistré par sa propre transaction : une
+    erreur en cours de fichier laisse les lots précédents importés. Avec
+    dry_run, rien n'est écrit et le bilan indique ce qui serait importé.
+    """
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ImportFileError('Format non supporté (CSV ou XLSX)')
+    report = ImportReport()
+    seen: set = set()
+    chunk = []
+    for line, values in read_rows(stream, extension):
+        report.rows += 1
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, association_id, seen, report, dry_run)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, association_id, seen, report, dry_run)
+    return report
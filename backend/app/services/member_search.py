@@ -0,0 +1,101 @@
+# Recherche des membres insensible aux accents, servie par un index trigrammes
+#
+# La colonne members.search_text contient "nom prénom email" normalisé
+# (voir normalize_search). Elle est indexée par FTS5 (tokenizer trigram) sous
+# SQLite et par un index GIN pg_trgm sous PostgreSQL : une recherche de
+# sous-chaîne n'a plus à parcourir toute la table.
+from typing import List, Optional
+
+from sqlalchemy import and_, case, literal_column, or_, select, table, text
+
+from app import db
+from app.models.member import Member, member_search_text, normalize_search
+
+# Les trigrammes ne couvrent que les termes d'au moins 3 caractères
+TRIGRAM_MIN_LENGTH = 3
+
+# Résultats maximum de l'autocomplétion
+TYPEAHEAD_MAX_LIMIT = 50
+
+# Champs renvoyés par l'autocomplétion
+TYPEAHEAD_FIELDS = ('id', 'firstName', 'lastName', 'email', 'role', 'status')
+
+
+def _dialect() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def _fts_match(token: str):
+    """Identifiants des membres dont le texte contient `token` (index FTS5)"""
+    phrase = '"' + token.replace('"', '""') + '"'
+    fts = table('members_fts')
+    return Member.id.in_(
+        select(literal_column('rowid')).select_from(fts).where(literal_column('members_fts').op('MATCH')(phrase))
+    )
+
+
+def token_filter(token: str, dialect: str):
+    """Critère d'un terme normalisé : sous-chaîne, ou début de mot pour les termes courts"""
+    if len(token) < TRIGRAM_MIN_LENGTH:
+        return or_(Member.search_text.startswith(token, autoescape=True),
+                   Member.search_text.contains(' ' + token, autoescape=True))
+    if dialect == 'sqlite':
+        return _fts_match(token)
+    # PostgreSQL : LIKE '%...%' servi par l'index GIN gin_trgm_ops
+    return Member.search_text.contains(token, autoescape=True)
+
+
+def search_filter(term: str, dialect: Optional[str] = None):
+    """Critère SQL d'une recherche ; tous les mots doivent être présents (None si vide)"""
+    tokens = normalize_search(term).split()
+    if not tokens:
+        return None
+    dialect = dialect or _dialect()
+    return and_(*[token_filter(token, dialect) for token in tokens])
+
+
+def typeahead(association_id, term: str, limit: int = 10) -> List[Member]:
+    """Meilleures correspondances d'une saisie partielle.
+
+    Classement : nom commençant par la saisie, puis un mot (prénom, email)
+    commençant par la saisie, puis simple sous-chaîne ; à rang égal, ordre
+    alphabétique du nom.
+    """
+    criteria = search_filter(term)
+    if criteria is None:
+        return []
+    normalized = normalize_search(term)
+    rank = case(
+        (Member.search_text.startswith(normalized, autoescape=True), 0),
+        (Member.search_text.contains(' ' + normalized, autoescape=True), 1),
+        else_=2
+    )
+    columns = [getattr(Member, Member.API_FIELDS[field]) for field in TYPEAHEAD_FIELDS]
+    return (db.session.query(*columns)
+            .filter(Member.association_id == association_id, criteria)
+            .order_by(rank, Member.last_name, Member.id)
+            .limit(limit)
+            .all())
+
+
+def rebuild_search_index(batch_size: int = 1000) -> int:
+    """Recalcule search_text de tous les membres puis reconstruit l'index ; retourne le nombre de membres"""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (db.session.query(Member.id, Member.first_name, Member.last_name, Member.email)
+                .filter(Member.id > last_id).order_by(Member.id).limit(batch_size).all())
+        if not rows:
+            break
+        db.session.execute(
+            Member.__table__.update().where(Member.__table__.c.id == db.bindparam('member_id')),
+            [{'member_id': row.id, 'search_text': member_search_text(row.first_name, row.last_name, row.email)}
+             for row in rows]
+        )
+        db.session.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+    if _dialect() == 'sqlite':
+        db.session.execute(text("INSERT INTO members_fts(members_fts) VALUES ('rebuild')"))
+        db.session.commit()
+    return updated
@@ -0,0 +1,108 @@
+# Routage des requêtes IA entre un modèle rapide et un modèle de qualité
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.ollama_pool import find_model
+
+FAST = 'fast'
+QUALITY = 'quality'
+
+# Pages dont les questions demandent un raisonnement approfondi
+COMPLEX_PAGES = ('governance', 'gouvernance', 'compliance', 'conformite', 'diagnostic')
+
+# Termes signalant une question complexe (comparaison, rédaction, réglementation...)
+COMPLEX_KEYWORDS = (
+    'statut', 'assemblée', 'assemblee', 'gouvernance', 'conformité', 'conformite',
+    'réglement', 'reglement', 'juridique', 'stratégie', 'strategie', 'pourquoi',
+    'comparer', 'analyse', 'rédiger', 'rediger', 'plan d\'action', 'conseil d\'administration'
+)
+
+# Au-delà de ce nombre de mots, la question part vers le modèle de qualité
+SHORT_QUERY_WORDS = 20
+
+
+def classify_query(query: str, context: Dict[str, Any]) -> str:
+    """Classe la requête : 'fast' pour les questions courtes type FAQ, 'quality' sinon"""
+    text = (query or '').lower()
+    current_page = str((context or {}).get('currentPage', '')).lower()
+
+    if len(text.split()) > SHORT_QUERY_WORDS:
+        return QUALITY
+    if any(page in current_page for page in COMPLEX_PAGES):
+        return QUALITY
+    if any(keyword in text for keyword in COMPLEX_KEYWORDS):
+        return QUALITY
+    return FAST
+
+
+class ModelRouter:
+    """Choisit le modèle Ollama d'une requête en respectant un objectif de latence.
+
+    Le débit de chaque modèle (tokens/s) est mesuré sur les réponses d'Ollama
+    et lissé par moyenne mobile exponentielle. Une requête classée 'quality'
+    est servie par le modèle rapide lorsque la génération estimée sur le gros
+    modèle (num_predict / débit) dépasse latency_slo secondes.
+    """
+
+    def __init__(self, fast_model: str, quality_model: str, latency_slo: float = 20.0,
+                 smoothing: float = 0.3):
+        self.models = {FAST: fast_model, QUALITY: quality_model}
+        self.latency_slo = latency_slo
+        self.smoothing = smoothing
+        self._tokens_per_second: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, metrics: Optional[Dict[str, Any]]):
+        """Met à jour le débit mesuré d'un modèle à partir des métriques d'une génération"""
+        tokens_per_second = (metrics or {}).get('tokens_per_second')
+        if not model or not tokens_per_second:
+            return
+        with self._lock:
+            previous = self._tokens_per_second.get(model)
+            if previous is None:
+                self._tokens_per_second[model] = tokens_per_second
+            else:
+                self._tokens_per_second[model] = (
+                    self.smoothing * tokens_per_second + (1 - self.smoothing) * previous
+                )
+
+    def estimated_latency(self, model: str, num_predict: int) -> Optional[float]:
+        """Durée de génération estimée en secondes, None tant que le modèle n'a pas été mesuré"""
+        # Débits enregistrés sous le nom du catalogue ('mistral-french:latest')
+        measured = find_model(list(self._tokens_per_second), model)
+        tokens_per_second = self._tokens_per_second.get(measured) if measured else None
+        if not tokens_per_second:
+            return None
+        return num_predict / tokens_per_second
+
+    def route(self, query: str, context: Dict[str, Any], available_models: List[str],
+              num_predict: int) -> Tuple[str, str]:
+        """Retourne (modèle, raison du choix), sous son nom du catalogue quand il y figure"""
+        tier = classify_query(query, context)
+        reason = tier
+
+        if tier == QUALITY:
+            latency = self.estimated_latency(self.models[QUALITY], num_predict)
+            if latency is not None and latency > self.latency_slo:
+                tier, reason = FAST, 'latency_slo'
+
+        model = self.models[tier]
+        if not available_models:
+            return model, reason
+        installed = find_model(available_models, model)
+        if installed is None:
+            other = find_model(available_models, self.models[QUALITY if tier == FAST else FAST])
+            if other is not None:
+                return other, f'{reason}:unavailable'
+            return model, reason
+        return installed, reason
+
+    def stats(self) -> Dict[str, Any]:
+        """Débits mesurés pour le monitoring"""
+        with self._lock:
+            return {
+                'fast_model': self.models[FAST],
+                'quality_model': self.models[QUALITY],
+                'latency_slo': self.latency_slo,
+                'tokens_per_second': {model: round(tps, 2) for model, tps in self._tokens_per_second.items()}
+            }
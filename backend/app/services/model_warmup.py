@@ -0,0 +1,134 @@
+# Préchargement et maintien en mémoire des modèles Ollama
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.services.ollama_pool import find_model
+
+logger = logging.getLogger(__name__)
+
+
+def parse_models(value: str) -> List[str]:
+    """Liste de modèles séparés par des virgules"""
+    return [model.strip() for model in (value or '').split(',') if model.strip()]
+
+
+def parse_hours(value: str) -> Optional[Tuple[int, int]]:
+    """Plage horaire 'début-fin' (heures locales), None = toute la journée"""
+    if not value:
+        return None
+    start, end = value.split('-', 1)
+    return int(start), int(end)
+
+
+def warm_up_models(service, models: List[str], keep_alive: Optional[str] = None,
+                   timeout: float = 300) -> Dict[str, Optional[float]]:
+    """Charge les modèles en mémoire via une génération vide.
+
+    Ollama charge le modèle sans rien générer quand le prompt est vide ;
+    keep_alive fixe ensuite sa durée de résidence. Chaque serveur du pool
+    hébergeant le modèle est préchargé. Retourne la durée de chargement de
+    chaque modèle en secondes (la plus lente du pool, None si tout a échoué).
+    """
+    durations: Dict[str, Optional[float]] = {}
+    for model in models:
+        durations[model] = None
+        for backend in service.pool.backends:
+            # Nom du catalogue du serveur ('llama2' y figure comme 'llama2:latest')
+            name = find_model(backend.models, model) if backend.checked else model
+            if name is None:
+                continue
+            payload = {'model': name, 'prompt': '', 'stream': False}
+            if keep_alive or service.keep_alive:
+                payload['keep_alive'] = keep_alive or service.keep_alive
+            started = time.monotonic()
+            try:
+                response = service.session.post(f"{backend.url}/api/generate", json=payload, timeout=timeout)
+                response.raise_for_status()
+                duration = round(time.monotonic() - started, 2)
+                durations[model] = max(durations[model] or 0.0, duration)
+                load_ms = (response.json().get('load_duration') or 0) / 1e6
+                logger.info(f"Modèle {model} préchargé sur {backend.url} en {duration}s (chargement Ollama: {load_ms:.0f} ms)")
+            except Exception as e:
+                logger.error(f"Préchargement du modèle {model} sur {backend.url} impossible: {e}")
+    return durations
+
+
+class ModelKeepAlive:
+    """Tâche périodique gardant les modèles chauds pendant les heures d'activité.
+
+    Ollama décharge un modèle après keep_alive sans requête ; un ping toutes
+    les `interval` secondes (inférieur à keep_alive) évite ce déchargement
+    pendant la plage horaire configurée.
+    """
+
+    def __init__(self, service, models: List[str], interval: float = 240,
+                 hours: Optional[Tuple[int, int]] = None, keep_alive: Optional[str] = None):
+        self.service = service
+        self.models = models
+        self.interval = interval
+        self.hours = hours
+        self.keep_alive = keep_alive
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def in_business_hours(self, now: Optional[datetime] = None) -> bool:
+        if self.hours is None:
+            return True
+        hour = (now or datetime.now()).hour
+        start, end = self.hours
+        return start <= hour < end
+
+    def tick(self) -> bool:
+        """Un passage de la tâche ; retourne True si les modèles ont été pingués"""
+        if not self.in_business_hours():
+            return False
+        if self.service.breaker is not None and self.service.breaker.is_open():
+            return False
+        warm_up_models(self.service, self.models, keep_alive=self.keep_alive, timeout=60)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Maintien en mémoire des modèles: {e}")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='ollama-keepalive', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def start_model_warmup(app) -> ModelKeepAlive:
+    """Préchargement en arrière-plan au démarrage puis maintien périodique"""
+    from app.services.ollama_service import get_ollama_service
+
+    with app.app_context():
+        service = get_ollama_service()
+    models = parse_models(app.config.get('OLLAMA_WARMUP_MODELS', ''))
+    keeper = ModelKeepAlive(
+        service,
+        models,
+        interval=app.config.get('OLLAMA_KEEPALIVE_INTERVAL', 240),
+        hours=parse_hours(app.config.get('OLLAMA_KEEPALIVE_HOURS', '')),
+        keep_alive=app.config.get('OLLAMA_KEEP_ALIVE') or None
+    )
+
+    def initial_warmup():
+        started = time.monotonic()
+        warm_up_models(service, models, keep_alive=keeper.keep_alive)
+        logger.info(f"Préchargement des modèles terminé en {time.monotonic() - started:.1f}s")
+        keeper.start()
+
+    # Le démarrage du worker n'attend pas le chargement des modèles
+    threading.Thread(target=initial_warmup, name='ollama-warmup', daemon=True).start()
+    return keeper
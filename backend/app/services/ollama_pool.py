@@ -0,0 +1,174 @@
+# Pool de serveurs Ollama : santé, inventaire des modèles et répartition de charge
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_base_urls(value: str, default: str) -> List[str]:
+    """Liste d'URL séparées par des virgules (OLLAMA_BASE_URLS), sinon l'URL unique"""
+    urls = [url.strip().rstrip('/') for url in (value or '').split(',') if url.strip()]
+    return urls or [default.rstrip('/')]
+
+
+def tagged_model(name: str) -> str:
+    """Nom complet d'un modèle : Ollama lit 'llama2' comme 'llama2:latest'"""
+    return name if ':' in name else name + ':latest'
+
+
+def model_matches(name: str, model: str) -> bool:
+    """Le nom du catalogue (/api/tags) désigne-t-il le modèle demandé ? 'llama2' couvre 'llama2:latest'"""
+    return name.startswith(model + ':') or tagged_model(name) == tagged_model(model)
+
+
+def find_model(models: List[str], model: str) -> Optional[str]:
+    """Nom du catalogue correspondant au modèle (exact, puis :latest, puis autre tag), None s'il est absent"""
+    if model in models:
+        return model
+    if model + ':latest' in models:
+        return model + ':latest'
+    return next((name for name in models if model_matches(name, model)), None)
+
+
+class OllamaBackend:
+    """Un serveur Ollama du pool"""
+
+    def __init__(self, url: str, index: int):
+        self.url = url
+        self.index = index
+        self.models: List[str] = []
+        self.healthy = True  # Optimiste tant que le premier contrôle n'a pas eu lieu
+        self.checked = False
+        self.outstanding = 0  # Requêtes en cours sur ce serveur
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'models': list(self.models),
+            'outstanding': self.outstanding,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
+
+
+class OllamaBackendPool:
+    """Répartit les générations sur plusieurs serveurs Ollama.
+
+    Chaque requête part vers le serveur sain ayant le moins de requêtes en
+    cours parmi ceux qui hébergent le modèle (tourniquet en cas d'égalité).
+    Un serveur en erreur est écarté pendant retry_delay secondes puis retenté ;
+    le contrôle de santé (/api/tags) met aussi à jour son inventaire de modèles.
+    """
+
+    def __init__(self, urls: List[str], retry_delay: float = 30.0):
+        self.backends = [OllamaBackend(url, index) for index, url in enumerate(urls)]
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+
+    def check_health(self, session, backend: OllamaBackend, timeout: float = 5) -> bool:
+        """Interroge /api/tags : serveur joignable et liste de ses modèles"""
+        try:
+            response = session.get(f"{backend.url}/api/tags", timeout=timeout)
+            response.raise_for_status()
+            models = [model['name'] for model in response.json().get('models', [])]
+        except Exception as e:
+            self.mark_failure(backend, e)
+            return False
+
+        with self._lock:
+            backend.models = models
+            backend.healthy = True
+            backend.checked = True
+            backend.retry_at = 0.0
+            backend.last_error = None
+        return True
+
+    def check_all(self, session) -> bool:
+        """Contrôle tous les serveurs ; True si au moins un est joignable"""
+        results = [self.check_health(session, backend) for backend in self.backends]
+        return any(results)
+
+    def all_healthy(self) -> bool:
+        return all(backend.healthy for backend in self.backends)
+
+    def set_models(self, models: List[str]):
+        """Force l'inventaire de tous les serveurs (tests, configuration statique)"""
+        with self._lock:
+            for backend in self.backends:
+                backend.models = list(models)
+                backend.healthy = True
+                backend.checked = True
+
+    def available_models(self) -> List[str]:
+        """Union des inventaires, dans l'ordre du pool.
+
+        Un serveur en erreur garde son dernier inventaire connu : la santé
+        intervient dans le choix du serveur, le disjoncteur gère la panne globale.
+        """
+        models: List[str] = []
+        for backend in self.backends:
+            models.extend(model for model in backend.models if model not in models)
+        return models
+
+    def candidates(self, model: Optional[str] = None) -> List[OllamaBackend]:
+        """Serveurs à essayer, du moins chargé au plus chargé"""
+        now = time.monotonic()
+        with self._lock:
+            usable = [b for b in self.backends if b.healthy or now >= b.retry_at]
+            if model is not None:
+                # Inventaire inconnu (pas encore contrôlé) : le serveur reste candidat
+                hosting = [b for b in usable if not b.checked or find_model(b.models, model) is not None]
+                usable = hosting or usable
+            if not usable:
+                # Tous en erreur : on tente quand même plutôt que d'échouer sans essayer
+                usable = list(self.backends)
+            start = next(self._rotation)
+            count = len(self.backends)
+            return sorted(usable, key=lambda b: (b.outstanding, (b.index - start) % count))
+
+    @contextmanager
+    def lease(self, backend: OllamaBackend) -> Iterator[OllamaBackend]:
+        """Compte une requête en cours sur le serveur pendant toute sa durée"""
+        with self._lock:
+            backend.outstanding += 1
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                backend.outstanding -= 1
+
+    def mark_failure(self, backend: OllamaBackend, error: Any):
+        with self._lock:
+            backend.healthy = False
+            backend.failures += 1
+            backend.retry_at = time.monotonic() + self.retry_delay
+            backend.last_error = str(error)
+        logger.warning(f"Serveur Ollama {backend.url} écarté pour {self.retry_delay}s: {error}")
+
+    def mark_success(self, backend: OllamaBackend):
+        if backend.healthy:
+            return
+        with self._lock:
+            backend.healthy = True
+            backend.retry_at = 0.0
+        logger.info(f"Serveur Ollama {backend.url} de nouveau disponible")
+
+    def forget_model(self, backend: OllamaBackend, model: str):
+        """Le serveur a répondu que le modèle est absent : on le retire de son inventaire"""
+        with self._lock:
+            name = find_model(backend.models, model)
+            if name is not None:
+                backend.models.remove(name)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
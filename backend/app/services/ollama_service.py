@@ -2,33 +2,145 @@
 import requests
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+from app.services.admission import FairAdmissionController, parse_weights
+from app.services.ai_cache import AIResponseCache
+from app.services.circuit_breaker import CircuitBreaker, build_breaker_store
+from app.services.ai_telemetry import estimate_confidence
+from app.services.generation_budget import (estimate_tokens, extract_metrics, fit_prompt,
+                                            get_budget, parse_budget_profiles, trim_to_tokens)
+from app.services.model_router import ModelRouter
+from app.services.ollama_pool import OllamaBackendPool, find_model, parse_base_urls, tagged_model
+from app.services.semantic_index import SemanticIndex, sync_from_db
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+# Modèle utilisé sans routeur ni choix explicite du client
+DEFAULT_MODEL = "llama2"
+
+# Délai avant de réessayer la récupération des modèles après un échec
+MODELS_RETRY_DELAY = 30
+
+# Intervalle minimal entre deux synchronisations de l'index sémantique avec la base
+SEMANTIC_SYNC_INTERVAL = 60
+
+# Début du texte de la réponse de secours (exclue du préchargement du cache)
+FALLBACK_RESPONSE_PREFIX = "Je comprends votre question sur"
+
+
 class OllamaService:
     """Service pour interagir avec Ollama local"""
     
-    def __init__(self, base_url: str = "http://localhost:11434"):
-        self.base_url = base_url
-        self.available_models = []
-        self.check_ollama_status()
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, models_ttl: int = 300,
+                 pool_size: int = 10, refresh_on_init: bool = True,
+                 cache: Optional[AIResponseCache] = None,
+                 admission: Optional[FairAdmissionController] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 budgets: Optional[Dict[str, Dict[str, int]]] = None,
+                 keep_alive: Optional[str] = None,
+                 router: Optional[ModelRouter] = None,
+                 base_urls: Optional[List[str]] = None,
+                 embedding_model: Optional[str] = None,
+                 retrieval_k: int = 0,
+                 retrieval_max_tokens: int = 400,
+                 history_tokens: int = 600):
+        # Plusieurs serveurs Ollama possibles ; base_url reste le premier du pool
+        self.pool = OllamaBackendPool(base_urls or [base_url.rstrip('/')], retry_delay=MODELS_RETRY_DELAY)
+        self.base_url = self.pool.backends[0].url
+        self.models_ttl = models_ttl
+        self.cache = cache
+        self.admission = admission
+        self.breaker = breaker
+        self.budgets = budgets
+        self.keep_alive = keep_alive  # Durée de résidence du modèle en mémoire ("30m")
+        self.router = router
+        self.embedding_model = embedding_model
+        self.retrieval_k = retrieval_k  # Extraits de ressources ajoutés au prompt (0 = aucun)
+        self.retrieval_max_tokens = retrieval_max_tokens
+        self.history_tokens = history_tokens  # Historique de conversation réécrit dans le prompt
+        self.semantic_index: Optional[SemanticIndex] = None  # branché par get_ollama_service
+        self._semantic_synced_at: Optional[float] = None
+        
+        # Session HTTP persistante (keep-alive) partagée par toutes les requêtes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.pool.backends), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Catalogue des modèles servi depuis la mémoire (inventaires des serveurs du pool)
+        self._models_checked_at: Optional[float] = None
+        self._models_ok: Optional[bool] = None  # None = pas encore vérifié
+        self._models_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        
+        if refresh_on_init:
+            self.refresh_models_async()
+    
+    @property
+    def available_models(self) -> List[str]:
+        """Modèles des serveurs sains, rafraîchis en arrière-plan lorsque le TTL est dépassé"""
+        self._refresh_if_stale()
+        return self.pool.available_models()
+    
+    @available_models.setter
+    def available_models(self, models: List[str]):
+        self.pool.set_models(models)
+        with self._models_lock:
+            self._models_checked_at = time.monotonic()
+            self._models_ok = True
     
     def check_ollama_status(self) -> bool:
-        """Vérifier si Ollama est accessible"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                self.available_models = [model['name'] for model in response.json().get('models', [])]
-                logger.info(f"Ollama accessible. Modèles disponibles: {self.available_models}")
-                return True
-        except Exception as e:
-            logger.error(f"Ollama non accessible: {e}")
-        return False
+        """Vérifier si Ollama est accessible (et mettre à jour l'inventaire de chaque serveur)"""
+        ok = self.pool.check_all(self.session)
+        if ok:
+            logger.info(f"Ollama accessible. Modèles disponibles: {self.pool.available_models()}")
+        else:
+            logger.error("Ollama non accessible: aucun serveur ne répond")
+        
+        with self._models_lock:
+            self._models_checked_at = time.monotonic()
+            # Un serveur en panne fait revérifier le pool plus tôt
+            self._models_ok = ok and self.pool.all_healthy()
+        return ok
+    
+    def refresh_models_async(self):
+        """Rafraîchit le catalogue des modèles dans un thread d'arrière-plan"""
+        with self._models_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.check_ollama_status,
+                name='ollama-models-refresh',
+                daemon=True
+            )
+            self._refresh_thread.start()
+    
+    def _refresh_if_stale(self):
+        checked_at = self._models_checked_at
+        ttl = self.models_ttl if self._models_ok else min(self.models_ttl, MODELS_RETRY_DELAY)
+        if checked_at is None or time.monotonic() - checked_at > ttl:
+            self.refresh_models_async()  # Sans effet si un rafraîchissement est en cours
+    
+    def close(self):
+        """Ferme les connexions HTTP du pool"""
+        self.session.close()
     
-    def get_organizational_prompt(self, context: Dict[str, Any]) -> str:
-        """Génère un prompt contextualisé pour l'assistance organisationnelle"""
+    def get_organizational_prompt(self, context: Dict[str, Any], knowledge: str = '') -> str:
+        """Génère un prompt contextualisé pour l'assistance organisationnelle
+        
+        knowledge : extraits de ressources de l'association insérés avant la question.
+        """
         
         maturity_level = context.get('maturityLevel', 0)
         current_page = context.get('currentPage', '')
@@ -56,55 +168,374 @@ DOMAINES D'EXPERTISE:
 - Développement organisationnel
 - Stratégie et planification
 
-QUESTION DE L'UTILISATEUR: """
+{knowledge}QUESTION DE L'UTILISATEUR: """
         
         return base_prompt
     
-    def generate_response(self, query: str, context: Dict[str, Any], model: str = "llama2") -> Dict[str, Any]:
-        """Génère une réponse IA pour une requête organisationnelle"""
-        
-        if model not in self.available_models:
-            if self.available_models:
-                model = self.available_models[0]
+    def _resolve_model(self, model: str) -> Optional[str]:
+        """Choisit le modèle à utiliser, None si Ollama n'a aucun modèle disponible"""
+        available_models = self.available_models
+        installed = find_model(available_models, model)
+        if installed is not None:
+            return installed
+        if available_models:
+            return available_models[0]
+        if self._models_checked_at is not None:
+            # Catalogue vérifié mais vide : Ollama injoignable ou sans modèle
+            return None
+        return model
+    
+    def _select_model(self, query: str, context: Dict[str, Any], model: Optional[str]) -> Optional[str]:
+        """Modèle demandé par le client, sinon choisi par le routeur"""
+        if model is None:
+            if self.router is None:
+                model = DEFAULT_MODEL
             else:
-                return self._fallback_response(query)
+                budget = get_budget(context, self.budgets)
+                model, reason = self.router.route(query, context, self.available_models, budget['num_predict'])
+                logger.debug(f"Requête IA routée vers {model} ({reason})")
+        return self._resolve_model(model)
+    
+    @contextmanager
+    def _ollama_request(self, path: str, model: str, payload: Dict[str, Any], stream: bool,
+                        timeout) -> Iterator[requests.Response]:
+        """POST vers le serveur le moins chargé hébergeant le modèle, avec bascule sur le suivant.
+        
+        La bascule n'a lieu qu'avant la réponse : une fois le flux commencé,
+        une erreur remonte à l'appelant.
+        """
+        last_error: Optional[Exception] = None
+        for backend in self.pool.candidates(model):
+            with self.pool.lease(backend):
+                try:
+                    response = self.session.post(
+                        f"{backend.url}{path}",
+                        json=payload,
+                        stream=stream,
+                        timeout=timeout
+                    )
+                except requests.RequestException as e:
+                    self.pool.mark_failure(backend, e)
+                    last_error = e
+                    continue
+                if response.status_code >= 500 or response.status_code == 404:
+                    response.close()
+                    if response.status_code == 404:
+                        # Modèle absent de ce serveur : il reste sain
+                        self.pool.forget_model(backend, model)
+                    else:
+                        self.pool.mark_failure(backend, f"HTTP {response.status_code}")
+                    last_error = RuntimeError(f"Erreur Ollama {backend.url}: {response.status_code}")
+                    continue
+                self.pool.mark_success(backend)
+                with response:
+                    yield response
+                return
+        raise last_error or RuntimeError("Aucun serveur Ollama disponible")
+    
+    def embed(self, text: str) -> Optional[List[float]]:
+        """Embedding d'un texte via /api/embeddings (None si aucun modèle d'embedding)"""
+        if not self.embedding_model:
+            return None
+        payload = {'model': self.embedding_model, 'prompt': text}
+        if self.keep_alive:
+            payload['keep_alive'] = self.keep_alive
+        with self._ollama_request('/api/embeddings', self.embedding_model, payload,
+                                  stream=False, timeout=10) as response:
+            response.raise_for_status()
+            return response.json().get('embedding')
+    
+    def semantic_index_available(self) -> bool:
+        """Index sémantique activé et modèle d'embedding joignable"""
+        if self.semantic_index is None or self._circuit_open():
+            return False
+        # Catalogue vide (pas encore chargé, ou Ollama injoignable) ou modèle d'embedding
+        # absent : pas d'appel d'embedding bloquant avant la génération
+        return find_model(self.available_models, self.embedding_model) is not None
+    
+    def _semantic_lookup(self, query: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Réponse enregistrée pour une question proche, sans génération"""
+        if not self.semantic_index_available():
+            return None
+        if has_app_context() and (self._semantic_synced_at is None or
+                                  time.monotonic() - self._semantic_synced_at > SEMANTIC_SYNC_INTERVAL):
+            # Questions enregistrées par les autres workers depuis la dernière fois
+            self._semantic_synced_at = time.monotonic()
+            try:
+                sync_from_db(self.semantic_index)
+            except Exception as e:
+                logger.error(f"Synchronisation de l'index sémantique impossible: {e}")
+        return self.semantic_index.lookup(query, context)
+    
+    def _grounding(self, query: str, context: Dict[str, Any], budget: Dict[str, int]) -> Tuple[str, Dict[str, Any]]:
+        """Extraits BM25 des ressources de l'association, dans ce qui reste du budget de prompt"""
+        if not self.retrieval_k or not has_app_context():
+            return '', {}
+        from app.services.guidance_index import format_snippets, search_guidance
         
         try:
-            full_prompt = self.get_organizational_prompt(context) + query
-            
-            # Requête à Ollama
-            payload = {
-                "model": model,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 500
-                }
+            snippets, search_ms = search_guidance(query, context.get('associationId'), self.retrieval_k)
+        except Exception as e:
+            logger.error(f"Recherche dans les ressources impossible: {e}")
+            return '', {}
+        base_tokens = estimate_tokens(self.get_organizational_prompt(context)) + estimate_tokens(query)
+        available = min(self.retrieval_max_tokens, budget['prompt_tokens'] - base_tokens)
+        knowledge, count = format_snippets(snippets, available)
+        return knowledge, {
+            'snippets': count,
+            'sources': [f"{s['source']}:{s['source_id']}" for s in snippets[:count]],
+            'tokens': estimate_tokens(knowledge),
+            'search_ms': search_ms
+        }
+    
+    def _build_payload(self, query: str, context: Dict[str, Any], model: str, stream: bool,
+                       conversation: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Construit la requête /api/generate dans le budget de génération de la page
+        
+        Dans une conversation, les tokens 'context' du tour précédent sont
+        renvoyés à Ollama tant qu'ils tiennent dans num_ctx ; sinon l'historique
+        est réécrit en texte (résumé + derniers tours) dans un budget fixe.
+        Retourne aussi les statistiques des extraits et de l'historique ajoutés au prompt.
+        """
+        budget = get_budget(context, self.budgets)
+        knowledge, grounding = self._grounding(query, context, budget)
+        ollama_context = None
+        if conversation is not None:
+            ollama_context = conversation.get('ollama_context')
+            follow_up = f"{knowledge}QUESTION DE SUIVI: {trim_to_tokens(query, budget['prompt_tokens'])}"
+            if (ollama_context and conversation.get('model') and
+                    tagged_model(conversation['model']) == tagged_model(model) and
+                    len(ollama_context) + estimate_tokens(follow_up) + budget['num_predict'] <= budget['num_ctx']):
+                # Consigne et échanges précédents déjà contenus dans les tokens de contexte
+                prompt = follow_up
+                grounding = dict(grounding, conversation={'mode': 'context', 'context_tokens': len(ollama_context)})
+            else:
+                from app.services.ai_conversation import build_history
+                
+                ollama_context = None
+                remaining = budget['prompt_tokens'] - estimate_tokens(
+                    self.get_organizational_prompt(context, knowledge)) - estimate_tokens(query)
+                history = build_history(conversation, min(self.history_tokens, remaining))
+                prompt = fit_prompt(self.get_organizational_prompt(context, history + knowledge), query, budget)
+                grounding = dict(grounding, conversation={'mode': 'history', 'history_tokens': estimate_tokens(history)})
+        else:
+            prompt = fit_prompt(self.get_organizational_prompt(context, knowledge), query, budget)
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "num_predict": budget['num_predict'],
+                "num_ctx": budget['num_ctx']
             }
+        }
+        if ollama_context:
+            payload["context"] = ollama_context
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload, grounding
+    
+    def _generation_metrics(self, result: Dict[str, Any], payload: Dict[str, Any],
+                            grounding: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Mesures Ollama et budget appliqué, pour ajuster les budgets sur la latence réelle"""
+        grounding = grounding or {}
+        metrics = extract_metrics(result)
+        metrics['num_predict'] = payload['options']['num_predict']
+        metrics['num_ctx'] = payload['options']['num_ctx']
+        metrics['prompt_tokens_estimate'] = estimate_tokens(payload['prompt'])
+        if grounding.get('tokens'):
+            # Taille du prompt avec et sans les extraits de ressources
+            metrics['prompt_tokens_without_grounding'] = metrics['prompt_tokens_estimate'] - grounding['tokens']
+            metrics['grounding'] = {key: value for key, value in grounding.items() if key != 'conversation'}
+        if grounding.get('conversation'):
+            metrics['conversation'] = grounding['conversation']
+        logger.debug(f"Génération {payload['model']}: {metrics}")
+        return metrics
+    
+    def _admission_slot(self, context: Dict[str, Any]) -> ContextManager[float]:
+        """Place de génération réservée pour l'association (lève AdmissionRejected si saturé)"""
+        if self.admission is None:
+            return nullcontext(0.0)
+        return self.admission.slot(str(context.get('associationId', '')))
+    
+    def _circuit_open(self) -> bool:
+        return self.breaker is not None and self.breaker.is_open()
+    
+    def _circuit_allows(self) -> bool:
+        return self.breaker is None or self.breaker.allow_request()
+    
+    def _record_outcome(self, success: bool, latency: float = 0.0):
+        if self.breaker is None:
+            return
+        if success:
+            self.breaker.record_success(latency)
+        else:
+            self.breaker.record_failure()
+    
+    def _reuse_answer(self, query: str, context: Dict[str, Any],
+                      conversation: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Réponse déjà connue (cache exact puis index sémantique), hors conversation"""
+        if conversation is not None:
+            # Une question de suivi dépend des échanges précédents
+            return None
+        if self.cache is not None:
+            cached = self.cache.get(query, context)
+            if cached is not None:
+                return cached
+        return self._semantic_lookup(query, context)
+    
+    def _conversation_model(self, model: Optional[str], conversation: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Une conversation reste sur le modèle dont on réutilise les tokens de contexte"""
+        if model is None and conversation and conversation.get('ollama_context') and conversation.get('model'):
+            return conversation['model']
+        return model
+    
+    def generate_response(self, query: str, context: Dict[str, Any], model: Optional[str] = None,
+                          conversation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Génère une réponse IA pour une requête organisationnelle
+        
+        conversation : état du fil (voir ai_conversation.conversation_state) pour une question de suivi.
+        """
+        
+        reused = self._reuse_answer(query, context, conversation)
+        if reused is not None:
+            return reused
+        
+        model = self._select_model(query, context, self._conversation_model(model, conversation))
+        if model is None or self._circuit_open():
+            return self._fallback_response(query)
+        
+        with self._admission_slot(context) as queue_wait:
+            # Circuit ouvert pendant l'attente, ou sonde déjà en cours
+            if not self._circuit_allows():
+                return self._fallback_response(query)
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result.get('response', '').strip()
+            started = time.monotonic()
+            try:
+                # Requête à Ollama
+                payload, grounding = self._build_payload(query, context, model, stream=False,
+                                                         conversation=conversation)
                 
-                # Analyse et enrichissement de la réponse
-                return self._enrich_response(ai_response, query, context)
-            else:
-                logger.error(f"Erreur Ollama: {response.status_code}")
-                return self._fallback_response(query)
+                with self._ollama_request('/api/generate', model, payload, stream=False, timeout=30) as response:
+                    status_code = response.status_code
+                    result = response.json() if status_code == 200 else None
                 
-        except Exception as e:
-            logger.error(f"Erreur génération IA: {e}")
-            return self._fallback_response(query)
+                if status_code == 200:
+                    self._record_outcome(True, time.monotonic() - started)
+                    ai_response = result.get('response', '').strip()
+                    
+                    # Analyse et enrichissement de la réponse
+                    enriched = self._enrich_response(ai_response, query, context, model)
+                    enriched['queue_wait_ms'] = int(queue_wait * 1000)
+                    enriched['metrics'] = self._generation_metrics(result, payload, grounding)
+                    enriched['confidence'] = estimate_confidence(ai_response, enriched['metrics'])
+                    if conversation is not None:
+                        enriched['ollama_context'] = result.get('context')
+                    elif self.cache is not None:
+                        self.cache.set(query, context, enriched)
+                    self._observe(model, enriched['metrics'])
+                    return enriched
+                else:
+                    logger.error(f"Erreur Ollama: {status_code}")
+                    self._record_outcome(False)
+                    return self._fallback_response(query)
+                    
+            except Exception as e:
+                logger.error(f"Erreur génération IA: {e}")
+                self._record_outcome(False)
+                return self._fallback_response(query)
     
-    def _enrich_response(self, ai_response: str, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def stream_response(self, query: str, context: Dict[str, Any], model: Optional[str] = None,
+                        conversation: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Génère une réponse IA en flux.
+        
+        Produit des événements {'type': 'token', 'content': ...} au fil des
+        morceaux NDJSON renvoyés par Ollama, puis un unique événement
+        {'type': 'done', 'result': ...} contenant la réponse enrichie.
+        """
+        
+        reused = self._reuse_answer(query, context, conversation)
+        if reused is not None:
+            yield {'type': 'token', 'content': reused['response']}
+            yield {'type': 'done', 'result': reused}
+            return
+        
+        model = self._select_model(query, context, self._conversation_model(model, conversation))
+        if model is None or self._circuit_open():
+            yield {'type': 'done', 'result': self._fallback_response(query)}
+            return
+        
+        chunks: List[str] = []
+        completed = False
+        final_chunk: Dict[str, Any] = {}
+        payload, grounding = self._build_payload(query, context, model, stream=True,
+                                                 conversation=conversation)
+        with self._admission_slot(context) as queue_wait:
+            if not self._circuit_allows():
+                yield {'type': 'done', 'result': self._fallback_response(query)}
+                return
+            
+            started = time.monotonic()
+            first_token_latency = None
+            try:
+                # Le délai de lecture s'applique entre deux morceaux, pas à la génération entière
+                with self._ollama_request('/api/generate', model, payload, stream=True, timeout=(5, 30)) as response:
+                    if response.status_code != 200:
+                        logger.error(f"Erreur Ollama: {response.status_code}")
+                        self._record_outcome(False)
+                        yield {'type': 'done', 'result': self._fallback_response(query)}
+                        return
+                    
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('error'):
+                            raise RuntimeError(chunk['error'])
+                        token = chunk.get('response', '')
+                        if first_token_latency is None:
+                            # La lenteur d'un flux se mesure au premier token
+                            first_token_latency = time.monotonic() - started
+                            self._record_outcome(True, first_token_latency)
+                        if token:
+                            chunks.append(token)
+                            yield {'type': 'token', 'content': token}
+                        if chunk.get('done'):
+                            completed = True
+                            final_chunk = chunk  # Contient les compteurs eval_count, durées...
+                            break
+            
+            except Exception as e:
+                logger.error(f"Erreur génération IA (flux): {e}")
+                if first_token_latency is None:
+                    self._record_outcome(False)
+                if not chunks:
+                    yield {'type': 'done', 'result': self._fallback_response(query)}
+                    return
+        
+        # Réponse partielle conservée si le flux a été interrompu (mais pas mise en cache)
+        enriched = self._enrich_response(''.join(chunks).strip(), query, context, model)
+        enriched['queue_wait_ms'] = int(queue_wait * 1000)
+        enriched['metrics'] = self._generation_metrics(final_chunk, payload, grounding)
+        enriched['confidence'] = estimate_confidence(enriched['response'], enriched['metrics'])
+        if conversation is not None:
+            enriched['ollama_context'] = final_chunk.get('context')
+        elif self.cache is not None and completed:
+            self.cache.set(query, context, enriched)
+        if not completed:
+            enriched['incomplete'] = True
+        self._observe(model, enriched['metrics'])
+        yield {'type': 'done', 'result': enriched}
+    
+    def _observe(self, model: str, metrics: Dict[str, Any]):
+        """Transmet le débit mesuré au routeur"""
+        if self.router is not None:
+            self.router.observe(model, metrics)
+    
+    def _enrich_response(self, ai_response: str, query: str, context: Dict[str, Any],
+                         model: str = DEFAULT_MODEL) -> Dict[str, Any]:
         """Enrichit la réponse IA avec des suggestions et ressources"""
         
         # Génération de suggestions basées sur le contexte
@@ -116,8 +547,8 @@ QUESTION DE L'UTILISATEUR: """
         # Questions de suivi contextuelles
         follow_up_questions = self._generate_follow_up_questions(query, context)
         
-        # Calcul de confiance (basique)
-        confidence = min(0.9, len(ai_response) / 100)  # Confiance basée sur la longueur
+        # Confiance fixée une fois les mesures de génération connues (estimate_confidence)
+        confidence = None
         
         return {
             'response': ai_response,
@@ -125,7 +556,7 @@ QUESTION DE L'UTILISATEUR: """
             'related_resources': related_resources,
             'follow_up_questions': follow_up_questions,
             'confidence': confidence,
-            'model_used': 'llama2',
+            'model_used': model,
             'timestamp': datetime.utcnow().isoformat()
         }
     
@@ -250,3 +681,106 @@ QUESTION DE L'UTILISATEUR: """
             'model_used': 'fallback',
             'timestamp': datetime.utcnow().isoformat()
         }
+
+
+# Instance partagée par le processus (un worker gunicorn = un service)
+_service_instance: Optional[OllamaService] = None
+_service_pid: Optional[int] = None
+_service_lock = threading.Lock()
+
+
+def get_ollama_service() -> OllamaService:
+    """Retourne le service Ollama du worker courant, créé au premier appel"""
+    global _service_instance, _service_pid
+    
+    # Après un fork (gunicorn --preload), on ne réutilise pas les sockets du parent
+    if _service_instance is not None and _service_pid == os.getpid():
+        return _service_instance
+    
+    with _service_lock:
+        if _service_instance is None or _service_pid != os.getpid():
+            config = current_app.config if has_app_context() else {}
+            cache = None
+            if config.get('AI_CACHE_TTL', 3600) > 0:
+                cache = AIResponseCache(
+                    max_entries=config.get('AI_CACHE_MAX_ENTRIES', 500),
+                    ttl=config.get('AI_CACHE_TTL', 3600)
+                )
+                if has_app_context() and config.get('AI_CACHE_WARMUP_LIMIT', 0) > 0:
+                    _warm_up_cache(cache, config['AI_CACHE_WARMUP_LIMIT'])
+            admission = None
+            if config.get('AI_MAX_IN_FLIGHT', 2) > 0:
+                admission = FairAdmissionController(
+                    max_in_flight=config.get('AI_MAX_IN_FLIGHT', 2),
+                    max_queue=config.get('AI_MAX_QUEUE', 16),
+                    max_queue_per_tenant=config.get('AI_MAX_QUEUE_PER_ASSOCIATION') or None,
+                    queue_timeout=config.get('AI_QUEUE_TIMEOUT', 30),
+                    weights=parse_weights(config.get('AI_ASSOCIATION_WEIGHTS', ''))
+                )
+            breaker = None
+            if config.get('AI_BREAKER_ENABLED', True):
+                breaker = CircuitBreaker(
+                    store=build_breaker_store(config.get('AI_BREAKER_STATE_FILE')),
+                    failure_rate_threshold=config.get('AI_BREAKER_FAILURE_RATE', 0.5),
+                    slow_call_threshold=config.get('AI_BREAKER_SLOW_CALL', 20.0),
+                    min_calls=config.get('AI_BREAKER_MIN_CALLS', 5),
+                    cooldown=config.get('AI_BREAKER_COOLDOWN', 30.0)
+                )
+            router = None
+            if config.get('AI_ROUTING_ENABLED', True):
+                router = ModelRouter(
+                    fast_model=config.get('AI_FAST_MODEL', DEFAULT_MODEL),
+                    quality_model=config.get('AI_QUALITY_MODEL', DEFAULT_MODEL),
+                    latency_slo=config.get('AI_LATENCY_SLO', 20.0)
+                )
+            base_url = config.get('OLLAMA_BASE_URL', DEFAULT_BASE_URL)
+            _service_instance = OllamaService(
+                base_url=base_url,
+                base_urls=parse_base_urls(config.get('OLLAMA_BASE_URLS', ''), base_url),
+                embedding_model=config.get('AI_EMBEDDING_MODEL') or None,
+                retrieval_k=config.get('AI_RETRIEVAL_TOP_K', 3),
+                retrieval_max_tokens=config.get('AI_RETRIEVAL_MAX_TOKENS', 400),
+                history_tokens=config.get('AI_CONVERSATION_HISTORY_TOKENS', 600),
+                models_ttl=config.get('OLLAMA_MODELS_TTL', 300),
+                pool_size=config.get('OLLAMA_POOL_SIZE', 10),
+                cache=cache,
+                admission=admission,
+                breaker=breaker,
+                budgets=parse_budget_profiles(config.get('AI_GENERATION_BUDGETS')),
+                keep_alive=config.get('OLLAMA_KEEP_ALIVE', '30m') or None,
+                router=router
+            )
+            if config.get('AI_SEMANTIC_THRESHOLD', 0) > 0 and _service_instance.embedding_model:
+                _service_instance.semantic_index = SemanticIndex(
+                    embed=_service_instance.embed,
+                    threshold=config['AI_SEMANTIC_THRESHOLD'],
+                    max_entries=config.get('AI_SEMANTIC_MAX_ENTRIES', 20000)
+                )
+            _service_pid = os.getpid()
+        return _service_instance
+
+
+def _warm_up_cache(cache: AIResponseCache, limit: int):
+    """Précharge le cache avec les dernières réponses enregistrées"""
+    from app.models.guidance import AIQuery
+    from app import db
+    
+    try:
+        records = db.session.query(AIQuery).filter(
+            ~AIQuery.response.startswith(FALLBACK_RESPONSE_PREFIX),
+            db.or_(AIQuery.model_used.is_(None), AIQuery.model_used != 'fallback')
+        ).order_by(AIQuery.created_at.desc()).limit(limit).all()
+        # Du plus ancien au plus récent pour que les plus récents restent en tête du LRU
+        cache.warm_up(reversed(records))
+    except Exception as e:
+        logger.error(f"Préchargement du cache IA impossible: {e}")
+
+
+def reset_ollama_service():
+    """Ferme et oublie l'instance partagée (tests, changement de configuration)"""
+    global _service_instance, _service_pid
+    with _service_lock:
+        if _service_instance is not None:
+            _service_instance.close()
+        _service_instance = None
+        _service_pid = None
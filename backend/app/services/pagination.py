@@ -0,0 +1,61 @@
+# Pagination par clé (keyset) et sélection partielle des champs pour les listes de l'API
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(sort: str, key: List[Any]) -> str:
+    """Curseur opaque : tri et valeurs de clé de la dernière ligne renvoyée"""
+    raw = json.dumps({'s': sort, 'k': key}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str, size: int) -> List[Any]:
+    """Valeurs de clé d'un curseur ; ValueError s'il est invalide ou émis pour un autre tri"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        key = data['k']
+    except Exception:
+        raise ValueError('Curseur invalide')
+    if data.get('s') != sort or not isinstance(key, list) or len(key) != size:
+        raise ValueError('Curseur invalide pour ce tri')
+    return key
+
+
+def parse_limit(value: Optional[str], default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('Paramètre limit invalide')
+    if limit < 1:
+        raise ValueError('Paramètre limit invalide')
+    return min(limit, maximum)
+
+
+def parse_fields(value: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Champs demandés (?fields=a,b) dans l'ordre donné ; None = tous les champs"""
+    if not value:
+        return None
+    allowed = list(allowed)
+    fields: List[str] = []
+    for field in (f.strip() for f in value.split(',')):
+        if field and field not in fields:
+            fields.append(field)
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+    return fields
+
+
+def page_response(items: List[Dict[str, Any]], next_cursor: Optional[str],
+                  total: Optional[int] = None) -> Dict[str, Any]:
+    response = {'items': items, 'next_cursor': next_cursor, 'has_more': next_cursor is not None}
+    if total is not None:
+        response['total'] = total
+    return response
@@ -0,0 +1,220 @@
+# Index de similarité des questions déjà traitées par l'assistant IA
+import copy
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.ai_cache import CONTEXT_KEY_FIELDS, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Champs d'une réponse enrichie conservés dans l'index
+RESULT_FIELDS = ('response', 'suggestions', 'related_resources', 'follow_up_questions',
+                 'confidence', 'model_used')
+
+
+def _numpy():
+    """NumPy n'est requis que si l'index sémantique est activé"""
+    import numpy
+    return numpy
+
+
+def context_group(context: Dict[str, Any]) -> Tuple:
+    """Une réponse n'est réutilisable que pour le même contexte de prompt"""
+    context = context or {}
+    return tuple(str(context.get(field, '')) for field in CONTEXT_KEY_FIELDS)
+
+
+def encode_embedding(vector) -> bytes:
+    """Vecteur normalisé en float32 pour la colonne AIQuery.embedding"""
+    return _numpy().asarray(vector, dtype='float32').tobytes()
+
+
+def decode_embedding(data: bytes):
+    return _numpy().frombuffer(data, dtype='float32')
+
+
+class SemanticIndex:
+    """Recherche des questions proches par similarité cosinus des embeddings.
+
+    Les embeddings normalisés sont rangés dans une matrice NumPy float32
+    agrandie par doublement ; la recherche est un produit matriciel
+    (force brute), largement suffisant pour quelques dizaines de milliers de
+    questions. Au-delà du seuil de similarité, la réponse enregistrée est
+    renvoyée sans nouvelle génération.
+    """
+
+    def __init__(self, embed: Callable[[str], Optional[List[float]]], threshold: float = 0.92,
+                 max_entries: int = 20000, pending_size: int = 256):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.pending_size = pending_size
+        self._matrix = None  # (capacité, dimension) float32, lignes normalisées
+        self._size = 0
+        self._ids: List[str] = []
+        self._queries: List[str] = []
+        self._results: List[Dict[str, Any]] = []
+        self._group_codes: Dict[Tuple, int] = {}
+        self._codes = None  # code de contexte de chaque ligne
+        self._known_ids = set()
+        # Embeddings calculés à la recherche, réutilisés à l'enregistrement de la réponse
+        self._pending: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.last_synced_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _normalize(self, vector):
+        np = _numpy()
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if vector.ndim != 1 or norm == 0:
+            return None
+        return vector / norm
+
+    def _embed(self, text: str):
+        try:
+            vector = self.embed(text)
+        except Exception as e:
+            logger.error(f"Embedding impossible: {e}")
+            return None
+        return self._normalize(vector) if vector is not None else None
+
+    def lookup(self, query: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Réponse d'une question suffisamment proche dans le même contexte, ou None"""
+        vector = self._embed(query)
+        if vector is None:
+            return None
+
+        np = _numpy()
+        key = make_cache_key(query, context)
+        with self._lock:
+            self._pending[key] = vector
+            while len(self._pending) > self.pending_size:
+                self._pending.pop(next(iter(self._pending)))
+
+            code = self._group_codes.get(context_group(context))
+            if code is None or self._size == 0 or vector.shape[0] != self._matrix.shape[1]:
+                self.misses += 1
+                return None
+            scores = self._matrix[:self._size] @ vector
+            scores[self._codes[:self._size] != code] = -1.0
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            result = copy.deepcopy(self._results[best])
+            matched_query = self._queries[best]
+            matched_id = self._ids[best]
+
+        result.update(
+            cached=True,
+            similarity=round(score, 4),
+            matched_query=matched_query,
+            matched_id=matched_id,
+            timestamp=datetime.utcnow().isoformat()
+        )
+        return result
+
+    def add(self, record_id: str, query: str, context: Dict[str, Any], result: Dict[str, Any],
+            vector=None):
+        """Ajoute une question et sa réponse ; retourne l'embedding normalisé (ou None)"""
+        if record_id in self._known_ids:
+            return None
+        key = make_cache_key(query, context)
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if vector is None:
+            vector = pending if pending is not None else self._embed(query)
+        else:
+            vector = self._normalize(vector)
+        if vector is None:
+            return None
+
+        np = _numpy()
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((64, vector.shape[0]), dtype=np.float32)
+                self._codes = np.zeros(64, dtype=np.int32)
+            if vector.shape[0] != self._matrix.shape[1]:
+                logger.warning("Dimension d'embedding différente de l'index : question ignorée")
+                return None
+            if self._size >= self.max_entries:
+                self._drop_oldest()
+            if self._size == self._matrix.shape[0]:
+                self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+                self._codes = np.concatenate([self._codes, np.zeros_like(self._codes)])
+
+            group = context_group(context)
+            code = self._group_codes.setdefault(group, len(self._group_codes))
+            self._matrix[self._size] = vector
+            self._codes[self._size] = code
+            self._size += 1
+            self._ids.append(record_id)
+            self._queries.append(query)
+            self._results.append({field: copy.deepcopy(result.get(field)) for field in RESULT_FIELDS})
+            self._known_ids.add(record_id)
+        return vector
+
+    def _drop_oldest(self):
+        """Retire le quart le plus ancien de l'index (appelé sous verrou)"""
+        drop = max(1, self._size // 4)
+        self._matrix[:self._size - drop] = self._matrix[drop:self._size]
+        self._codes[:self._size - drop] = self._codes[drop:self._size]
+        self._size -= drop
+        for record_id in self._ids[:drop]:
+            self._known_ids.discard(record_id)
+        del self._ids[:drop], self._queries[:drop], self._results[:drop]
+
+    def add_record(self, record, vector=None):
+        """Ajoute un AIQuery enregistré (embedding stocké réutilisé s'il existe)"""
+        if vector is None and getattr(record, 'embedding', None):
+            vector = decode_embedding(record.embedding)
+        return self.add(record.id, record.query, record.context or {}, {
+            'response': record.response,
+            'suggestions': record.suggestions or [],
+            'related_resources': record.related_resources or [],
+            'follow_up_questions': record.follow_up_questions or [],
+            'confidence': record.confidence,
+            'model_used': record.model_used
+        }, vector=vector)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': self._size,
+                'dimension': int(self._matrix.shape[1]) if self._matrix is not None else None,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+def sync_from_db(index: SemanticIndex, limit: Optional[int] = None) -> int:
+    """Ajoute à l'index les requêtes enregistrées (par tous les workers) depuis la dernière synchronisation"""
+    from app import db
+    from app.models.guidance import AIQuery
+
+    query = db.session.query(AIQuery).filter(AIQuery.embedding.isnot(None))
+    if index.last_synced_at is not None:
+        query = query.filter(AIQuery.created_at >= index.last_synced_at)
+    records = query.order_by(AIQuery.created_at.desc()).limit(limit or index.max_entries).all()
+
+    added = 0
+    for record in reversed(records):
+        if index.add_record(record) is not None:
+            added += 1
+        if record.created_at and (index.last_synced_at is None or record.created_at > index.last_synced_at):
+            index.last_synced_at = record.created_at
+    if index.last_synced_at is None:
+        index.last_synced_at = datetime.utcnow()
+    return added
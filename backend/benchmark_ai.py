@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Banc de charge de l'assistant IA (/api/guidance/ai/query)
+
+Par défaut, démarre un faux Ollama (fake_ollama.py) et l'API Flask dans le
+processus sur une base SQLite temporaire, puis envoie --requests requêtes
+avec --concurrency clients simultanés. Affiche le débit et les percentiles
+de latence (p50/p95/p99).
+
+    python benchmark_ai.py --concurrency 8 --requests 200 --latency lognormal:-1.5,0.4
+    python benchmark_ai.py --ollama-url http://gpu1:11434          # vrai Ollama
+    python benchmark_ai.py --api-url http://localhost:5000 --token <JWT>  # API déjà lancée
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_telemetry import percentile
+from fake_ollama import add_settings_arguments, settings_from_args, start_fake_ollama
+
+QUESTIONS = (
+    "Comment préparer notre budget prévisionnel ?",
+    "Qui peut convoquer une assemblée générale ?",
+    "Comment relancer les cotisations en retard ?",
+    "Quelles obligations déclaratives pour une association ?",
+    "Comment organiser le bureau de l'association ?",
+    "Comment rédiger le rapport d'activités annuel ?"
+)
+
+
+def build_queries(total: int, unique_ratio: float) -> List[str]:
+    """Questions envoyées ; unique_ratio règle la part de questions jamais vues (cache froid)"""
+    queries = []
+    unique_every = round(1 / unique_ratio) if unique_ratio > 0 else 0
+    for i in range(total):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        if unique_every and i % unique_every == 0:
+            question = f"{question} (cas {i})"
+        queries.append(question)
+    return queries
+
+
+def send_query(session: requests.Session, api_url: str, token: str, query: str, stream: bool,
+               timeout: float) -> Dict[str, Any]:
+    """Une requête à l'API ; mesure la latence totale et, en flux, celle du premier token"""
+    started = time.perf_counter()
+    result = {'status': None, 'latency': None, 'first_token': None, 'model_used': None}
+    try:
+        response = session.post(f'{api_url}/api/guidance/ai/query', json={'query': query, 'stream': stream},
+                                headers={'Authorization': f'Bearer {token}'}, timeout=timeout, stream=stream)
+        result['status'] = response.status_code
+        if stream and response.status_code == 200:
+            for line in response.iter_lines(decode_unicode=True):
+                if result['first_token'] is None and line.startswith('event: token'):
+                    result['first_token'] = time.perf_counter() - started
+                if line.startswith('data: ') and '"model_used"' in line:
+                    result['model_used'] = json.loads(line[6:]).get('model_used')
+        elif response.status_code == 200:
+            result['model_used'] = response.json().get('model_used')
+    except requests.RequestException as e:
+        result['status'] = type(e).__name__
+    result['latency'] = time.perf_counter() - started
+    return result
+
+
+def run_load(api_url: str, token: str, queries: List[str], concurrency: int, stream: bool = False,
+             timeout: float = 120) -> Tuple[List[Dict[str, Any]], float]:
+    """Envoie les requêtes avec `concurrency` clients ; retourne (résultats, durée totale)"""
+    local = threading.local()
+
+    def worker(query):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return send_query(local.session, api_url, token, query, stream, timeout)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, queries))
+    return results, time.perf_counter() - started
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Débit, percentiles (ms) et répartition des statuts et modèles"""
+    ok = [r for r in results if r['status'] == 200]
+    latencies = sorted(r['latency'] * 1000 for r in ok)
+    first_tokens = sorted(r['first_token'] * 1000 for r in ok if r['first_token'] is not None)
+    statuses: Dict[str, int] = {}
+    models: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r['status'])] = statuses.get(str(r['status']), 0) + 1
+        if r['model_used']:
+            models[r['model_used']] = models.get(r['model_used'], 0) + 1
+
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed else None,
+        'latency_ms': {p: rounded(percentile(latencies, int(p[1:]))) for p in ('p50', 'p95', 'p99')},
+        'first_token_ms': {p: rounded(percentile(first_tokens, int(p[1:]))) for p in ('p50', 'p95', 'p99')},
+        'statuses': statuses,
+        'models': models
+    }
+
+
+def start_api(ollama_url: str):
+    """Lance l'API Flask dans un thread sur une base SQLite temporaire ; retourne (serveur, url, token)"""
+    database = os.path.join(tempfile.mkdtemp(prefix='ocm_bench_'), 'bench.db')
+    # FLASK_ENV=development : pas de redirection HTTPS (Talisman) sur le serveur local
+    os.environ.update(DATABASE_URL=f'sqlite:///{database}', OLLAMA_BASE_URL=ollama_url, FLASK_ENV='development',
+                      AI_BREAKER_STATE_FILE='', GUIDANCE_INDEX_PATH='')
+
+    from flask_jwt_extended import create_access_token
+    from werkzeug.serving import make_server
+
+    from app import bcrypt, create_app, db
+    from app.models.association import Association
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        association = Association(name='Association Benchmark', sigle='AB', email='bench@asso.com',
+                                  phone='+221 000 000 000',
+                                  password_hash=bcrypt.generate_password_hash('bench').decode('utf-8'))
+        db.session.add(association)
+        db.session.commit()
+        token = create_access_token(identity=str(association.id))
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # Pas de ligne de journal par requête
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', token
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge de l'assistant IA")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--unique-ratio', type=float, default=1.0,
+                        help='part de questions inédites (1 = aucune réponse servie par le cache)')
+    parser.add_argument('--stream', action='store_true', help='mode SSE (mesure aussi le premier token)')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--ollama-url', help='Ollama réel à utiliser à la place du faux serveur')
+    parser.add_argument('--api-url', help='API déjà lancée (nécessite --token)')
+    parser.add_argument('--token', help='JWT d\'une association pour --api-url')
+    parser.add_argument('--json', action='store_true', help='résultat au format JSON')
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    fake = None
+    if args.api_url:
+        if not args.token:
+            parser.error('--api-url nécessite --token')
+        api_url, token = args.api_url.rstrip('/'), args.token
+    else:
+        ollama_url = args.ollama_url
+        if not ollama_url:
+            fake = start_fake_ollama(settings_from_args(args))
+            ollama_url = fake.url
+        _, api_url, token = start_api(ollama_url)
+
+    queries = build_queries(args.requests, args.unique_ratio)
+    results, elapsed = run_load(api_url, token, queries, args.concurrency, args.stream, args.timeout)
+    summary = summarize(results, elapsed)
+    summary['concurrency'] = args.concurrency
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print(f"📊 {summary['requests']} requêtes, {args.concurrency} clients, {summary['elapsed_s']} s")
+        print(f"   Débit : {summary['throughput_rps']} req/s")
+        print(f"   Latence (ms) : p50={summary['latency_ms']['p50']} "
+              f"p95={summary['latency_ms']['p95']} p99={summary['latency_ms']['p99']}")
+        if args.stream:
+            print(f"   Premier token (ms) : p50={summary['first_token_ms']['p50']} "
+                  f"p95={summary['first_token_ms']['p95']} p99={summary['first_token_ms']['p99']}")
+        print(f"   Statuts : {summary['statuses']}  Modèles : {summary['models']}")
+    if fake is not None:
+        fake.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Banc du chargement du tableau de bord
+
+Compare, sur une association générée dans une base SQLite temporaire (ou
+DATABASE_URL) :
+  avant : les appels séparés du frontend (membres, événements, stats des
+          cotisations et des finances, analytics de guidance) ;
+  après : GET /api/dashboard, puis sa revalidation (If-None-Match -> 304).
+Affiche les percentiles de latence et le nombre de requêtes SQL par chargement.
+
+    python benchmark_dashboard.py --members 5000 --runs 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_telemetry import percentile
+
+# Appels du tableau de bord actuel (useDashboard)
+LEGACY_CALLS = ('/api/members/', '/api/events/', '/api/cotisations/stats', '/api/finances/stats',
+                '/api/guidance/analytics')
+
+
+def seed(association_id: int, members: int, rng: random.Random):
+    """Membres, cotisations sur deux ans, événements et transactions (insertions groupées)"""
+    from app import db
+    from app.models.cotisation import Cotisation
+    from app.models.event import Event
+    from app.models.member import Member, member_search_text
+    from app.models.transaction import Transaction, TransactionType
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(members):
+        first, last, email = f'Prénom{i}', f'Nom{i % 500}', f'membre{i}@bench.com'
+        rows.append({'first_name': first, 'last_name': last, 'email': email, 'phone': '000',
+                     'role': 'MEMBER' if i > 3 else 'PRESIDENT', 'status': rng.choice(['ACTIVE'] * 4 + ['INACTIVE']),
+                     'association_id': association_id, 'join_date': now, 'created_at': now, 'updated_at': now,
+                     'search_text': member_search_text(first, last, email)})
+    db.session.execute(Member.__table__.insert(), rows)
+    member_ids = [row[0] for row in db.session.query(Member.id).filter(Member.association_id == association_id)]
+
+    cotisations = []
+    for year in (now.year - 1, now.year):
+        for member_id in member_ids:
+            cotisations.append({'member_id': member_id, 'amount': 10000, 'payment_date': datetime(year, 2, 1),
+                                'payment_method': 'CASH', 'status': rng.choice(['PAID', 'PAID', 'PENDING']),
+                                'year': year, 'created_at': now, 'updated_at': now})
+    db.session.execute(Cotisation.__table__.insert(), cotisations)
+
+    events = [{'title': f'Événement {i}', 'start_date': now + timedelta(days=rng.randint(-365, 365)),
+               'location': 'Dakar', 'event_type': 'MEETING', 'status': 'PLANNED', 'association_id': association_id,
+               'created_at': now, 'updated_at': now} for i in range(max(10, members // 50))]
+    db.session.execute(Event.__table__.insert(), events)
+
+    transactions = [{'association_id': association_id, 'description': f'Opération {i}',
+                     'amount': float(rng.randint(1000, 100000)),
+                     'type': rng.choice([TransactionType.INCOME.name, TransactionType.EXPENSE.name]),
+                     'category': rng.choice(['Cotisations', 'Dons', 'Salle', 'Matériel']),
+                     'date': date.today() - timedelta(days=rng.randint(0, 730)), 'created_at': now, 'updated_at': now}
+                    for i in range(members)]
+    db.session.execute(Transaction.__table__.insert(), transactions)
+    db.session.commit()
+
+
+def measure(load: Callable[[], Any], runs: int, engine) -> Dict[str, Any]:
+    """Latences (ms) et requêtes SQL par chargement"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    latencies = []
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            load()
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    latencies.sort()
+    return {
+        'latency_ms': {p: round(percentile(latencies, int(p[1:])), 2) for p in ('p50', 'p95')},
+        'queries_per_load': round(len(statements) / runs, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Banc du tableau de bord')
+    parser.add_argument('--members', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='résultat au format JSON')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        database = os.path.join(tempfile.mkdtemp(prefix='ocm_bench_'), 'dashboard.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ.setdefault('FLASK_ENV', 'development')
+
+    from flask_jwt_extended import create_access_token
+
+    from app import create_app, db
+    from app.models.association import Association
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        association = Association(name='Association Benchmark', sigle='AB', email='bench@asso.com',
+                                  phone='000', password_hash='x')
+        db.session.add(association)
+        db.session.commit()
+        seed(association.id, args.members, random.Random(args.seed))
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(association.id))}'}
+        engine = db.engine
+
+    client = app.test_client()
+
+    def legacy():
+        for url in LEGACY_CALLS:
+            assert client.get(url, headers=headers).status_code == 200, url
+
+    def dashboard():
+        return client.get('/api/dashboard/', headers=headers)
+
+    etag = dashboard().headers['ETag']
+
+    def revalidate():
+        assert client.get('/api/dashboard/', headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+
+    summary = {
+        'members': args.members,
+        'before': measure(legacy, args.runs, engine),
+        'after': measure(dashboard, args.runs, engine),
+        'after_304': measure(revalidate, args.runs, engine)
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print(f"📊 Tableau de bord, {args.members} membres, {args.runs} chargements")
+        for name, label in (('before', 'avant (5 appels)'), ('after', 'après (/api/dashboard)'),
+                            ('after_304', 'revalidation (304)')):
+            result = summary[name]
+            print(f"   {label:<24} p50={result['latency_ms']['p50']} p95={result['latency_ms']['p95']} ms, "
+                  f"{result['queries_per_load']} requêtes SQL")
+
+
+if __name__ == '__main__':
+    main()
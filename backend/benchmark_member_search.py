@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Banc de la recherche des membres (index trigrammes contre ILIKE '%...%')
+
+Génère --members membres répartis sur --associations associations dans une
+base SQLite temporaire (ou DATABASE_URL), puis mesure les percentiles de
+latence de l'autocomplétion indexée et de l'ancien filtre ILIKE sur trois
+colonnes, pour une série de saisies partielles.
+
+    python benchmark_member_search.py --members 100000 --queries 200
+    DATABASE_URL=postgresql://... python benchmark_member_search.py --keep
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_telemetry import percentile
+
+FIRST_NAMES = ('Aïssatou', 'Mamadou', 'Hélène', 'Ousmane', 'Fatou', 'Ibrahima', 'Awa', 'Chérif', 'Mariama',
+               'Moussa', 'Khadija', 'Émile', 'Ndèye', 'Abdoulaye', 'Coumba', 'Sékou', 'Binta', 'Jérôme')
+LAST_NAMES = ('Diallo', 'Diop', 'Ndiaye', 'Sow', 'Bâ', 'Camara', 'Touré', 'Traoré', 'Lefèvre', 'Guèye',
+              'Faye', 'Sy', 'Keïta', 'Cissé', 'Mbaye', 'Koné', 'Sarr', 'Niang', 'Fall', 'Dramé')
+
+
+def build_terms(total: int, rng: random.Random) -> List[str]:
+    """Saisies partielles : débuts de noms, sous-chaînes, accents et mots multiples"""
+    terms = []
+    for i in range(total):
+        last, first = rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES)
+        kind = i % 4
+        if kind == 0:
+            terms.append(last[:rng.randint(2, len(last))])
+        elif kind == 1:
+            start = rng.randint(0, max(0, len(first) - 3))
+            terms.append(first[start:start + 3])
+        elif kind == 2:
+            terms.append(f'{last} {first[:3]}')
+        else:
+            terms.append(f'{first.lower()}{rng.randint(0, 999)}')
+    return terms
+
+
+def seed_members(total: int, associations: int, rng: random.Random) -> List[int]:
+    """Insère associations et membres par lots (Core) ; retourne les identifiants d'associations"""
+    from app import db
+    from app.models.association import Association
+    from app.models.member import Member, member_search_text
+
+    ids = []
+    for i in range(associations):
+        association = Association(name=f'Association {i}', sigle=f'A{i}', email=f'asso{i}@bench.com',
+                                  phone='000', password_hash='x')
+        db.session.add(association)
+        db.session.flush()
+        ids.append(association.id)
+    db.session.commit()
+
+    batch = []
+    for i in range(total):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        email = f'{first.lower()}{i}@bench.com'
+        batch.append({
+            'first_name': first, 'last_name': last, 'email': email, 'phone': '000', 'role': 'MEMBER',
+            'status': 'ACTIVE', 'association_id': ids[i % associations],
+            # Insertion groupée : les événements ORM ne s'appliquent pas
+            'search_text': member_search_text(first, last, email)
+        })
+        if len(batch) == 5000 or i == total - 1:
+            db.session.execute(Member.__table__.insert(), batch)
+            db.session.commit()
+            batch = []
+    return ids
+
+
+def legacy_search(association_id, term: str, limit: int):
+    """Ancien filtre : ILIKE '%...%' sur prénom, nom et email"""
+    from app.models.member import Member
+    return (Member.query.filter(Member.association_id == association_id,
+                                Member.first_name.ilike(f'%{term}%') | Member.last_name.ilike(f'%{term}%') |
+                                Member.email.ilike(f'%{term}%'))
+            .order_by(Member.last_name, Member.id).limit(limit).all())
+
+
+def measure(function: Callable, association_ids: List[int], terms: List[str], limit: int) -> Dict[str, float]:
+    latencies = []
+    for position, term in enumerate(terms):
+        started = time.perf_counter()
+        function(association_ids[position % len(association_ids)], term, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {p: round(percentile(latencies, int(p[1:])), 2) for p in ('p50', 'p95', 'p99')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Banc de la recherche des membres')
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--associations', type=int, default=1,
+                        help='associations se partageant les membres (1 : pire cas, tout dans une association)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='conserver les données (DATABASE_URL fourni)')
+    parser.add_argument('--json', action='store_true', help='résultat au format JSON')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        database = os.path.join(tempfile.mkdtemp(prefix='ocm_bench_'), 'members.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ.setdefault('FLASK_ENV', 'development')
+
+    from app import create_app, db
+    from app.services.member_search import typeahead
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        association_ids = seed_members(args.members, args.associations, rng)
+        seeded = time.perf_counter() - started
+        terms = build_terms(args.queries, rng)
+
+        summary = {
+            'members': args.members,
+            'associations': args.associations,
+            'dialect': db.engine.dialect.name,
+            'seed_s': round(seeded, 2),
+            'typeahead_ms': measure(typeahead, association_ids, terms, args.limit),
+            'ilike_ms': measure(legacy_search, association_ids, terms, args.limit)
+        }
+        if not args.keep:
+            db.session.remove()
+            db.drop_all()
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print(f"📊 {summary['members']} membres ({summary['dialect']}), insérés en {summary['seed_s']} s")
+        for name in ('typeahead_ms', 'ilike_ms'):
+            latency = summary[name]
+            print(f"   {name[:-3]:<10} p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} ms")
+
+
+if __name__ == '__main__':
+    main()
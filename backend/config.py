@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -19,6 +20,71 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = False  # Pour le développement
     JWT_ALGORITHM = 'HS256'
 
+    # Configuration de l'assistant IA (Ollama)
+    OLLAMA_BASE_URL = os.environ.get('OLLAMA_BASE_URL') or 'http://localhost:11434'
+    OLLAMA_BASE_URLS = os.environ.get('OLLAMA_BASE_URLS', '')  # pool "http://gpu1:11434,http://gpu2:11434"
+    OLLAMA_MODELS_TTL = int(os.environ.get('OLLAMA_MODELS_TTL') or 300)  # secondes
+    OLLAMA_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE') or 10)
+    OLLAMA_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '30m')  # modèle gardé en mémoire entre deux requêtes
+    # Budgets par page, ex. {"dashboard": {"num_predict": 200}} (voir app/services/generation_budget.py)
+    AI_GENERATION_BUDGETS = os.environ.get('AI_GENERATION_BUDGETS', '')
+
+    # Cache des réponses IA (AI_CACHE_TTL=0 pour le désactiver)
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES') or 500)
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL') or 3600)  # secondes
+    AI_CACHE_WARMUP_LIMIT = int(os.environ.get('AI_CACHE_WARMUP_LIMIT') or 0)  # réponses rechargées au démarrage
+
+    # Index sémantique des questions déjà traitées (AI_SEMANTIC_THRESHOLD=0 pour le désactiver)
+    AI_EMBEDDING_MODEL = os.environ.get('AI_EMBEDDING_MODEL', 'nomic-embed-text')
+    AI_SEMANTIC_THRESHOLD = float(os.environ.get('AI_SEMANTIC_THRESHOLD') or 0.92)  # similarité cosinus minimale
+    AI_SEMANTIC_MAX_ENTRIES = int(os.environ.get('AI_SEMANTIC_MAX_ENTRIES') or 20000)
+
+    # Extraits des ressources (modèles, recommandations, conformité) ajoutés au prompt, index BM25 partagé
+    AI_RETRIEVAL_TOP_K = int(os.environ.get('AI_RETRIEVAL_TOP_K') or 3)  # 0 pour désactiver
+    AI_RETRIEVAL_MAX_TOKENS = int(os.environ.get('AI_RETRIEVAL_MAX_TOKENS') or 400)
+    GUIDANCE_INDEX_PATH = os.environ.get('GUIDANCE_INDEX_PATH',
+                                         os.path.join(tempfile.gettempdir(), 'ocm_guidance_index.json'))
+    GUIDANCE_INDEX_PERSIST_DELAY = float(os.environ.get('GUIDANCE_INDEX_PERSIST_DELAY') or 2)  # écritures groupées (s)
+
+    # Conversations : historique réécrit dans le prompt quand les tokens de contexte Ollama ne suffisent plus
+    AI_CONVERSATION_HISTORY_TOKENS = int(os.environ.get('AI_CONVERSATION_HISTORY_TOKENS') or 600)
+
+    # Requêtes IA groupées (/ai/batch) : taille maximale d'un lot
+    AI_BATCH_MAX_QUERIES = int(os.environ.get('AI_BATCH_MAX_QUERIES') or 20)
+
+    # Contrôle d'admission des générations IA (par worker ; AI_MAX_IN_FLIGHT=0 pour le désactiver)
+    AI_MAX_IN_FLIGHT = int(os.environ.get('AI_MAX_IN_FLIGHT') or 2)
+    AI_MAX_QUEUE = int(os.environ.get('AI_MAX_QUEUE') or 16)
+    AI_MAX_QUEUE_PER_ASSOCIATION = int(os.environ.get('AI_MAX_QUEUE_PER_ASSOCIATION') or 0)  # 0 = AI_MAX_QUEUE
+    AI_QUEUE_TIMEOUT = float(os.environ.get('AI_QUEUE_TIMEOUT') or 30)  # secondes
+    AI_ASSOCIATION_WEIGHTS = os.environ.get('AI_ASSOCIATION_WEIGHTS', '')  # "12:2,15:0.5"
+
+    # Disjoncteur Ollama : état partagé entre workers via un fichier (vide = par worker)
+    AI_BREAKER_ENABLED = os.environ.get('AI_BREAKER_ENABLED', 'true').lower() != 'false'
+    AI_BREAKER_STATE_FILE = os.environ.get('AI_BREAKER_STATE_FILE',
+                                           os.path.join(tempfile.gettempdir(), 'ocm_ollama_breaker.json'))
+    AI_BREAKER_FAILURE_RATE = float(os.environ.get('AI_BREAKER_FAILURE_RATE') or 0.5)
+    AI_BREAKER_SLOW_CALL = float(os.environ.get('AI_BREAKER_SLOW_CALL') or 20)  # secondes
+    AI_BREAKER_MIN_CALLS = int(os.environ.get('AI_BREAKER_MIN_CALLS') or 5)
+    AI_BREAKER_COOLDOWN = float(os.environ.get('AI_BREAKER_COOLDOWN') or 30)  # secondes
+
+    # Routage des requêtes IA : questions courtes vers le modèle rapide, complexes vers le modèle de qualité
+    AI_ROUTING_ENABLED = os.environ.get('AI_ROUTING_ENABLED', 'true').lower() != 'false'
+    AI_FAST_MODEL = os.environ.get('AI_FAST_MODEL', 'llama2')
+    AI_QUALITY_MODEL = os.environ.get('AI_QUALITY_MODEL', 'mistral-french')  # Modelfile-french
+    AI_LATENCY_SLO = float(os.environ.get('AI_LATENCY_SLO') or 20)  # secondes de génération visées
+
+    # Préchargement des modèles : chargés au démarrage puis gardés chauds pendant les heures d'activité
+    OLLAMA_WARMUP_MODELS = os.environ.get('OLLAMA_WARMUP_MODELS', 'llama2,mistral-french')  # "llama2,mistral"
+    OLLAMA_WARMUP_ON_START = os.environ.get('OLLAMA_WARMUP_ON_START', 'false').lower() == 'true'
+    OLLAMA_KEEPALIVE_INTERVAL = int(os.environ.get('OLLAMA_KEEPALIVE_INTERVAL') or 240)  # secondes, < OLLAMA_KEEP_ALIVE
+    OLLAMA_KEEPALIVE_HOURS = os.environ.get('OLLAMA_KEEPALIVE_HOURS', '8-20')  # vide = toute la journée
+
+    # File des requêtes IA asynchrones
+    AI_JOBS_WORKERS = int(os.environ.get('AI_JOBS_WORKERS') or 2)  # générations simultanées par worker
+    AI_JOBS_STALE_AFTER = int(os.environ.get('AI_JOBS_STALE_AFTER') or 300)  # secondes avant reprise
+    AI_JOBS_MAX_ATTEMPTS = int(os.environ.get('AI_JOBS_MAX_ATTEMPTS') or 3)
+
     # Configuration CORS intelligente :
     # - En développement : autorise localhost
     # - En production : autorise le front Netlify
@@ -0,0 +1,212 @@
+"""Fixtures partagées par les tests du backend"""
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Ajouter le répertoire du backend au chemin Python
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_sse(body):
+    """Découpe un flux SSE en liste de (événement, données)"""
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def stub_embedding(text, dimension=32):
+    """Embedding déterministe en sac de mots : les questions partageant des mots sont proches"""
+    vector = [0.0] * dimension
+    for word in re.findall(r'\w+', text.lower()):
+        vector[zlib.crc32(word.encode('utf-8')) % dimension] += 1.0
+    return vector
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Imitation minimale de l'API Ollama pour les tests"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _context(self, payload):
+        # Tokens de contexte factices : ceux reçus prolongés d'un tour
+        return list(payload.get('context') or []) + [len(self.server.calls)]
+
+    def do_GET(self):
+        self.server.calls.append(('GET', self.path, None))
+        if self.path == '/api/tags':
+            self._send_json({'models': [{'name': name} for name in self.server.models]})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.calls.append(('POST', self.path, payload))
+        if self.server.fail_status:
+            self._send_json({'error': 'stub failure'}, status=self.server.fail_status)
+            return
+        if self.path == '/api/generate' and payload.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.end_headers()
+            for word in self.server.answer.split(' '):
+                chunk = {'model': payload.get('model'), 'response': word + ' ', 'done': False}
+                self.wfile.write(json.dumps(chunk).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            final = dict(self.server.metrics, model=payload.get('model'), response='', done=True,
+                         context=self._context(payload))
+            self.wfile.write(json.dumps(final).encode('utf-8') + b'\n')
+        elif self.path == '/api/embeddings':
+            self._send_json({'embedding': stub_embedding(payload.get('prompt', ''))})
+        elif self.path == '/api/generate':
+            self._send_json(dict(
+                self.server.metrics,
+                model=payload.get('model'),
+                response=self.server.answer,
+                done=True,
+                context=self._context(payload)
+            ))
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+
+@pytest.fixture
+def stub_ollama_factory():
+    """Fabrique de serveurs Ollama locaux démarrés dans des threads"""
+    servers = []
+
+    def start():
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+        server.models = ['llama2:latest']  # Noms publiés par /api/tags, avec leur tag
+        server.answer = 'Réponse de test'
+        server.calls = []
+        server.fail_status = None  # code HTTP renvoyé à toute génération (panne simulée)
+        server.metrics = {
+            'total_duration': 2_000_000_000,
+            'load_duration': 100_000_000,
+            'prompt_eval_count': 120,
+            'eval_count': 50,
+            'eval_duration': 1_000_000_000,
+            'done_reason': 'stop'
+        }
+        server.url = f'http://127.0.0.1:{server.server_address[1]}'
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_ollama(stub_ollama_factory):
+    """Serveur Ollama local démarré dans un thread"""
+    return stub_ollama_factory()
+
+
+@pytest.fixture
+def ollama(app, stub_ollama):
+    """Branche l'application sur le serveur Ollama de test"""
+    from app.services.ollama_service import reset_ollama_service
+    reset_ollama_service()
+    app.config['OLLAMA_BASE_URL'] = stub_ollama.url
+    return stub_ollama
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Application Flask sur une base SQLite en mémoire"""
+    from config import Config
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    monkeypatch.setattr(Config, 'TESTING', True, raising=False)
+    monkeypatch.setattr(Config, 'AI_BREAKER_STATE_FILE', '')  # disjoncteur propre à chaque test
+    monkeypatch.setattr(Config, 'GUIDANCE_INDEX_PATH', '')  # index des ressources en mémoire
+
+    from app import create_app, db
+    from app.services.ai_jobs import reset_ai_job_runner
+    from app.services.guidance_index import reset_guidance_index_store
+    from app.services.ollama_service import reset_ollama_service
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        reset_ai_job_runner()
+        db.session.remove()
+        db.drop_all()
+    reset_ollama_service()
+    reset_guidance_index_store()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def association(app):
+    from app import bcrypt, db
+    from app.models.association import Association
+
+    association = Association(
+        name='Association de Test',
+        sigle='AT',
+        email='test@asso.com',
+        phone='+221 000 000 000',
+        password_hash=bcrypt.generate_password_hash('test123').decode('utf-8')
+    )
+    db.session.add(association)
+    db.session.commit()
+    return association
+
+
+@pytest.fixture
+def sql_statements(app):
+    """Requêtes SQL émises dans un bloc : with sql_statements() as statements: ..."""
+    from sqlalchemy import event
+
+    from app import db
+
+    @contextmanager
+    def capture():
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    return capture
+
+
+@pytest.fixture
+def auth_headers(app, association):
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity=str(association.id))
+    return {'Authorization': f'Bearer {token}'}
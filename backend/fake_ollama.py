@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Faux serveur Ollama pour les tests de charge et de latence de l'assistant IA
+
+Implémente /api/tags, /api/generate (flux ou non) et /api/embeddings avec des
+latences, débits, taux d'erreur et blocages configurables. Le générateur
+aléatoire est initialisé par --seed : deux exécutions identiques produisent
+les mêmes tirages.
+
+    python fake_ollama.py --port 11435 --models llama2=40,mistral-french=15 \\
+        --latency lognormal:-1.5,0.4 --error-rate 0.02 --hang-rate 0.01
+
+Puis OLLAMA_BASE_URL=http://127.0.0.1:11435 pour y brancher le backend.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+# Vocabulaire des réponses générées
+WORDS = ('association', 'membres', 'budget', 'assemblée', 'générale', 'bureau', 'statuts', 'cotisations',
+         'trésorier', 'rapport', 'activités', 'subvention', 'projet', 'procès-verbal', 'conseil',
+         'organiser', 'préparer', 'vérifier', 'adopter', 'présenter', 'annuel', 'prévisionnel')
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Distribution du délai avant le premier token (secondes).
+
+    Formats : fixed:0.2, uniform:0.1,0.5, normal:0.3,0.05, lognormal:mu,sigma,
+    exponential:moyenne. Les tirages négatifs sont ramenés à 0.
+    """
+    kind, _, params = (spec or 'fixed:0').partition(':')
+    values = [float(value) for value in params.split(',') if value.strip()]
+    samplers = {
+        'fixed': lambda rng: values[0],
+        'uniform': lambda rng: rng.uniform(values[0], values[1]),
+        'normal': lambda rng: rng.gauss(values[0], values[1]),
+        'lognormal': lambda rng: rng.lognormvariate(values[0], values[1]),
+        'exponential': lambda rng: rng.expovariate(1 / values[0]) if values[0] else 0.0
+    }
+    if kind not in samplers:
+        raise ValueError(f"Distribution de latence inconnue: {kind}")
+    sampler = samplers[kind]
+    sampler(random.Random(0))  # Paramètres manquants détectés dès le démarrage
+    return lambda rng: max(0.0, sampler(rng))
+
+
+def parse_models(value: str, default_speed: float) -> Dict[str, float]:
+    """Modèles servis et leur débit : 'llama2=40,mistral-french=15' (tokens/s)"""
+    models = {}
+    for item in (value or '').split(','):
+        name, _, speed = item.strip().partition('=')
+        if name:
+            models[name] = float(speed) if speed else default_speed
+    return models
+
+
+def tagged_name(name: str) -> str:
+    """Nom publié par /api/tags : tag :latest ajouté s'il n'y en a pas"""
+    return name if ':' in name else name + ':latest'
+
+
+def served_model(models: Dict[str, float], model: Optional[str]) -> Optional[str]:
+    """Modèle configuré désigné par le nom reçu ('llama2' ou 'llama2:latest'), None s'il n'est pas servi"""
+    if not model:
+        return None
+    if model in models:
+        return model
+    return next((name for name in models if tagged_name(name) == tagged_name(model)), None)
+
+
+def fake_embedding(text: str, dimension: int = 64) -> List[float]:
+    """Sac de mots haché : les questions proches ont des vecteurs proches"""
+    vector = [0.0] * dimension
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode('utf-8')) % dimension] += 1.0
+    return vector
+
+
+class FakeOllamaSettings:
+    """Comportement du faux serveur (modifiable pendant l'exécution)"""
+
+    def __init__(self, models: Optional[Dict[str, float]] = None, latency: str = 'fixed:0.05',
+                 response_tokens: int = 60, error_rate: float = 0.0, hang_rate: float = 0.0,
+                 hang_seconds: float = 60.0, cold_load: float = 0.0, embedding_dimension: int = 64,
+                 seed: Optional[int] = None):
+        self.models = models or {'llama2': 30.0}
+        self.latency = parse_latency(latency)
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.cold_load = cold_load  # Chargement du modèle à sa première requête
+        self.embedding_dimension = embedding_dimension
+        self.seed = seed
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Réponses au format de l'API Ollama"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            # Comme un vrai serveur : noms suivis de leur tag ('llama2:latest')
+            self._send_json({'models': [{'name': tagged_name(name)} for name in self.server.settings.models]})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.count(self.path)
+        if self.path == '/api/generate':
+            self._generate(payload)
+        elif self.path == '/api/embeddings':
+            prompt = payload.get('prompt', '')
+            self._send_json({'embedding': fake_embedding(prompt, self.server.settings.embedding_dimension)})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def _generate(self, payload):
+        settings = self.server.settings
+        model = payload.get('model')
+        served = served_model(settings.models, model)
+        if served is None:
+            self._send_json({'error': f"model '{model}' not found"}, status=404)
+            return
+
+        if not payload.get('prompt'):
+            # Prompt vide : Ollama se contente de charger le modèle en mémoire
+            load_ns = int(self.server.load(served) * 1e9)
+            time.sleep(load_ns / 1e9)
+            self._send_json({'model': model, 'response': '', 'done': True, 'done_reason': 'load',
+                             'total_duration': load_ns, 'load_duration': load_ns,
+                             'prompt_eval_count': 0, 'eval_count': 0})
+            return
+
+        plan = self.server.plan(served, payload)
+        if plan['error']:
+            self._send_json({'error': 'simulated failure'}, status=500)
+            return
+        if plan['hang'] and not payload.get('stream'):
+            time.sleep(settings.hang_seconds)
+
+        time.sleep(plan['first_token'])
+        if payload.get('stream'):
+            self._stream(payload, plan)
+        else:
+            time.sleep(plan['eval_seconds'])
+            self._send_json(self.server.final_chunk(model, payload, plan, ' '.join(plan['words'])))
+
+    def _stream(self, payload, plan):
+        model = payload.get('model')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        interval = plan['eval_seconds'] / max(len(plan['words']), 1)
+        try:
+            for position, word in enumerate(plan['words']):
+                self._write_chunk({'model': model, 'response': word + ' ', 'done': False})
+                if plan['hang'] and position == 0:
+                    # Flux bloqué après le premier token
+                    time.sleep(self.server.settings.hang_seconds)
+                time.sleep(interval)
+            self._write_chunk(self.server.final_chunk(model, payload, plan, ''))
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client parti (délai dépassé)
+
+    def _write_chunk(self, data):
+        line = json.dumps(data).encode('utf-8') + b'\n'
+        self.wfile.write(f'{len(line):X}\r\n'.encode('ascii') + line + b'\r\n')
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread tirant les latences d'un générateur partagé"""
+
+    daemon_threads = True
+
+    def __init__(self, address, settings: FakeOllamaSettings):
+        super().__init__(address, FakeOllamaHandler)
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.requests: Dict[str, int] = {}
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Connexions coupées par le client (délai dépassé, flux abandonné) : cas normal en test de charge
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _load(self, model: str) -> float:
+        """Durée de chargement du modèle : nulle s'il est déjà en mémoire (appelé sous verrou)"""
+        if model in self._loaded:
+            return 0.0
+        self._loaded.add(model)
+        return self.settings.cold_load
+
+    def load(self, model: str) -> float:
+        """Charge le modèle sans générer (prompt vide) et renvoie la durée de chargement"""
+        with self._lock:
+            return self._load(model)
+
+    def plan(self, model: str, payload: dict) -> dict:
+        """Tire le déroulement d'une génération (sous verrou : ordre des tirages reproductible)"""
+        settings = self.settings
+        options = payload.get('options') or {}
+        with self._lock:
+            error = self.rng.random() < settings.error_rate
+            hang = self.rng.random() < settings.hang_rate
+            first_token = settings.latency(self.rng)
+            tokens = max(1, int(self.rng.gauss(settings.response_tokens, settings.response_tokens / 5)))
+            tokens = min(tokens, options.get('num_predict') or tokens)
+            words = [self.rng.choice(WORDS) for _ in range(tokens)]
+            load = self._load(model)
+        return {
+            'error': error,
+            'hang': hang,
+            'load_seconds': load,
+            'first_token': first_token + load,
+            'eval_seconds': tokens / settings.models[model],
+            'words': words,
+            'length_limited': tokens == options.get('num_predict')
+        }
+
+    def final_chunk(self, model: str, payload: dict, plan: dict, response: str) -> dict:
+        """Dernier message Ollama avec ses compteurs (durées en nanosecondes)"""
+        prompt_tokens = max(1, len(payload.get('prompt', '')) // 4)
+        load_ns = int(plan['load_seconds'] * 1e9)
+        prompt_ns = int((plan['first_token'] - plan['load_seconds']) * 1e9)
+        eval_ns = int(plan['eval_seconds'] * 1e9)
+        return {
+            'model': model,
+            'response': response,
+            'done': True,
+            'done_reason': 'length' if plan['length_limited'] else 'stop',
+            'context': list(payload.get('context') or []) + list(range(prompt_tokens + len(plan['words'])))[-64:],
+            'total_duration': load_ns + prompt_ns + eval_ns,
+            'load_duration': load_ns,
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': prompt_ns,
+            'eval_count': len(plan['words']),
+            'eval_duration': eval_ns
+        }
+
+
+def start_fake_ollama(settings: Optional[FakeOllamaSettings] = None, host: str = '127.0.0.1',
+                      port: int = 0) -> FakeOllamaServer:
+    """Démarre le faux serveur dans un thread ; server.shutdown() pour l'arrêter"""
+    server = FakeOllamaServer((host, port), settings or FakeOllamaSettings())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser):
+    """Options du faux serveur (partagées avec benchmark_ai.py)"""
+    parser.add_argument('--models', default='llama2=30', help="modèles et débits, ex. llama2=40,mistral-french=15")
+    parser.add_argument('--latency', default='fixed:0.05', help='délai avant le premier token (voir parse_latency)')
+    parser.add_argument('--response-tokens', type=int, default=60, help='longueur moyenne des réponses')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='part des générations en erreur 500')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='part des générations bloquées')
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--cold-load', type=float, default=0.0, help='chargement du modèle à sa première requête')
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def settings_from_args(args) -> FakeOllamaSettings:
+    return FakeOllamaSettings(
+        models=parse_models(args.models, 30.0),
+        latency=args.latency,
+        response_tokens=args.response_tokens,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        cold_load=args.cold_load,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Faux serveur Ollama pour les tests de charge')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer((args.host, args.port), settings_from_args(args))
+    print(f"🤖 Faux Ollama sur {server.url} (modèles : {', '.join(server.settings.models)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Arrêt du faux Ollama")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
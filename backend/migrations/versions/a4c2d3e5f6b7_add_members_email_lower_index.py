@@ -0,0 +1,24 @@
+"""Index members on lower(email) for case-insensitive duplicate lookups
+
+Revision ID: a4c2d3e5f6b7
+Revises: f3b1c2d4e5a6
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c2d3e5f6b7'
+down_revision = 'f3b1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_members_email_lower', 'members', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_members_email_lower', table_name='members')
@@ -0,0 +1,48 @@
+"""Add nightly insight batch runs and insight source
+
+Revision ID: a8c6d7e9f0b1
+Revises: f7a5b6c8d9e0
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c6d7e9f0b1'
+down_revision = 'f7a5b6c8d9e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('insight_batch_runs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('reference_date', sa.Date(), nullable=False),
+    sa.Column('last_association_id', sa.Integer(), nullable=False),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('skipped', sa.Integer(), nullable=False),
+    sa.Column('insights_created', sa.Integer(), nullable=False),
+    sa.Column('elapsed_seconds', sa.Float(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('insight_batch_runs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_insight_batch_runs_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('smart_insights', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source', sa.String(length=50), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('smart_insights', schema=None) as batch_op:
+        batch_op.drop_column('source')
+
+    with op.batch_alter_table('insight_batch_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_insight_batch_runs_status'))
+
+    op.drop_table('insight_batch_runs')
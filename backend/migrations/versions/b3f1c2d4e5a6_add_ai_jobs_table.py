@@ -0,0 +1,42 @@
+"""Add ai_jobs table for asynchronous AI queries
+
+Revision ID: b3f1c2d4e5a6
+Revises: 9763dcfed370
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f1c2d4e5a6'
+down_revision = '9763dcfed370'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Create ai_jobs table
+    op.create_table('ai_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('association_id', sa.String(length=36), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='aijobstatus'), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('ai_query_id', sa.String(length=36), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['association_id'], ['associations.id'], ),
+        sa.ForeignKeyConstraint(['ai_query_id'], ['ai_queries.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ai_jobs_status', 'ai_jobs', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_ai_jobs_status', table_name='ai_jobs')
+    op.drop_table('ai_jobs')
+    sa.Enum(name='aijobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,26 @@
+"""Index members by (association_id, last_name, id) for keyset pagination
+
+Revision ID: b9d7e8f0a1c2
+Revises: a8c6d7e9f0b1
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d7e8f0a1c2'
+down_revision = 'a8c6d7e9f0b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.create_index('ix_members_association_last_name_id', ['association_id', 'last_name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.drop_index('ix_members_association_last_name_id')
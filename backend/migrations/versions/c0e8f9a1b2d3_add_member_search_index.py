@@ -0,0 +1,75 @@
+"""Add members.search_text with a trigram index (FTS5 on SQLite, pg_trgm on PostgreSQL)
+
+Revision ID: c0e8f9a1b2d3
+Revises: b9d7e8f0a1c2
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0e8f9a1b2d3'
+down_revision = 'b9d7e8f0a1c2'
+branch_labels = None
+depends_on = None
+
+SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5("
+    "search_text, content='members', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS members_fts_ai AFTER INSERT ON members BEGIN "
+    "INSERT INTO members_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS members_fts_ad AFTER DELETE ON members BEGIN "
+    "INSERT INTO members_fts(members_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS members_fts_au AFTER UPDATE OF search_text ON members BEGIN "
+    "INSERT INTO members_fts(members_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO members_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO members_fts(members_fts) VALUES ('rebuild')"
+)
+
+
+def _normalize(text):
+    # Copie figée de app.models.member.normalize_search
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def upgrade():
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    members = sa.table('members', sa.column('id', sa.Integer), sa.column('first_name', sa.String),
+                       sa.column('last_name', sa.String), sa.column('email', sa.String),
+                       sa.column('search_text', sa.Text))
+    rows = bind.execute(sa.select(members.c.id, members.c.first_name, members.c.last_name, members.c.email)).fetchall()
+    for start in range(0, len(rows), 1000):
+        bind.execute(
+            members.update().where(members.c.id == sa.bindparam('member_id')),
+            [{'member_id': row.id, 'search_text': _normalize(f"{row.last_name or ''} {row.first_name or ''} {row.email or ''}")}
+             for row in rows[start:start + 1000]]
+        )
+
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_members_search_text_trgm ON members USING gin (search_text gin_trgm_ops)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('members_fts_ai', 'members_fts_ad', 'members_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS members_fts")
+    elif bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_members_search_text_trgm")
+
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
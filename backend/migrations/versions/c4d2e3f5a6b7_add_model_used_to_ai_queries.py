@@ -0,0 +1,26 @@
+"""Record the model that answered each AI query
+
+Revision ID: c4d2e3f5a6b7
+Revises: b3f1c2d4e5a6
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d2e3f5a6b7'
+down_revision = 'b3f1c2d4e5a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('model_used', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.drop_column('model_used')
@@ -0,0 +1,30 @@
+"""Add per-association collection versions (list ETags)
+
+Revision ID: d1f9a0b2c3e4
+Revises: c0e8f9a1b2d3
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f9a0b2c3e4'
+down_revision = 'c0e8f9a1b2d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('collection_versions',
+    sa.Column('association_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('collection', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('association_id', 'collection')
+    )
+
+
+def downgrade():
+    op.drop_table('collection_versions')
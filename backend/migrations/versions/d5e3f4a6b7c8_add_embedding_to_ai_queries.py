@@ -0,0 +1,26 @@
+"""Store question embeddings for the AI semantic index
+
+Revision ID: d5e3f4a6b7c8
+Revises: c4d2e3f5a6b7
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e3f4a6b7c8'
+down_revision = 'c4d2e3f5a6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.drop_column('embedding')
@@ -0,0 +1,46 @@
+"""Index transactions by (association_id, date) for range-filtered statistics
+
+Revision ID: e2a0b1c3d4f5
+Revises: d1f9a0b2c3e4
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a0b1c3d4f5'
+down_revision = 'd1f9a0b2c3e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # La table transactions n'a jamais été créée par une migration : base neuve
+    if not sa.inspect(op.get_bind()).has_table('transactions'):
+        op.create_table('transactions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('association_id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(length=255), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('type', sa.Enum('INCOME', 'EXPENSE', name='transactiontype'), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('receipt', sa.String(length=255), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['association_id'], ['associations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_association_date', ['association_id', 'date'], unique=False)
+
+
+def downgrade():
+    # La table, éventuellement créée ci-dessus, est conservée avec ses données
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_association_date')
@@ -0,0 +1,51 @@
+"""Add AI conversation threads
+
+Revision ID: e6f4a5b7c8d9
+Revises: d5e3f4a6b7c8
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f4a5b7c8d9'
+down_revision = 'd5e3f4a6b7c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ai_conversations',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('association_id', sa.String(length=36), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('model', sa.String(length=100), nullable=True),
+    sa.Column('ollama_context', sa.JSON(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('turn_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['association_id'], ['associations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ai_conversations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ai_conversations_association_id'), ['association_id'], unique=False)
+
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('conversation_id', sa.String(length=36), nullable=True))
+        batch_op.create_index(batch_op.f('ix_ai_queries_conversation_id'), ['conversation_id'], unique=False)
+        batch_op.create_foreign_key('fk_ai_queries_conversation_id', 'ai_conversations', ['conversation_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_ai_queries_conversation_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_ai_queries_conversation_id'))
+        batch_op.drop_column('conversation_id')
+
+    with op.batch_alter_table('ai_conversations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ai_conversations_association_id'))
+
+    op.drop_table('ai_conversations')
@@ -0,0 +1,56 @@
+"""Add finance_monthly_rollups and backfill it from transactions
+
+Revision ID: f3b1c2d4e5a6
+Revises: e2a0b1c3d4f5
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b1c2d4e5a6'
+down_revision = 'e2a0b1c3d4f5'
+branch_labels = None
+depends_on = None
+
+# Type déjà créé avec la table transactions sous PostgreSQL
+TRANSACTION_TYPE = sa.Enum('INCOME', 'EXPENSE', name='transactiontype').with_variant(
+    postgresql.ENUM('INCOME', 'EXPENSE', name='transactiontype', create_type=False), 'postgresql')
+
+
+def upgrade():
+    op.create_table('finance_monthly_rollups',
+    sa.Column('association_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('month', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('type', TRANSACTION_TYPE, nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('association_id', 'year', 'month', 'type', 'category')
+    )
+
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('transactions'):
+        return
+    transactions = sa.table('transactions', sa.column('id', sa.Integer), sa.column('association_id', sa.Integer),
+                            sa.column('date', sa.Date), sa.column('type', TRANSACTION_TYPE),
+                            sa.column('category', sa.String), sa.column('amount', sa.Float))
+    rollups = sa.table('finance_monthly_rollups', sa.column('association_id'), sa.column('year'),
+                       sa.column('month'), sa.column('type'), sa.column('category'), sa.column('total'),
+                       sa.column('count'))
+    year = sa.extract('year', transactions.c.date)
+    month = sa.extract('month', transactions.c.date)
+    bind.execute(rollups.insert().from_select(
+        ['association_id', 'year', 'month', 'type', 'category', 'total', 'count'],
+        sa.select(transactions.c.association_id, year, month, transactions.c.type, transactions.c.category,
+                  sa.func.sum(transactions.c.amount), sa.func.count(transactions.c.id))
+        .group_by(transactions.c.association_id, year, month, transactions.c.type, transactions.c.category)
+    ))
+
+
+def downgrade():
+    op.drop_table('finance_monthly_rollups')
@@ -0,0 +1,38 @@
+"""Store Ollama generation telemetry on AI queries
+
+Revision ID: f7a5b6c8d9e0
+Revises: e6f4a5b7c8d9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a5b6c8d9e0'
+down_revision = 'e6f4a5b7c8d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_duration_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('load_duration_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('prompt_eval_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('prompt_eval_duration_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('eval_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('eval_duration_ms', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('queue_wait_ms', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ai_queries', schema=None) as batch_op:
+        batch_op.drop_column('queue_wait_ms')
+        batch_op.drop_column('eval_duration_ms')
+        batch_op.drop_column('eval_count')
+        batch_op.drop_column('prompt_eval_duration_ms')
+        batch_op.drop_column('prompt_eval_count')
+        batch_op.drop_column('load_duration_ms')
+        batch_op.drop_column('total_duration_ms')
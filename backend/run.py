@@ -1,4 +1,5 @@
 from app import create_app, db
+import click
 import os
 
 app = create_app()
@@ -60,6 +61,103 @@ def init_db():
     db.session.commit()
     print("Base de données initialisée avec succès!")
 
+@app.cli.command()
+def run_ai_jobs():
+    """Traiter les requêtes IA asynchrones en attente"""
+    from app.services.ai_jobs import AIJobRunner
+    
+    runner = AIJobRunner(app, max_workers=1)
+    processed = runner.run_pending()
+    runner.shutdown()
+    print(f"{len(processed)} requêtes IA traitées")
+
+@app.cli.command()
+def warm_ai_models():
+    """Précharger les modèles Ollama configurés (OLLAMA_WARMUP_MODELS)"""
+    from app.services.model_warmup import parse_models, warm_up_models
+    from app.services.ollama_service import get_ollama_service
+    
+    models = parse_models(app.config['OLLAMA_WARMUP_MODELS'])
+    durations = warm_up_models(get_ollama_service(), models)
+    for model, duration in durations.items():
+        status = f"{duration}s" if duration is not None else "échec"
+        print(f"{model}: {status}")
+
+@app.cli.command()
+def build_ai_index():
+    """Calculer les embeddings manquants des requêtes IA (index sémantique)"""
+    from app.models.guidance import AIQuery
+    from app.services.ollama_service import FALLBACK_RESPONSE_PREFIX, get_ollama_service
+    from app.services.semantic_index import encode_embedding
+    
+    service = get_ollama_service()
+    records = db.session.query(AIQuery).filter(
+        AIQuery.embedding.is_(None),
+        ~AIQuery.response.startswith(FALLBACK_RESPONSE_PREFIX)
+    ).all()
+    indexed = 0
+    for record in records:
+        embedding = service.embed(record.query)
+        if embedding:
+            record.embedding = encode_embedding(embedding)
+            indexed += 1
+        if indexed and indexed % 100 == 0:
+            db.session.commit()
+    db.session.commit()
+    print(f"{indexed}/{len(records)} requêtes IA indexées")
+
+@app.cli.command()
+@click.option('--days', default=7, show_default=True, help="Fenêtre d'analyse en jours")
+@click.option('--association-id', default=None, help="Limiter à une association")
+def ai_telemetry(days, association_id):
+    """Performances des modèles IA sur toute l'instance (dimensionnement des serveurs)"""
+    import json
+    from app.services.ai_telemetry import telemetry_summary
+    
+    print(json.dumps(telemetry_summary(days, association_id), indent=2, ensure_ascii=False))
+
+@app.cli.command()
+def build_guidance_index():
+    """Construire l'index BM25 des ressources utilisées par l'assistant IA"""
+    from app.services.guidance_index import get_guidance_index_store
+    
+    index = get_guidance_index_store().rebuild(db.session)
+    print(f"Index des ressources construit: {len(index)} passages")
+
+@app.cli.command()
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help="Processus de calcul (0 : sans pool)")
+@click.option('--chunk-size', default=200, show_default=True, help="Associations lues et écrites par lot")
+@click.option('--restart', is_flag=True, help="Ignorer une exécution interrompue et repartir du début")
+def generate_insights(workers, chunk_size, restart):
+    """Calculer les insights de toutes les associations (traitement nocturne, reprise possible)"""
+    from app.services.insight_batch import run_insight_batch
+    
+    def progress(run):
+        print(f"  {run.processed} associations, {run.insights_created} insights "
+              f"(jusqu'à l'association {run.last_association_id})")
+    
+    run = run_insight_batch(workers=workers, chunk_size=chunk_size, restart=restart, progress=progress)
+    summary = run.to_dict()
+    print(f"Insights calculés: {summary['processed']} associations "
+          f"({summary['skipped']} sans diagnostic), {summary['insights_created']} insights, "
+          f"{summary['associations_per_second']} associations/s")
+
+@app.cli.command()
+def rebuild_member_search():
+    """Recalculer le texte de recherche des membres et reconstruire son index"""
+    from app.services.member_search import rebuild_search_index
+    
+    print(f"Index de recherche reconstruit: {rebuild_search_index()} membres")
+
+@app.cli.command()
+@click.option('--association-id', type=int, multiple=True, help="Limiter à ces associations (répétable)")
+def rebuild_finance_rollups(association_id):
+    """Recalculer les cumuls mensuels des finances depuis les transactions"""
+    from app.services.finance_rollups import rebuild_rollups
+    
+    rows = rebuild_rollups(db.session, association_id or None)
+    print(f"Cumuls mensuels reconstruits: {rows} lignes")
+
 if __name__ == "__main__":
     import os
     port = int(os.environ.get("PORT", 5000))
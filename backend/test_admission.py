@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests du contrôle d'admission des générations IA"""
+import threading
+import time
+
+import pytest
+
+from app.services.admission import (AdmissionRejected, FairAdmissionController,
+                                    parse_weights)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+
+def queue_waiter(controller, tenant, name, order):
+    """Démarre un thread qui attend une place puis note son ordre de passage"""
+    queued_before = controller.stats()['queued']
+
+    def run():
+        controller.acquire(tenant)
+        order.append(name)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    wait_until(lambda: controller.stats()['queued'] == queued_before + 1)
+    return thread
+
+
+def test_admits_up_to_max_in_flight():
+    controller = FairAdmissionController(max_in_flight=2, max_queue=0)
+    assert controller.acquire('1') == 0.0
+    assert controller.acquire('2') == 0.0
+
+    with pytest.raises(AdmissionRejected) as error:
+        controller.acquire('3')
+    assert error.value.retry_after >= 1
+
+
+def test_fair_queuing_between_associations():
+    """Une association bruyante ne passe pas devant les autres"""
+    controller = FairAdmissionController(max_in_flight=1, max_queue=10, queue_timeout=5)
+    controller.acquire('noisy')
+    order = []
+
+    threads = [queue_waiter(controller, 'noisy', f'noisy-{i}', order) for i in range(3)]
+    threads.append(queue_waiter(controller, 'quiet', 'quiet-0', order))
+
+    for expected in range(1, 5):
+        controller.release()
+        wait_until(lambda: len(order) == expected)
+
+    assert order == ['noisy-0', 'quiet-0', 'noisy-1', 'noisy-2']
+
+
+def test_weights_favour_heavier_association():
+    controller = FairAdmissionController(max_in_flight=1, max_queue=10, queue_timeout=5,
+                                         weights=parse_weights('gold:4'))
+    controller.acquire('other')
+    order = []
+
+    queue_waiter(controller, 'other', 'other-0', order)
+    queue_waiter(controller, 'other', 'other-1', order)
+    for i in range(3):
+        queue_waiter(controller, 'gold', f'gold-{i}', order)
+
+    for expected in range(1, 6):
+        controller.release()
+        wait_until(lambda: len(order) == expected)
+
+    assert order[:4] == ['gold-0', 'gold-1', 'gold-2', 'other-0']
+
+
+def test_queue_timeout_sheds_load():
+    controller = FairAdmissionController(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+    controller.acquire('1')
+
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('2')
+    assert controller.stats()['queued'] == 0
+    assert controller.stats()['timed_out'] == 1
+
+
+def test_ai_query_returns_429_when_saturated(app, client, auth_headers):
+    from app.services.ollama_service import get_ollama_service, reset_ollama_service
+
+    reset_ollama_service()
+    app.config.update(AI_MAX_IN_FLIGHT=1, AI_MAX_QUEUE=0, OLLAMA_BASE_URL='http://127.0.0.1:9')
+    service = get_ollama_service()
+    service.available_models = ['llama2']
+    service.admission.acquire('autre')
+
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Question'})
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests des requêtes IA groupées (/api/guidance/ai/batch)"""
+import threading
+import time
+
+import pytest
+
+from app import db
+from app.models.guidance import AIQuery
+from app.services.ai_batch import plan_batch
+from conftest import parse_sse
+
+
+def test_plan_batch_dedupes_identical_prompts():
+    items, mapping = plan_batch([
+        'Comment faire un budget ?',
+        {'query': 'comment faire un  budget ?'},
+        {'query': 'Comment faire un budget ?', 'context': {'currentPage': 'governance'}},
+        {'query': 'Qui convoque l\'assemblée ?'}
+    ], 'asso-1')
+
+    assert len(items) == 3
+    assert mapping == [0, 0, 1, 2]
+    assert items[0]['context'] == {'associationId': 'asso-1'}
+
+
+def test_plan_batch_rejects_missing_query():
+    with pytest.raises(ValueError):
+        plan_batch([{'context': {}}], 'asso-1')
+
+
+def test_batch_generates_each_prompt_once(client, auth_headers, ollama):
+    response = client.post('/api/guidance/ai/batch', headers=auth_headers, json={'queries': [
+        'Comment faire un budget ?',
+        'Comment faire un budget ?',
+        'Qui convoque l\'assemblée ?'
+    ]})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['unique_queries'] == 2 and data['deduplicated'] == 1
+    assert [result['response'] for result in data['results']] == ['Réponse de test'] * 3
+    assert data['results'][0]['id'] == data['results'][1]['id'] != data['results'][2]['id']
+    assert len([call for call in ollama.calls if call[1] == '/api/generate']) == 2
+    assert db.session.query(AIQuery).count() == 2
+
+
+def test_batch_runs_concurrently_within_admission_limit(app, client, auth_headers, ollama):
+    from app.services.ollama_service import get_ollama_service
+
+    app.config.update(AI_MAX_IN_FLIGHT=2, AI_MAX_QUEUE=8)
+    service = get_ollama_service()
+    original = service.generate_response
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+
+    def slow_generate(**kwargs):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.1)
+        with lock:
+            state['active'] -= 1
+        return original(**kwargs)
+
+    service.generate_response = slow_generate
+    started = time.monotonic()
+    response = client.post('/api/guidance/ai/batch', headers=auth_headers,
+                           json={'queries': [f'Question {i} ?' for i in range(4)]})
+
+    assert response.status_code == 200
+    assert state['peak'] == 2
+    assert time.monotonic() - started < 0.4 + 1.0
+    assert db.session.query(AIQuery).count() == 4
+
+
+def test_batch_stream_sends_results_then_ids(client, auth_headers, ollama):
+    response = client.post('/api/guidance/ai/batch', headers=auth_headers, json={
+        'stream': True,
+        'queries': ['Comment faire un budget ?', 'Comment faire un budget ?', 'Qui convoque l\'assemblée ?']
+    })
+
+    events = parse_sse(response.get_data(as_text=True))
+    results = [data for event, data in events if event == 'result']
+    assert len(results) == 2
+    assert sorted(index for result in results for index in result['indexes']) == [0, 1, 2]
+    event, done = events[-1]
+    assert event == 'done'
+    assert done['ids'][0] == done['ids'][1]
+    assert db.session.get(AIQuery, done['ids'][2]) is not None
+
+
+def test_batch_validation(app, client, auth_headers, ollama):
+    assert client.post('/api/guidance/ai/batch', headers=auth_headers, json={}).status_code == 400
+    assert client.post('/api/guidance/ai/batch', headers=auth_headers,
+                       json={'queries': [{'context': {}}]}).status_code == 400
+    app.config['AI_BATCH_MAX_QUERIES'] = 2
+    assert client.post('/api/guidance/ai/batch', headers=auth_headers,
+                       json={'queries': ['a', 'b', 'c']}).status_code == 400
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests du cache de réponses de l'assistant IA"""
+import time
+from types import SimpleNamespace
+
+from app.services.ai_cache import AIResponseCache, make_cache_key
+from app.services.ollama_service import OllamaService
+
+CONTEXT = {'maturityLevel': 2, 'currentPage': 'finance', 'userRole': 'tresorier'}
+RESULT = {'response': 'Réponse', 'suggestions': [], 'model_used': 'llama2'}
+
+
+def test_cache_key_normalizes_query():
+    """Casse, accents, espaces et ponctuation finale n'influencent pas la clé"""
+    assert make_cache_key('Comment préparer   le budget ?', CONTEXT) == \
+        make_cache_key('comment preparer le budget', CONTEXT)
+    assert make_cache_key('budget', CONTEXT) != \
+        make_cache_key('budget', dict(CONTEXT, maturityLevel=4))
+
+
+def test_cache_hit_and_counters():
+    cache = AIResponseCache()
+    assert cache.get('Question', CONTEXT) is None
+
+    cache.set('Question', CONTEXT, RESULT)
+    cached = cache.get('question ?', CONTEXT)
+
+    assert cached['response'] == 'Réponse'
+    assert cached['cached'] is True
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_cache_lru_eviction_and_ttl():
+    cache = AIResponseCache(max_entries=2, ttl=3600)
+    cache.set('a', CONTEXT, RESULT)
+    cache.set('b', CONTEXT, RESULT)
+    cache.get('a', CONTEXT)
+    cache.set('c', CONTEXT, RESULT)
+
+    assert cache.get('b', CONTEXT) is None
+    assert cache.get('a', CONTEXT) is not None
+    assert cache.stats()['evictions'] == 1
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get('a', CONTEXT) is None
+
+
+def test_fallback_not_cached():
+    cache = AIResponseCache()
+    cache.set('Question', CONTEXT, dict(RESULT, model_used='fallback'))
+    assert cache.get('Question', CONTEXT) is None
+
+
+def test_warm_up_from_records():
+    cache = AIResponseCache()
+    record = SimpleNamespace(query='Budget ?', context=CONTEXT, response='Stocké',
+                             suggestions=[], related_resources=[], follow_up_questions=[],
+                             confidence=0.8, model_used='mistral-french', created_at=None)
+
+    assert cache.warm_up([record]) == 1
+    cached = cache.get('budget', CONTEXT)
+    assert cached['response'] == 'Stocké'
+    assert cached['model_used'] == 'mistral-french'
+
+
+def test_service_skips_generation_on_hit(stub_ollama):
+    """Une question répétée ne repart pas vers Ollama"""
+    service = OllamaService(base_url=stub_ollama.url, refresh_on_init=False,
+                            cache=AIResponseCache())
+    service.available_models = ['llama2']
+
+    first = service.generate_response('Comment faire un budget ?', CONTEXT)
+    second = service.generate_response('comment faire un budget', CONTEXT)
+
+    generate_calls = [call for call in stub_ollama.calls if call[1] == '/api/generate']
+    assert len(generate_calls) == 1
+    assert second['response'] == first['response']
+    assert second['cached'] is True
+    service.close()
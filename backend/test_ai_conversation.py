@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Tests des fils de conversation de l'assistant IA"""
+import pytest
+
+from app import db
+from app.models.guidance import AIConversation, AIQuery
+from app.services.ai_conversation import WINDOW_TURNS, build_history
+from app.services.generation_budget import estimate_tokens
+from app.services.ollama_service import OllamaService
+
+
+@pytest.fixture
+def ollama(ollama):
+    ollama.answer = 'Réunissez le bureau. Puis votez le budget.'
+    return ollama
+
+
+def generate_payloads(stub):
+    return [call[2] for call in stub.calls if call[1] == '/api/generate']
+
+
+def ask(client, auth_headers, conversation_id, query):
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': query, 'conversation_id': conversation_id})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_follow_up_reuses_ollama_context(client, auth_headers, ollama):
+    conversation = client.post('/api/guidance/ai/conversations', headers=auth_headers, json={}).get_json()
+
+    first = ask(client, auth_headers, conversation['id'], 'Comment préparer notre budget ?')
+    second = ask(client, auth_headers, conversation['id'], 'Et pour les subventions ?')
+
+    assert first['conversation_id'] == conversation['id']
+    assert second['metrics']['conversation']['mode'] == 'context'
+    payloads = generate_payloads(ollama)
+    assert 'context' not in payloads[0]
+    assert payloads[1]['context'] == db.session.get(AIConversation, conversation['id']).ollama_context[:-1]
+    # La consigne système est déjà dans les tokens de contexte
+    assert payloads[1]['prompt'].startswith('QUESTION DE SUIVI: ')
+
+    detail = client.get(f"/api/guidance/ai/conversations/{conversation['id']}", headers=auth_headers).get_json()
+    assert detail['turn_count'] == 2
+    assert detail['title'] == 'Comment préparer notre budget ?'
+    assert [turn['query'] for turn in detail['turns']] == ['Comment préparer notre budget ?',
+                                                          'Et pour les subventions ?']
+
+
+def test_conversation_turns_bypass_cache(client, auth_headers, ollama):
+    client.post('/api/guidance/ai/query', headers=auth_headers, json={'query': 'Comment préparer notre budget ?'})
+    conversation = client.post('/api/guidance/ai/conversations', headers=auth_headers, json={}).get_json()
+
+    result = ask(client, auth_headers, conversation['id'], 'Comment préparer notre budget ?')
+
+    assert len(generate_payloads(ollama)) == 2
+    assert result['metrics']['conversation']['mode'] == 'history'
+
+
+def test_history_mode_when_model_changes(app, association, stub_ollama):
+    stub_ollama.models = ['llama2', 'mistral-french']
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, history_tokens=200)
+    state = {
+        'id': 'c1', 'model': 'mistral-french', 'ollama_context': [1, 2, 3],
+        'summary': '- Ancienne question → Ancienne réponse.',
+        'turns': [('Question précédente', 'Réponse précédente.')]
+    }
+
+    result = service.generate_response('Et ensuite ?', {'currentPage': 'dashboard'}, model='llama2',
+                                       conversation=state)
+
+    payload = generate_payloads(stub_ollama)[-1]
+    assert 'context' not in payload
+    assert 'Question précédente' in payload['prompt']
+    assert 'RÉSUMÉ DES ÉCHANGES PRÉCÉDENTS' in payload['prompt']
+    assert result['metrics']['conversation']['mode'] == 'history'
+    assert result['ollama_context']
+
+
+def test_history_stays_bounded_over_many_turns():
+    turns = [(f'Question {i} ' + 'détail ' * 40, 'Réponse. ' + 'mot ' * 400) for i in range(WINDOW_TURNS)]
+    state = {'summary': '- résumé ' * 500, 'turns': turns}
+
+    history = build_history(state, 300)
+
+    assert estimate_tokens(history) <= 300 + 20
+    assert 'Question 2' in history  # le tour le plus récent est conservé en priorité
+
+
+def test_old_turns_roll_into_summary(client, auth_headers, ollama, app):
+    conversation = client.post('/api/guidance/ai/conversations', headers=auth_headers,
+                               json={'title': 'Budget'}).get_json()
+    for i in range(WINDOW_TURNS + 2):
+        ask(client, auth_headers, conversation['id'], f'Question numéro {i} ?')
+
+    thread = db.session.get(AIConversation, conversation['id'])
+    assert thread.turn_count == WINDOW_TURNS + 2
+    assert 'Question numéro 0' in thread.summary
+    assert 'Question numéro 1' in thread.summary
+    assert 'Question numéro 2' not in thread.summary
+    assert db.session.query(AIQuery).filter_by(conversation_id=thread.id).count() == WINDOW_TURNS + 2
+
+
+def test_unknown_conversation_returns_404(client, auth_headers, ollama):
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Bonjour', 'conversation_id': 'inconnue'})
+    assert response.status_code == 404
+    assert client.get('/api/guidance/ai/conversations/inconnue', headers=auth_headers).status_code == 404
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests de l'API de l'assistant IA (/api/guidance/ai/*)"""
+import pytest
+
+from app import db
+from app.models.guidance import AIQuery
+from conftest import parse_sse
+
+
+@pytest.fixture
+def ollama(ollama):
+    ollama.answer = 'Commencez par un budget prévisionnel'
+    return ollama
+
+
+def test_ai_query_json(client, auth_headers, ollama):
+    """Le mode classique renvoie la réponse complète et l'enregistre"""
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Comment faire un budget ?'})
+
+    assert response.status_code == 200
+    assert response.get_json()['response'] == 'Commencez par un budget prévisionnel'
+    assert db.session.query(AIQuery).count() == 1
+
+
+def test_ai_query_stream_sse(client, auth_headers, ollama):
+    """Le mode flux relaie les tokens puis enregistre la requête"""
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Comment faire un budget ?', 'stream': True})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_sse(response.get_data(as_text=True))
+
+    tokens = [data['content'] for event, data in events if event == 'token']
+    assert len(tokens) == 5
+    event, done = events[-1]
+    assert event == 'done'
+    assert done['response'] == 'Commencez par un budget prévisionnel'
+    assert db.session.get(AIQuery, done['id']).response == done['response']
+
+
+def test_ai_query_stream_via_accept_header(client, auth_headers, ollama):
+    """L'en-tête Accept: text/event-stream active aussi le flux"""
+    headers = dict(auth_headers, Accept='text/event-stream')
+    response = client.post('/api/guidance/ai/query', headers=headers,
+                           json={'query': 'Question'})
+
+    assert response.mimetype == 'text/event-stream'
+    assert parse_sse(response.get_data(as_text=True))[-1][0] == 'done'
+
+
+def test_ai_query_async_job(client, auth_headers, ollama):
+    """Le mode asynchrone renvoie un identifiant puis le résultat au polling"""
+    from app.services.ai_jobs import get_ai_job_runner
+
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Comment faire un budget ?', 'async': True})
+
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    get_ai_job_runner().wait_idle(timeout=5)
+
+    job = client.get(f'/api/guidance/ai/jobs/{job_id}', headers=auth_headers).get_json()
+    assert job['status'] == 'completed'
+    assert job['result']['response'] == 'Commencez par un budget prévisionnel'
+
+
+def test_pending_jobs_recovered_after_restart(app, association, ollama):
+    """Une requête restée en attente est reprise par un nouveau runner"""
+    from app.models.guidance import AIJob, AIJobStatus
+    from app.services.ai_jobs import AIJobRunner, enqueue_ai_job
+
+    job = enqueue_ai_job(str(association.id), {'query': 'Question'}, {})
+    runner = AIJobRunner(app, max_workers=1)
+
+    assert runner.recover() == 1
+    runner.shutdown(wait=True)
+
+    db.session.expire_all()
+    assert db.session.get(AIJob, job.id).status == AIJobStatus.COMPLETED
+
+
+def test_job_claimed_only_once(app, association, ollama):
+    """Deux runners ne peuvent pas exécuter la même requête"""
+    from app.services.ai_jobs import AIJobRunner, enqueue_ai_job
+
+    job = enqueue_ai_job(str(association.id), {'query': 'Question'}, {})
+    runner = AIJobRunner(app, max_workers=1)
+
+    assert runner.run_job(job.id) is not None
+    assert runner.run_job(job.id) is None
+    runner.shutdown()
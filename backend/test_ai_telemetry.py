@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests de la télémétrie des générations Ollama"""
+import uuid
+
+from app import db
+from app.models.guidance import AIQuery
+from app.services.ai_telemetry import aggregate_model_stats, estimate_confidence, percentile, telemetry_summary
+
+
+def make_query(association_id, model, total_ms, eval_count=50, eval_ms=1000.0, load_ms=5.0):
+    return AIQuery(id=str(uuid.uuid4()), association_id=association_id, query='q', response='r',
+                   model_used=model, total_duration_ms=total_ms, load_duration_ms=load_ms,
+                   prompt_eval_count=100, eval_count=eval_count, eval_duration_ms=eval_ms, queue_wait_ms=0)
+
+
+def test_confidence_reflects_generation_outcome():
+    assert estimate_confidence('', {'done_reason': 'stop'}) == 0.0
+    assert estimate_confidence('Réponse', {'done_reason': 'length'}) < estimate_confidence('Réponse', {'done_reason': 'stop'})
+    grounded = {'done_reason': 'stop', 'grounding': {'snippets': 2}}
+    assert estimate_confidence('Réponse', grounded) > estimate_confidence('Réponse', {'done_reason': 'stop'})
+    # La longueur de la réponse n'intervient plus
+    assert estimate_confidence('a', {'done_reason': 'stop'}) == estimate_confidence('a' * 500, {'done_reason': 'stop'})
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
+
+
+def test_aggregate_tokens_per_second_and_cold_loads():
+    rows = [('llama2', 2000.0, 3000.0, 100, 50, 1000.0, 0), ('llama2', 1000.0, 10.0, 80, 150, 1000.0, 20)]
+    stats = aggregate_model_stats(rows)['llama2']
+    assert stats['tokens_per_second'] == 100.0
+    assert stats['cold_loads'] == 1
+    assert stats['latency_ms']['p99'] == 2000.0
+
+
+def test_query_persists_ollama_timings(client, auth_headers, ollama):
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Comment faire un budget ?'})
+    body = response.get_json()
+    assert body['confidence'] == 0.75
+
+    record = db.session.get(AIQuery, body['id'])
+    assert record.total_duration_ms == 2000.0
+    assert record.load_duration_ms == 100.0
+    assert record.prompt_eval_count == 120
+    assert record.eval_count == 50
+    assert record.eval_duration_ms == 1000.0
+    assert record.queue_wait_ms == 0
+    assert record.to_dict()['metrics']['tokens_per_second'] == 50.0
+
+    # Réponse servie par le cache : pas de mesures de la génération d'origine
+    cached = client.post('/api/guidance/ai/query', headers=auth_headers,
+                         json={'query': 'Comment faire un budget ?'}).get_json()
+    assert cached['metrics'] is None
+    assert db.session.get(AIQuery, cached['id']).total_duration_ms is None
+
+
+def test_telemetry_endpoint_per_model(client, auth_headers, association):
+    for total in range(100, 2100, 100):
+        db.session.add(make_query(association.id, 'llama2', float(total)))
+    db.session.add(make_query(association.id, 'mistral-french', 9000.0, eval_count=100, eval_ms=10000.0))
+    db.session.add(AIQuery(id='fb', association_id=association.id, query='q', response='r', model_used='fallback'))
+    db.session.commit()
+
+    data = client.get('/api/guidance/ai/telemetry', headers=auth_headers).get_json()
+
+    assert data['queries'] == 22 and data['generated'] == 21 and data['fallback'] == 1
+    llama = data['models']['llama2']
+    assert llama['queries'] == 20
+    assert llama['tokens_per_second'] == 50.0
+    assert llama['latency_ms']['p50'] == 1000.0
+    assert llama['latency_ms']['p95'] == 1900.0
+    assert data['models']['mistral-french']['tokens_per_second'] == 10.0
+
+
+def test_telemetry_endpoint_is_scoped_to_the_association(app, client, auth_headers, association):
+    from app.models.association import Association
+
+    other = Association(name='Autre', sigle='AU', email='autre@asso.com', phone='000', password_hash='x')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(make_query(association.id, 'llama2', 500.0))
+    for total in (700.0, 900.0):
+        db.session.add(make_query(other.id, 'mistral-french', total))
+    db.session.add(AIQuery(id='fb-other', association_id=other.id, query='q', response='r', model_used='fallback'))
+    db.session.commit()
+
+    # Le paramètre scope ne donne plus accès aux chiffres des autres associations
+    for query in ('', '?scope=global'):
+        data = client.get(f'/api/guidance/ai/telemetry{query}', headers=auth_headers).get_json()
+        assert (data['queries'], data['fallback']) == (1, 0)
+        assert list(data['models']) == ['llama2']
+
+    # Vue de toute l'instance réservée à la ligne de commande (flask ai-telemetry)
+    assert telemetry_summary(7)['queries'] == 4
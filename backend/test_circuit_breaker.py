@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests du disjoncteur protégeant les appels à Ollama"""
+import time
+
+from app.services.circuit_breaker import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker,
+                                          FileBreakerStore)
+from app.services.ollama_service import OllamaService
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure()
+
+
+def test_opens_on_failure_rate():
+    breaker = CircuitBreaker(min_calls=4, failure_rate_threshold=0.5)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.snapshot()['state'] == CLOSED
+
+    breaker.record_failure()
+    assert breaker.snapshot()['state'] == OPEN
+    assert breaker.allow_request() is False
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=3, slow_call_threshold=1.0, slow_rate_threshold=0.6)
+    for _ in range(3):
+        breaker.record_success(2.5)
+    assert breaker.snapshot()['state'] == OPEN
+
+
+def test_single_probe_after_cooldown():
+    breaker = CircuitBreaker(min_calls=2, cooldown=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+
+    assert breaker.allow_request() is True
+    assert breaker.snapshot()['state'] == HALF_OPEN
+    assert breaker.allow_request() is False  # une seule sonde
+
+    breaker.record_success(0.1)
+    assert breaker.snapshot()['state'] == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(min_calls=2, cooldown=0.05)
+    open_breaker(breaker)
+    time.sleep(0.06)
+    breaker.allow_request()
+
+    breaker.record_failure()
+    snapshot = breaker.snapshot()
+    assert snapshot['state'] == OPEN
+    assert snapshot['opened_count'] == 2
+
+
+def test_state_shared_through_file(tmp_path):
+    """Deux workers partageant le fichier voient le même état"""
+    path = str(tmp_path / 'breaker.json')
+    worker_a = CircuitBreaker(store=FileBreakerStore(path), min_calls=2)
+    worker_b = CircuitBreaker(store=FileBreakerStore(path), min_calls=2)
+
+    open_breaker(worker_a)
+
+    assert worker_b.is_open() is True
+    assert worker_b.allow_request() is False
+
+
+def test_open_circuit_serves_fallback_instantly(stub_ollama):
+    breaker = CircuitBreaker(min_calls=2, cooldown=60)
+    service = OllamaService(base_url=stub_ollama.url, refresh_on_init=False, breaker=breaker)
+    service.available_models = ['llama2']
+    open_breaker(breaker)
+
+    result = service.generate_response('Question', {})
+
+    assert result['model_used'] == 'fallback'
+    assert not [call for call in stub_ollama.calls if call[1] == '/api/generate']
+    service.close()
+
+
+def test_unreachable_ollama_trips_breaker():
+    breaker = CircuitBreaker(min_calls=2, cooldown=60)
+    service = OllamaService(base_url='http://127.0.0.1:9', refresh_on_init=False, breaker=breaker)
+    service.available_models = ['llama2']
+
+    service.generate_response('Question 1', {})
+    service.generate_response('Question 2', {})
+
+    assert breaker.snapshot()['state'] == OPEN
+    service.close()
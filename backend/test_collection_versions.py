@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Tests des versions de collections : ETag et réponses 304 des listes"""
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.models.collection_version import CollectionVersion
+from app.models.cotisation import Cotisation
+from app.models.member import Member
+from app.services.collection_versions import conditional_get, get_versions
+
+
+def member_payload(email):
+    return {'first_name': 'Awa', 'last_name': 'Ba', 'email': email, 'phone': '000', 'role': 'MEMBER'}
+
+
+def test_list_etag_and_not_modified(client, auth_headers):
+    first = client.get('/api/members/', headers=auth_headers)
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = client.get('/api/members/', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert cached.status_code == 304 and cached.headers['ETag'] == etag
+    assert cached.get_data() == b''
+
+    client.post('/api/members/', json=member_payload('awa@test.com'), headers=auth_headers)
+    changed = client.get('/api/members/', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert len(changed.get_json()) == 1
+
+
+def test_not_modified_skips_data_tables(client, auth_headers, sql_statements):
+    etag = client.get('/api/events/', headers=auth_headers).headers['ETag']
+    with sql_statements() as statements:
+        response = client.get('/api/events/', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 304
+    assert len(statements) == 1 and 'collection_versions' in statements[0]
+
+
+def test_writes_bump_only_their_collection(app, association):
+    member = Member(first_name='Awa', last_name='Ba', email='awa@test.com', phone='0', role='MEMBER',
+                    association_id=association.id)
+    db.session.add(member)
+    db.session.commit()
+    assert get_versions(db.session, association.id, ['members', 'cotisations']) == {'members': 1, 'cotisations': 0}
+
+    db.session.add(Cotisation(member_id=member.id, amount=1000, payment_date=datetime(2025, 1, 1), year=2025))
+    db.session.commit()
+    assert get_versions(db.session, association.id, ['members', 'cotisations']) == {'members': 1, 'cotisations': 1}
+
+    # Valeur réaffectée à l'identique : aucune écriture, aucune version incrémentée
+    member.last_name = member.last_name
+    db.session.commit()
+    assert get_versions(db.session, association.id, ['members'])['members'] == 1
+
+    # Suppression en cascade : membres et cotisations
+    db.session.delete(member)
+    db.session.commit()
+    assert get_versions(db.session, association.id, ['members', 'cotisations']) == {'members': 2, 'cotisations': 2}
+
+
+def test_rolled_back_write_keeps_version(app, association):
+    db.session.add(Member(first_name='A', last_name='B', email='a@test.com', phone='0', role='MEMBER',
+                          association_id=association.id))
+    db.session.flush()
+    db.session.rollback()
+    assert db.session.get(CollectionVersion, (association.id, 'members')) is None
+
+
+def test_finance_and_guidance_lists_are_versioned(client, auth_headers):
+    payload = {'description': 'Don', 'amount': 5000, 'type': 'INCOME', 'category': 'Dons',
+               'date': date(2025, 1, 15).isoformat()}
+    for url in ('/api/finances/', '/api/finances/stats', '/api/guidance/diagnostics',
+                '/api/guidance/ai/conversations'):
+        assert 'ETag' in client.get(url, headers=auth_headers).headers, url
+    etag = client.get('/api/finances/stats', headers=auth_headers).headers['ETag']
+    assert client.post('/api/finances/', json=payload, headers=auth_headers).status_code == 201
+    assert client.get('/api/finances/stats', headers=dict(auth_headers, **{'If-None-Match': etag})).status_code == 200
+
+
+def test_bulk_import_bumps_members(client, auth_headers, association):
+    import io
+    etag = client.get('/api/members/', headers=auth_headers).headers['ETag']
+    client.post('/api/members/import', headers=auth_headers, content_type='multipart/form-data',
+                data={'file': (io.BytesIO(b'first_name,last_name,email,phone\nA,B,a@test.com,1\n'), 'm.csv')})
+    assert client.get('/api/members/', headers=dict(auth_headers, **{'If-None-Match': etag})).status_code == 200
+
+
+def test_unknown_collection_rejected():
+    with pytest.raises(ValueError):
+        conditional_get('documents')
+
+
+def test_cotisation_stats_etag_changes_with_the_year(client, auth_headers, monkeypatch):
+    import app.routes.cotisations as cotisation_routes
+
+    class NewYear(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2027, 1, 1, 0, 5)
+
+    etag = client.get('/api/cotisations/stats', headers=auth_headers).headers['ETag']
+    monkeypatch.setattr(cotisation_routes, 'datetime', NewYear)
+    response = client.get('/api/cotisations/stats', headers=dict(auth_headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200 and response.headers['ETag'] != etag
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests du tableau de bord agrégé (/api/dashboard)"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.cotisation import Cotisation
+from app.models.event import Event
+from app.models.guidance import (MaturityLevel, OrganizationalDiagnostic, Recommendation, RecommendationPriority,
+                                 RecommendationStatus)
+from app.models.member import Member
+from app.models.transaction import Transaction, TransactionType
+from app.services.dashboard import dashboard_summary
+
+TODAY = date(2025, 6, 15)
+
+
+@pytest.fixture
+def data(app, association):
+    members = [Member(first_name=f'P{i}', last_name=f'N{i}', email=f'm{i}@test.com', phone='0',
+                      role='PRESIDENT' if i == 0 else 'MEMBER', status='INACTIVE' if i == 3 else 'ACTIVE',
+                      association_id=association.id) for i in range(4)]
+    db.session.add_all(members)
+    db.session.flush()
+    diagnostic = OrganizationalDiagnostic(
+        id='diag-1', association_id=str(association.id),
+        current_maturity_level=MaturityLevel.EMERGENT, target_maturity_level=MaturityLevel.STRUCTURE,
+        overall_score=0.4, category_scores={}, strengths=[], weaknesses=[],
+        next_assessment_date=datetime.utcnow() + timedelta(days=90))
+    db.session.add(diagnostic)
+    db.session.add_all([
+        Cotisation(member_id=members[0].id, amount=15000, payment_date=datetime(2025, 2, 1), status='PAID', year=2025),
+        Cotisation(member_id=members[1].id, amount=10000, payment_date=datetime(2025, 2, 1), status='PAID', year=2025),
+        Cotisation(member_id=members[2].id, amount=10000, payment_date=datetime(2025, 2, 1), status='PENDING',
+                   year=2025),
+        Cotisation(member_id=members[2].id, amount=9000, payment_date=datetime(2024, 2, 1), status='PAID', year=2024),
+        Event(title='Passé', start_date=datetime(2025, 1, 10), location='Dakar', association_id=association.id),
+        Event(title='AG', start_date=datetime(2025, 7, 1, 10), location='Thiès', association_id=association.id),
+        Event(title='Atelier', start_date=datetime(2025, 6, 15, 18), location='Dakar', association_id=association.id),
+        Transaction(association_id=association.id, description='Dons', amount=50000.0, type=TransactionType.INCOME,
+                    category='Dons', date=date(2025, 3, 1)),
+        Transaction(association_id=association.id, description='Location', amount=20000.0,
+                    type=TransactionType.EXPENSE, category='Salle', date=date(2025, 12, 31)),
+        Transaction(association_id=association.id, description='Report', amount=5000.0, type=TransactionType.INCOME,
+                    category='Divers', date=date(2024, 12, 31)),
+    ])
+    for i, status in enumerate([RecommendationStatus.PENDING, RecommendationStatus.IN_PROGRESS,
+                                RecommendationStatus.COMPLETED]):
+        db.session.add(Recommendation(id=f'r{i}', diagnostic_id='diag-1', priority=RecommendationPriority.HIGH,
+                                      category='finance', title=f'Reco {i}', description='...',
+                                      action_steps=[], status=status))
+    db.session.commit()
+    return members
+
+
+def test_summary_kpis(app, association, data):
+    summary = dashboard_summary(association.id, today=TODAY)
+    assert summary['members'] == {'total': 4, 'by_status': {'ACTIVE': 3, 'INACTIVE': 1},
+                                  'by_role': {'PRESIDENT': 1, 'MEMBER': 3}}
+    assert summary['events']['total'] == 3 and summary['events']['upcoming_count'] == 2
+    assert [e['title'] for e in summary['events']['upcoming']] == ['Atelier', 'AG']
+    assert summary['cotisations']['collected'] == 25000.0
+    assert summary['cotisations']['outstanding'] == 10000.0
+    assert summary['cotisations']['paying_members'] == 2
+    assert summary['cotisations']['collection_rate'] == round(2 / 3, 4)
+    assert summary['finances'] == {'balance': 35000.0, 'transactions_count': 3,
+                                   'year': {'income': 50000.0, 'expenses': 20000.0, 'net': 30000.0}}
+    assert summary['recommendations'] == {'open': 2, 'by_priority': {'high': 2}}
+
+
+def test_summary_uses_few_queries(app, association, data, sql_statements):
+    association_id = association.id
+    with sql_statements() as statements:
+        dashboard_summary(association_id, today=TODAY)
+    assert len(statements) == 6
+
+
+def test_empty_association(app, association):
+    summary = dashboard_summary(association.id)
+    assert summary['members']['total'] == 0
+    assert summary['cotisations']['collection_rate'] is None
+    assert summary['finances']['balance'] == 0.0
+    assert summary['recommendations']['open'] == 0
+
+
+def test_endpoint_is_cacheable(client, auth_headers, data):
+    response = client.get('/api/dashboard', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['members']['total'] == 4
+    etag = response.headers['ETag']
+    assert date.today().isoformat() in etag
+
+    headers = dict(auth_headers, **{'If-None-Match': etag})
+    assert client.get('/api/dashboard', headers=headers).status_code == 304
+
+    client.post('/api/events/', headers=auth_headers, json={
+        'title': 'Réunion', 'start_date': '2030-01-01T10:00:00', 'location': 'Dakar'})
+    assert client.get('/api/dashboard', headers=headers).status_code == 200
+
+
+def test_invalid_year(client, auth_headers):
+    assert client.get('/api/dashboard?year=12', headers=auth_headers).status_code == 400
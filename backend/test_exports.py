@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Tests des exports diffusés (/api/exports/<jeu>)"""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.models.association import Association
+from app.models.cotisation import Cotisation
+from app.models.event import Event
+from app.models.member import Member
+from app.models.transaction import Transaction, TransactionType
+from app.services import exports
+from app.services.exports import export_chunks
+
+
+@pytest.fixture
+def data(app, association):
+    members = [Member(first_name='Hélène', last_name='Lefèvre', email='helene@test.com', phone='000',
+                      role='PRESIDENT', status='ACTIVE', association_id=association.id),
+               Member(first_name='Awa', last_name='Ba', email='awa@test.com', phone='001',
+                      role='MEMBER', status='INACTIVE', association_id=association.id)]
+    other = Association(name='Autre', sigle='AU', email='autre@asso.com', phone='000', password_hash='x')
+    db.session.add_all(members + [other])
+    db.session.flush()
+    db.session.add_all([
+        Member(first_name='X', last_name='Y', email='x@autre.com', phone='0', role='MEMBER',
+               association_id=other.id),
+        Cotisation(member_id=members[0].id, amount=15000, payment_date=datetime(2025, 3, 1), status='PAID',
+                   year=2025),
+        Cotisation(member_id=members[1].id, amount=10000, payment_date=datetime(2024, 3, 1), status='PAID',
+                   year=2024),
+        Event(title='AG', start_date=datetime(2025, 6, 1, 10), location='Dakar', association_id=association.id),
+        Transaction(association_id=association.id, description='Don', amount=5000.0,
+                    type=TransactionType.INCOME, category='Dons', date=date(2025, 1, 15))
+    ])
+    db.session.commit()
+    return members
+
+
+def test_csv_export_is_scoped_and_streamed(client, auth_headers, data):
+    response = client.get('/api/exports/members', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.is_streamed
+    assert 'attachment; filename="members-' in response.headers['Content-Disposition']
+    text = response.get_data().decode('utf-8')
+    assert text.startswith('\ufeff')
+    rows = list(csv.DictReader(io.StringIO(text.lstrip('\ufeff'))))
+    assert [row['email'] for row in rows] == ['helene@test.com', 'awa@test.com']
+    assert rows[0]['firstName'] == 'Hélène'
+
+
+def test_ndjson_export_with_filters(client, auth_headers, data):
+    response = client.get('/api/exports/cotisations?format=ndjson&year=2025', headers=auth_headers)
+    lines = [json.loads(line) for line in response.get_data().decode('utf-8').splitlines()]
+    assert lines == [{
+        'id': lines[0]['id'], 'member_id': data[0].id, 'member_email': 'helene@test.com', 'amount': 15000.0,
+        'payment_date': '2025-03-01T00:00:00', 'payment_method': 'CASH', 'status': 'PAID', 'year': 2025,
+        'notes': None, 'created_at': lines[0]['created_at']
+    }]
+
+    transactions = client.get('/api/exports/transactions?format=ndjson&type=income', headers=auth_headers)
+    row = json.loads(transactions.get_data())
+    assert row['type'] == 'INCOME' and row['date'] == '2025-01-15'
+
+
+def test_xlsx_export(client, auth_headers, data):
+    from openpyxl import load_workbook
+
+    response = client.get('/api/exports/events?format=xlsx', headers=auth_headers)
+    assert response.status_code == 200
+    sheet = load_workbook(io.BytesIO(response.get_data()), read_only=True).worksheets[0]
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows[0][:2] == ('id', 'title')
+    assert rows[1][1] == 'AG' and len(rows) == 2
+
+
+@pytest.mark.parametrize('export_format', ['csv', 'xlsx', 'ndjson'])
+def test_formula_cells_are_escaped(client, auth_headers, association, export_format):
+    from openpyxl import load_workbook
+
+    db.session.add(Member(first_name='=HYPERLINK("http://x.test","Ouvrir")', last_name='@SUM(A1)',
+                          email='formule@test.com', phone='+221 77 000', association_id=association.id))
+    db.session.commit()
+    body = client.get(f'/api/exports/members?format={export_format}', headers=auth_headers).get_data()
+    if export_format == 'csv':
+        row = next(csv.DictReader(io.StringIO(body.decode('utf-8').lstrip('\ufeff'))))
+    elif export_format == 'xlsx':
+        rows = list(load_workbook(io.BytesIO(body)).worksheets[0].iter_rows(values_only=True))
+        row = dict(zip(rows[0], rows[1]))
+    else:
+        # NDJSON n'est pas ouvert par un tableur : valeurs inchangées
+        row = json.loads(body.decode('utf-8'))
+        assert (row['firstName'], row['phone']) == ('=HYPERLINK("http://x.test","Ouvrir")', '+221 77 000')
+        return
+    assert row['firstName'] == '\'=HYPERLINK("http://x.test","Ouvrir")'
+    assert (row['lastName'], row['phone'], row['email']) == ("'@SUM(A1)", "'+221 77 000", 'formule@test.com')
+
+
+@pytest.mark.parametrize('url, message', [
+    ('/api/exports/documents', 'Export inconnu'),
+    ('/api/exports/members?format=pdf', 'Format inconnu'),
+    ('/api/exports/cotisations?year=deux', 'Filtre year invalide'),
+    ('/api/exports/transactions?type=GIFT', 'Filtre type invalide'),
+])
+def test_invalid_requests(client, auth_headers, url, message):
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(message)
+
+
+def test_empty_csv_export_has_headers(client, auth_headers, association):
+    text = client.get('/api/exports/events', headers=auth_headers).get_data().decode('utf-8')
+    assert text.lstrip('\ufeff').startswith('id,title,description')
+
+
+def test_rows_are_read_in_batches_and_chunked(app, association, monkeypatch):
+    db.session.execute(Member.__table__.insert(), [
+        {'first_name': f'P{i}', 'last_name': f'N{i}', 'email': f'm{i}@test.com', 'phone': '0',
+         'role': 'MEMBER', 'status': 'ACTIVE', 'association_id': association.id} for i in range(500)
+    ])
+    db.session.commit()
+    monkeypatch.setattr(exports, 'EXPORT_CHUNK_BYTES', 1024)
+
+    chunks = list(export_chunks('members', 'csv', association.id, batch_size=50))
+    assert len(chunks) > 10
+    assert all(len(chunk) < 2048 for chunk in chunks)
+    lines = b''.join(chunks).decode('utf-8').splitlines()
+    assert len(lines) == 501
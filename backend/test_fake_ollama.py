@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests du faux serveur Ollama et du banc de charge de l'assistant IA"""
+import random
+
+import pytest
+import requests
+
+from benchmark_ai import build_queries, summarize
+from fake_ollama import FakeOllamaSettings, parse_latency, parse_models, start_fake_ollama
+from app.services.ollama_service import OllamaService
+
+
+@pytest.fixture
+def fake_ollama():
+    servers = []
+
+    def start(**options):
+        server = start_fake_ollama(FakeOllamaSettings(seed=42, latency='fixed:0', **options))
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_latency_distributions():
+    rng = random.Random(1)
+    assert parse_latency('fixed:0.2')(rng) == 0.2
+    assert 0.1 <= parse_latency('uniform:0.1,0.5')(rng) <= 0.5
+    assert parse_latency('normal:-5,0.1')(rng) == 0.0  # jamais négatif
+    with pytest.raises(ValueError):
+        parse_latency('pareto:1')
+    with pytest.raises(IndexError):
+        parse_latency('uniform:0.1')
+    assert parse_models('llama2=40,mistral-french', 20.0) == {'llama2': 40.0, 'mistral-french': 20.0}
+
+
+def test_service_against_fake_ollama(fake_ollama):
+    server = fake_ollama(models={'llama2': 2000.0}, response_tokens=20)
+    service = OllamaService(server.url, refresh_on_init=False)
+    assert service.check_ollama_status()
+    assert service.available_models == ['llama2:latest']
+
+    result = service.generate_response('Comment faire un budget ?', {'currentPage': 'finances'})
+    assert result['model_used'] == 'llama2:latest'
+    assert result['metrics']['eval_count'] == len(result['response'].split())
+    assert result['metrics']['tokens_per_second'] == pytest.approx(2000.0, rel=0.05)
+
+    events = list(service.stream_response('Qui convoque l\'assemblée ?', {'currentPage': 'finances'}))
+    assert events[-1]['type'] == 'done'
+    assert len(events) > 2 and not events[-1]['result'].get('incomplete')
+
+
+def test_seeded_runs_are_reproducible(fake_ollama):
+    responses = []
+    for _ in range(2):
+        server = fake_ollama(models={'llama2': 5000.0})
+        payload = {'model': 'llama2', 'prompt': 'Bonjour', 'stream': False}
+        responses.append(requests.post(f'{server.url}/api/generate', json=payload).json()['response'])
+    assert responses[0] == responses[1]
+
+
+def test_empty_prompt_only_loads_the_model(fake_ollama):
+    server = fake_ollama(models={'llama2': 5.0}, cold_load=0.2, response_tokens=200)
+    payload = {'model': 'llama2', 'prompt': '', 'stream': False}
+    cold = requests.post(f'{server.url}/api/generate', json=payload, timeout=2).json()
+    assert cold['done'] and cold['response'] == ''
+    assert cold['load_duration'] == cold['total_duration'] == int(0.2 * 1e9)
+    assert cold['prompt_eval_count'] == cold['eval_count'] == 0
+
+    # Modèle déjà chargé : aucune durée, y compris en flux
+    warm = requests.post(f'{server.url}/api/generate', json={**payload, 'stream': True}, timeout=2).json()
+    assert warm['load_duration'] == 0 and warm['eval_count'] == 0
+    generated = requests.post(f'{server.url}/api/generate',
+                              json={**payload, 'prompt': 'x', 'options': {'num_predict': 1}}).json()
+    assert generated['load_duration'] == 0
+
+
+def test_errors_and_hangs(fake_ollama):
+    failing = fake_ollama(error_rate=1.0)
+    assert requests.post(f'{failing.url}/api/generate', json={'model': 'llama2', 'prompt': 'x'}).status_code == 500
+
+    hanging = fake_ollama(hang_rate=1.0, hang_seconds=2)
+    with pytest.raises(requests.Timeout):
+        requests.post(f'{hanging.url}/api/generate', json={'model': 'llama2', 'prompt': 'x'}, timeout=0.3)
+
+    embedding = requests.post(f'{failing.url}/api/embeddings', json={'prompt': 'budget annuel'}).json()['embedding']
+    assert len(embedding) == 64 and sum(embedding) == 2.0
+
+
+def test_benchmark_summary():
+    results = [{'status': 200, 'latency': i / 1000, 'first_token': None, 'model_used': 'llama2'}
+               for i in range(1, 101)]
+    results.append({'status': 'ReadTimeout', 'latency': 120.0, 'first_token': None, 'model_used': None})
+
+    summary = summarize(results, elapsed=10.0)
+
+    assert summary['throughput_rps'] == 10.0
+    assert summary['latency_ms'] == {'p50': 50.0, 'p95': 95.0, 'p99': 99.0}
+    assert summary['statuses'] == {'200': 100, 'ReadTimeout': 1}
+    assert len(set(build_queries(10, 1.0))) == 10
+    assert len(set(build_queries(12, 0))) == 6
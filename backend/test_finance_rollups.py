@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Tests des cumuls mensuels des finances (finance_monthly_rollups)"""
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models.transaction import FinanceMonthlyRollup, Transaction, TransactionType
+from app.services.finance_rollups import rebuild_rollups
+
+
+def rollups():
+    """Contenu de la table : {(association, année, mois, type, catégorie): (total, nombre)}"""
+    db.session.expire_all()
+    return {(r.association_id, r.year, r.month, r.type, r.category): (r.total, r.count)
+            for r in FinanceMonthlyRollup.query.all()}
+
+
+def rebuilt():
+    """Cumuls recalculés depuis les transactions"""
+    current = rollups()
+    rebuild_rollups(db.session)
+    expected = rollups()
+    return current, expected
+
+
+def add(association_id, amount, day, transaction_type=TransactionType.INCOME, category='Dons'):
+    transaction = Transaction(association_id=association_id, description='Opération', amount=amount,
+                              type=transaction_type, category=category, date=day)
+    db.session.add(transaction)
+    db.session.commit()
+    return transaction
+
+
+def test_create_update_delete_keep_rollups_consistent(app, association):
+    association_id = association.id
+    first = add(association_id, 100.0, date(2025, 3, 2))
+    second = add(association_id, 50.0, date(2025, 3, 20))
+    add(association_id, 30.0, date(2025, 3, 5), TransactionType.EXPENSE, 'Salle')
+    assert rollups() == {
+        (association_id, 2025, 3, TransactionType.INCOME, 'Dons'): (150.0, 2),
+        (association_id, 2025, 3, TransactionType.EXPENSE, 'Salle'): (30.0, 1)
+    }
+
+    first.amount = 120.0
+    db.session.commit()
+    assert rollups()[(association_id, 2025, 3, TransactionType.INCOME, 'Dons')] == (170.0, 2)
+
+    # Changement de mois, de catégorie et de type : retrait de l'ancienne ligne, ajout à la nouvelle
+    second.date = date(2025, 4, 1)
+    second.category = 'Cotisations'
+    second.type = TransactionType.EXPENSE
+    db.session.commit()
+    assert rollups()[(association_id, 2025, 3, TransactionType.INCOME, 'Dons')] == (120.0, 1)
+    assert rollups()[(association_id, 2025, 4, TransactionType.EXPENSE, 'Cotisations')] == (50.0, 1)
+
+    # Modification sans effet sur les cumuls
+    first.description = 'Renommée'
+    db.session.commit()
+
+    db.session.delete(first)
+    db.session.commit()
+    current, expected = rebuilt()
+    assert current == expected
+    assert (association_id, 2025, 3, TransactionType.INCOME, 'Dons') not in current
+
+
+def test_update_of_unloaded_attribute_reads_previous_values(app, association):
+    association_id = association.id
+    transaction = add(association_id, 100.0, date(2025, 1, 10))
+    transaction_id = transaction.id
+    db.session.expire_all()
+    # Attributs expirés : l'ancienne valeur n'est connue que de la base
+    transaction = db.session.get(Transaction, transaction_id)
+    db.session.expire(transaction, ['amount', 'date'])
+    transaction.amount = 40.0
+    transaction.date = date(2025, 2, 10)
+    db.session.commit()
+    assert rollups() == {(association_id, 2025, 2, TransactionType.INCOME, 'Dons'): (40.0, 1)}
+
+
+def test_rollback_leaves_rollups_unchanged(app, association):
+    association_id = association.id
+    add(association_id, 100.0, date(2025, 5, 1))
+    before = rollups()
+
+    db.session.add(Transaction(association_id=association_id, description='Annulée', amount=75.0,
+                               type=TransactionType.INCOME, category='Dons', date=date(2025, 5, 2)))
+    db.session.flush()
+    db.session.rollback()
+    assert rollups() == before
+
+
+def test_routes_maintain_rollups(client, auth_headers, association):
+    association_id = association.id
+    response = client.post('/api/finances/', headers=auth_headers, json={
+        'description': 'Subvention', 'amount': 500, 'type': 'INCOME', 'category': 'Subventions',
+        'date': '2025-06-10'
+    })
+    assert response.status_code == 201
+    transaction_id = response.get_json()['id']
+    client.put(f'/api/finances/{transaction_id}', headers=auth_headers, json={'amount': 650})
+    assert rollups() == {(association_id, 2025, 6, TransactionType.INCOME, 'Subventions'): (650.0, 1)}
+
+    client.delete(f'/api/finances/{transaction_id}', headers=auth_headers)
+    assert rollups() == {}
+
+
+def test_rebuild_restores_rollups_after_core_writes(app, association):
+    association_id = association.id
+    add(association_id, 100.0, date(2024, 12, 31))
+    # Écriture hors ORM : les cumuls ne sont pas tenus à jour
+    db.session.execute(Transaction.__table__.insert().values(
+        association_id=association_id, description='Import', amount=25.0, type=TransactionType.INCOME,
+        category='Dons', date=date(2024, 12, 1)))
+    db.session.commit()
+    assert rollups()[(association_id, 2024, 12, TransactionType.INCOME, 'Dons')] == (100.0, 1)
+
+    assert rebuild_rollups(db.session, [association_id]) == 1
+    assert rollups()[(association_id, 2024, 12, TransactionType.INCOME, 'Dons')] == (125.0, 2)
+
+
+def test_timeseries_endpoint(client, auth_headers, association):
+    association_id = association.id
+    add(association_id, 100.0, date(2025, 1, 15))
+    add(association_id, 40.0, date(2025, 3, 3), TransactionType.EXPENSE, 'Salle')
+    add(association_id, 10.0, date(2025, 3, 9), TransactionType.EXPENSE, 'Matériel')
+
+    response = client.get('/api/finances/timeseries?from=2024-12&to=2025-03', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    data = response.get_json()
+    assert (data['from'], data['to']) == ('2024-12', '2025-03')
+    assert [point['month'] for point in data['series']] == ['2024-12', '2025-01', '2025-02', '2025-03']
+    assert data['series'][0] == {'month': '2024-12', 'income': 0, 'expenses': 0, 'net': 0, 'count': 0}
+    assert data['series'][1]['net'] == 100.0
+    assert data['series'][3] == {'month': '2025-03', 'income': 0, 'expenses': 50.0, 'net': -50.0, 'count': 2}
+
+    data = client.get('/api/finances/timeseries?from=2025-01&to=2025-03&category=Salle',
+                      headers=auth_headers).get_json()
+    assert [point['expenses'] for point in data['series']] == [0, 0, 40.0]
+
+    # Par défaut : les douze derniers mois
+    data = client.get('/api/finances/timeseries', headers=auth_headers).get_json()
+    assert len(data['series']) == 12
+    assert data['to'] == date.today().strftime('%Y-%m')
+
+
+@pytest.mark.parametrize('query', ['from=2025-13', 'from=2025', 'from=abc', 'from=2025-05&to=2025-01',
+                                   'from=2000-01&to=2025-01'])
+def test_timeseries_validation(client, auth_headers, query):
+    response = client.get(f'/api/finances/timeseries?{query}', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_timeseries_etag_changes_with_the_current_month(client, auth_headers, association, monkeypatch):
+    import app.routes.finances as finances_routes
+
+    class October(date):
+        @classmethod
+        def today(cls):
+            return date(2026, 10, 31)
+
+    class November(date):
+        @classmethod
+        def today(cls):
+            return date(2026, 11, 1)
+
+    monkeypatch.setattr(finances_routes, 'date', October)
+    response = client.get('/api/finances/timeseries', headers=auth_headers)
+    assert response.get_json()['to'] == '2026-10'
+    etag = response.headers['ETag']
+
+    monkeypatch.setattr(finances_routes, 'date', November)
+    response = client.get('/api/finances/timeseries', headers={**auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['to'] == '2026-11'
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Tests des statistiques financières agrégées en SQL (/api/finances/stats)"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models.transaction import Transaction, TransactionType
+from app.services.finance_stats import finance_stats, period_bounds
+
+CATEGORIES = ('Cotisations', 'Dons', 'Salle', 'Matériel')
+
+
+@pytest.fixture
+def transactions(app, association):
+    rng = random.Random(7)
+    rows = [Transaction(association_id=association.id, description=f'Opération {i}',
+                        amount=float(rng.randint(1, 500) * 100),
+                        type=rng.choice(list(TransactionType)), category=rng.choice(CATEGORIES),
+                        date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 730)))
+            for i in range(300)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def expected_stats(rows, year=None, month=None):
+    """Ancien calcul en Python, sur les transactions chargées"""
+    rows = [t for t in rows if (year is None or t.date.year == year) and (month is None or t.date.month == month)]
+    categories = {}
+    for t in rows:
+        stats = categories.setdefault(t.category, {'income': 0, 'expenses': 0, 'count': 0})
+        stats['income' if t.type == TransactionType.INCOME else 'expenses'] += t.amount
+        stats['count'] += 1
+    income = sum(t.amount for t in rows if t.type == TransactionType.INCOME)
+    expenses = sum(t.amount for t in rows if t.type == TransactionType.EXPENSE)
+    return income, expenses, len(rows), categories
+
+
+@pytest.mark.parametrize('year, month', [(None, None), (2024, None), (2025, 12), (2024, 2), (None, 3)])
+def test_matches_python_aggregation(association, transactions, year, month):
+    income, expenses, count, categories = expected_stats(transactions, year, month)
+    stats = finance_stats(association.id, year, month)
+    assert stats['total_income'] == pytest.approx(income)
+    assert stats['total_expenses'] == pytest.approx(expenses)
+    assert stats['balance'] == pytest.approx(income - expenses)
+    assert stats['transactions_count'] == count
+    assert stats['categories_stats'] == categories
+    assert len(stats['recent_transactions']) == 5
+
+
+def test_period_bounds():
+    assert period_bounds(2024, None) == (date(2024, 1, 1), date(2025, 1, 1))
+    assert period_bounds(2024, 12) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert period_bounds(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert period_bounds(None, 5) is None
+    with pytest.raises(ValueError):
+        period_bounds(2024, 13)
+
+
+def test_totals_are_read_from_monthly_rollups(app, association, transactions, sql_statements):
+    association_id = association.id
+    with sql_statements() as statements:
+        finance_stats(association_id, 2024, 6)
+    aggregate = next(s for s in statements if 'GROUP BY' in s)
+    assert 'FROM finance_monthly_rollups' in aggregate
+    assert 'FROM transactions' not in aggregate
+    # Seule la liste des transactions récentes lit la table des transactions
+    assert sum('FROM transactions' in s for s in statements) == 1
+
+
+def test_endpoint_validation(client, auth_headers, transactions):
+    assert client.get('/api/finances/stats?year=2024&month=13', headers=auth_headers).status_code == 400
+    assert client.get('/api/finances/stats?year=abc', headers=auth_headers).status_code == 400
+    data = client.get('/api/finances/stats?year=2024', headers=auth_headers).get_json()
+    assert data['transactions_count'] == expected_stats(transactions, 2024)[2]
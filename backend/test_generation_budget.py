@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests des budgets de génération de l'assistant IA"""
+from app.services.generation_budget import (DEFAULT_BUDGET, estimate_tokens, extract_metrics,
+                                            fit_prompt, get_budget, parse_budget_profiles)
+from app.services.ollama_service import OllamaService
+
+
+def test_budget_selected_by_page():
+    assert get_budget({'currentPage': '/guidance/diagnostic'})['num_predict'] == 500
+    assert get_budget({'currentPage': 'members'}) == DEFAULT_BUDGET
+
+
+def test_budget_profiles_overridable():
+    profiles = parse_budget_profiles('{"dashboard": {"num_predict": 120}, "events": {"num_ctx": 1024}}')
+    assert get_budget({'currentPage': 'dashboard'}, profiles)['num_predict'] == 120
+    assert get_budget({'currentPage': 'events'}, profiles)['num_ctx'] == 1024
+
+
+def test_prompt_trimmed_to_budget():
+    budget = dict(DEFAULT_BUDGET, prompt_tokens=300)
+    prompt = fit_prompt('Consigne. ', 'mot ' * 5000, budget)
+    assert estimate_tokens(prompt) <= 300
+
+
+def test_extract_metrics():
+    metrics = extract_metrics({'eval_count': 100, 'eval_duration': 2_000_000_000,
+                               'total_duration': 3_500_000_000})
+    assert metrics['tokens_per_second'] == 50.0
+    assert metrics['total_duration_ms'] == 3500.0
+
+
+def test_payload_uses_real_ollama_options(stub_ollama):
+    service = OllamaService(base_url=stub_ollama.url, refresh_on_init=False, keep_alive='30m')
+    service.available_models = ['llama2']
+
+    result = service.generate_response('Comment faire un budget ?', {'currentPage': 'finance'})
+
+    payload = [call[2] for call in stub_ollama.calls if call[1] == '/api/generate'][0]
+    assert 'max_tokens' not in payload['options']
+    assert payload['options']['num_predict'] == 400
+    assert payload['options']['num_ctx'] == 2048
+    assert payload['keep_alive'] == '30m'
+    assert result['metrics']['eval_count'] == 50
+    assert result['metrics']['tokens_per_second'] == 50.0
+    service.close()
+
+
+def test_stream_reports_final_metrics(stub_ollama):
+    service = OllamaService(base_url=stub_ollama.url, refresh_on_init=False)
+    service.available_models = ['llama2']
+
+    events = list(service.stream_response('Question', {}))
+
+    assert events[-1]['result']['metrics']['eval_count'] == 50
+    service.close()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Tests de l'index BM25 des ressources de l'assistant IA"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.guidance import (DocumentTemplate, MaturityLevel, OrganizationalDiagnostic,
+                                 Recommendation, RecommendationPriority)
+from app.services.guidance_index import (BM25Index, GuidanceIndexStore, format_snippets,
+                                         get_guidance_index_store, search_guidance, tokenize)
+
+
+def make_template(template_id, name, content):
+    return DocumentTemplate(id=template_id, name=name, category='statuts', template_content=content,
+                            maturity_level=MaturityLevel.EMERGENT)
+
+
+@pytest.fixture
+def diagnostic(app, association):
+    diagnostic = OrganizationalDiagnostic(
+        id='diag-1', association_id=association.id,
+        current_maturity_level=MaturityLevel.EMERGENT, target_maturity_level=MaturityLevel.STRUCTURE,
+        overall_score=0.4, category_scores={}, strengths=[], weaknesses=[],
+        next_assessment_date=datetime.utcnow() + timedelta(days=90)
+    )
+    db.session.add(diagnostic)
+    db.session.commit()
+    return diagnostic
+
+
+def test_tokenize_normalizes_french_text():
+    assert tokenize("Les Assemblées générales de l'association") == ['assemblee', 'generale', 'association']
+
+
+def test_bm25_ranks_relevant_passage_first():
+    index = BM25Index()
+    index.add_document('template', 't1', None, 'Procès-verbal', "Modèle de procès-verbal d'assemblée générale")
+    index.add_document('template', 't2', None, 'Budget', 'Budget prévisionnel annuel, recettes et dépenses')
+    index.add_document('template', 't3', None, 'Statuts', 'Statuts types : objet, siège, membres')
+
+    results = index.search('Comment établir notre budget prévisionnel ?')
+
+    assert results[0]['source_id'] == 't2'
+    assert len(results) == 1
+
+
+def test_association_documents_are_private():
+    index = BM25Index()
+    index.add_document('recommendation', 'r1', 'asso-1', 'Budget', 'Mettre en place un budget')
+
+    assert index.search('budget', 'asso-1')
+    assert index.search('budget', 'asso-2') == []
+
+
+def test_reindex_and_remove_document():
+    index = BM25Index()
+    index.add_document('template', 't1', None, 'Budget', 'budget ' * 200)
+    assert len(index) == 4  # découpé en passages
+    index.add_document('template', 't1', None, 'Statuts', 'statuts')
+    assert index.search('budget') == []
+    index.remove_document('template', 't1')
+    assert len(index) == 0 and not index.postings
+
+
+def test_format_snippets_respects_token_budget():
+    snippets = [{'source': 'template', 'title': f'Titre {i}', 'text': 'mot ' * 50} for i in range(5)]
+    text, count = format_snippets(snippets, max_tokens=120)
+    assert 0 < count < 5
+    assert len(text) // 4 <= 120 + 20
+
+
+def test_index_updated_on_commit(app, diagnostic):
+    assert search_guidance('budget', diagnostic.association_id)[0] == []
+
+    db.session.add(make_template('t1', 'Budget prévisionnel', 'Tableau du budget prévisionnel'))
+    db.session.add(Recommendation(id='r1', diagnostic_id=diagnostic.id, priority=RecommendationPriority.HIGH,
+                                  category='finance', title='Adopter un budget',
+                                  description='Voter le budget en assemblée', action_steps=['Préparer']))
+    db.session.commit()
+
+    results, search_ms = search_guidance('budget', diagnostic.association_id)
+    assert {r['source_id'] for r in results} == {'t1', 'r1'}
+    assert search_ms < 100
+    assert [r['source_id'] for r in search_guidance('budget', 'autre')[0]] == ['t1']
+
+    db.session.delete(db.session.get(DocumentTemplate, 't1'))
+    db.session.commit()
+    assert [r['source_id'] for r in search_guidance('budget', diagnostic.association_id)[0]] == ['r1']
+
+
+def test_rolled_back_changes_are_not_indexed(app):
+    search_guidance('budget', None)
+    db.session.add(make_template('t1', 'Budget', 'budget'))
+    db.session.flush()
+    db.session.rollback()
+
+    assert search_guidance('budget', None)[0] == []
+
+
+def test_file_store_is_shared_between_workers(app, tmp_path):
+    path = str(tmp_path / 'index.json')
+    db.session.add(make_template('t1', 'Budget', 'budget annuel'))
+    db.session.commit()
+
+    first, second = GuidanceIndexStore(path), GuidanceIndexStore(path)
+    first.rebuild(db.session)
+    assert len(second.get()) == 1
+
+    first.apply([('upsert', ('template', 't2', None, 'Statuts', 'statuts types'))])
+    assert second.get().search('statuts')[0]['source_id'] == 't2'
+
+
+def test_file_writes_are_batched_and_merged(app, tmp_path):
+    path = str(tmp_path / 'index.json')
+    db.session.add(make_template('t1', 'Budget', 'budget annuel'))
+    db.session.commit()
+    first, second = GuidanceIndexStore(path, persist_delay=60), GuidanceIndexStore(path)
+    first.rebuild(db.session)
+    written = os.stat(path).st_mtime_ns
+
+    first.apply([('upsert', ('template', 't2', None, 'Statuts', 'statuts types'))])
+    first.apply([('upsert', ('template', 't3', None, 'Bureau', 'élection du bureau'))])
+    # Visible tout de suite dans ce worker, pas encore écrit
+    assert first.get().search('bureau')[0]['source_id'] == 't3'
+    assert os.stat(path).st_mtime_ns == written
+
+    # Écriture d'un autre worker entre-temps : fusionnée, pas écrasée
+    second.get()
+    second.apply([('upsert', ('template', 't4', None, 'Rapport', 'rapport moral'))])
+    assert first.get().search('statuts')[0]['source_id'] == 't2'
+    first.flush()
+    index = GuidanceIndexStore(path).get()
+    assert {index.search(term)[0]['source_id'] for term in ('statuts', 'bureau', 'rapport')} == {'t2', 't3', 't4'}
+    assert sorted(os.listdir(tmp_path)) == ['index.json', 'index.json.lock']
+
+
+def test_prompt_includes_snippets_within_budget(app, association, stub_ollama):
+    from app.services.ollama_service import OllamaService
+
+    db.session.add(make_template('t1', 'Convocation', "Convocation à l'assemblée générale ordinaire"))
+    db.session.commit()
+    get_guidance_index_store().rebuild(db.session)
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, retrieval_k=3)
+    service.available_models = ['llama2']
+
+    result = service.generate_response("Comment convoquer l'assemblée générale ?",
+                                       {'associationId': association.id})
+
+    prompt = stub_ollama.calls[-1][2]['prompt']
+    assert 'Convocation' in prompt
+    assert prompt.index('RESSOURCES') < prompt.index("QUESTION DE L'UTILISATEUR")
+    metrics = result['metrics']
+    assert metrics['grounding']['snippets'] == 1
+    assert metrics['prompt_tokens_without_grounding'] < metrics['prompt_tokens_estimate']
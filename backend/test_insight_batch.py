@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Tests du calcul nocturne des SmartInsights"""
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import bcrypt, db
+from app.models.association import Association
+from app.models.cotisation import Cotisation
+from app.models.guidance import InsightBatchRun, MaturityLevel, OrganizationalDiagnostic, SmartInsight
+from app.models.member import Member
+from app.models.transaction import Transaction, TransactionType
+from app.services.insight_batch import collect_stats, compute_insights, run_insight_batch
+
+PASSWORD = bcrypt.generate_password_hash('test123').decode('utf-8')
+
+
+def make_association(index, with_diagnostic=True):
+    association = Association(name=f'Association {index}', email=f'asso{index}@test.com',
+                              phone='+221 000 000 000', password_hash=PASSWORD)
+    db.session.add(association)
+    db.session.flush()
+    if with_diagnostic:
+        db.session.add(OrganizationalDiagnostic(
+            id=str(uuid.uuid4()), association_id=str(association.id),
+            current_maturity_level=MaturityLevel.EMERGENT, target_maturity_level=MaturityLevel.STRUCTURE,
+            overall_score=0.4, category_scores={}, strengths=[], weaknesses=[],
+            next_assessment_date=datetime.utcnow() + timedelta(days=90)))
+    return association
+
+
+def add_member(association, index, status='ACTIVE', role='MEMBER', joined_days_ago=400):
+    member = Member(first_name='Membre', last_name=str(index), email=f'm{association.id}-{index}@test.com',
+                    phone='000', role=role, status=status, association_id=association.id,
+                    join_date=datetime.utcnow() - timedelta(days=joined_days_ago))
+    db.session.add(member)
+    db.session.flush()
+    return member
+
+
+@pytest.fixture
+def associations(app):
+    result = []
+    for index in range(5):
+        association = make_association(index, with_diagnostic=index != 4)
+        for m in range(10):
+            member = add_member(association, m, status='ACTIVE' if m < 4 else 'INACTIVE',
+                                role='PRESIDENT' if m == 0 else 'MEMBER')
+            if m < 1:
+                db.session.add(Cotisation(member_id=member.id, amount=5000, payment_date=datetime.utcnow(),
+                                          status='PAID', year=date.today().year))
+        db.session.add(Transaction(association_id=association.id, description='Location', amount=900.0,
+                                   type=TransactionType.EXPENSE, category='frais', date=date.today()))
+        result.append(association)
+    db.session.commit()
+    return result
+
+
+def test_collect_stats_aggregates_per_association(associations):
+    stats = collect_stats([a.id for a in associations], date.today())[associations[0].id]
+
+    assert stats['members'] == 10 and stats['active_members'] == 4
+    assert stats['paying_members'] == 1
+    assert stats['missing_roles'] == ['SECRETARY', 'TREASURER']
+    assert stats['expense_12m'] == 900.0 and stats['days_since_transaction'] == 0
+
+
+def test_compute_insights_rules():
+    titles = {i['title'] for i in compute_insights({
+        'members': 10, 'active_members': 4, 'new_members_90d': 0, 'missing_roles': ['TREASURER'],
+        'paying_members': 1, 'overdue_cotisations': 2, 'pending_cotisations': 0, 'upcoming_events': 0,
+        'recent_events': 0, 'income_12m': 100.0, 'expense_12m': 900.0, 'days_since_transaction': 3
+    })}
+    assert titles == {"Engagement des membres en baisse", "Aucune nouvelle adhésion depuis trois mois",
+                      "Bureau incomplet", "Taux de cotisation faible", "Cotisations en retard à relancer",
+                      "Aucun événement planifié", "Dépenses supérieures aux recettes"}
+
+
+def test_batch_inserts_insights_and_is_idempotent(associations):
+    run = run_insight_batch(workers=0, chunk_size=2)
+
+    assert run.status == 'completed'
+    assert run.processed == 5 and run.skipped == 1
+    first_count = db.session.query(SmartInsight).filter_by(source='nightly').count()
+    assert first_count == run.insights_created > 0
+
+    # Un insight ignoré n'est pas recréé ; les autres sont remplacés, pas dupliqués
+    insight = db.session.query(SmartInsight).filter_by(title='Bureau incomplet').first()
+    insight.dismissed = True
+    db.session.commit()
+    run_insight_batch(workers=0, chunk_size=2)
+    assert db.session.query(SmartInsight).filter_by(source='nightly').count() == first_count
+    assert db.session.query(SmartInsight).filter_by(diagnostic_id=insight.diagnostic_id,
+                                                    title='Bureau incomplet').count() == 1
+
+
+def test_batch_resumes_from_checkpoint(associations):
+    def interrupt(run):
+        if run.processed >= 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_insight_batch(workers=0, chunk_size=2, progress=interrupt)
+
+    interrupted = db.session.query(InsightBatchRun).one()
+    assert interrupted.status == 'running'
+    assert interrupted.last_association_id == associations[1].id
+
+    run = run_insight_batch(workers=0, chunk_size=2)
+    assert run.id == interrupted.id
+    assert run.processed == 5 and run.status == 'completed'
+    assert run.to_dict()['associations_per_second'] > 0
+
+
+def test_batch_with_process_pool(associations):
+    run = run_insight_batch(workers=2, chunk_size=3)
+    assert run.processed == 5
+    assert db.session.query(SmartInsight).count() == run.insights_created
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Tests de l'import groupé de membres (/api/members/import)"""
+import io
+
+import pytest
+
+from app import db
+from app.models.member import Member
+from app.services.member_import import ImportFileError, import_members
+
+
+def upload(client, auth_headers, content, filename='membres.csv', query=''):
+    data = {'file': (io.BytesIO(content), filename)}
+    return client.post(f'/api/members/import{query}', data=data, headers=auth_headers,
+                       content_type='multipart/form-data')
+
+
+def test_csv_import_reports_invalid_and_duplicate_rows(client, auth_headers, association):
+    db.session.add(Member(first_name='Déjà', last_name='Là', email='deja@test.com', phone='000',
+                          role='MEMBER', association_id=association.id))
+    db.session.commit()
+    content = (
+        '﻿Prénom;Nom;Email;Téléphone;Rôle\n'
+        'Aïssatou;Diallo;aissatou@test.com;770000001;president\n'
+        'Mamadou;Diop;pas-un-email;770000002;\n'
+        ';Sow;sow@test.com;770000003;\n'
+        'Awa;Ba;deja@test.com;770000004;\n'
+        'Fatou;Ndiaye;AISSATOU@test.com;770000005;\n'
+        ';;;;\n'
+        'Ousmane;Camara;ousmane@test.com;770000006;\n'
+    ).encode('utf-8')
+    response = upload(client, auth_headers, content)
+    report = response.get_json()
+    assert response.status_code == 200
+    assert report['rows'] == 6 and report['imported'] == 2 and report['rejected'] == 4
+    assert [(error['line'], error['error']) for error in report['errors']] == [
+        (3, 'Adresse email invalide'),
+        (4, 'Champs requis manquants: first_name'),
+        (5, 'Cette adresse email est déjà utilisée'),
+        (6, 'Email en double dans le fichier'),
+    ]
+
+    imported = Member.query.filter_by(email='aissatou@test.com').one()
+    assert imported.role == 'PRESIDENT' and imported.status == 'ACTIVE'
+    assert imported.association_id == association.id
+    # Insertion groupée : le texte de recherche est bien renseigné et indexé
+    assert imported.search_text == 'diallo aissatou aissatou@test.com'
+    results = client.get('/api/members/search?q=aissa', headers=auth_headers).get_json()['results']
+    assert [item['email'] for item in results] == ['aissatou@test.com']
+
+
+def test_xlsx_import(client, auth_headers, association):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['first_name', 'last_name', 'email', 'phone', 'status'])
+    sheet.append(['Hélène', 'Lefèvre', 'helene@test.com', 770000001, 'inactive'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    report = upload(client, auth_headers, buffer.getvalue(), 'membres.xlsx').get_json()
+    assert report['imported'] == 1
+    member = Member.query.filter_by(email='helene@test.com').one()
+    assert member.phone == '770000001' and member.status == 'INACTIVE'
+
+
+def test_dry_run_writes_nothing(client, auth_headers, association):
+    content = b'first_name,last_name,email,phone\nA,B,a@test.com,1\n'
+    report = upload(client, auth_headers, content, query='?dry_run=true').get_json()
+    assert report['dry_run'] is True and report['imported'] == 1
+    assert Member.query.count() == 0
+
+
+@pytest.mark.parametrize('content, filename, message', [
+    (b'nom,email\nA,a@test.com\n', 'membres.csv', 'Colonnes manquantes: first_name, phone'),
+    (b'', 'membres.csv', 'Fichier vide'),
+    (b'x', 'membres.txt', 'Format non supporté (CSV ou XLSX)'),
+    (b'pas une archive', 'membres.xlsx', 'Fichier illisible'),
+])
+def test_rejected_files(client, auth_headers, association, content, filename, message):
+    response = upload(client, auth_headers, content, filename)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith(message)
+
+
+def test_chunks_dedupe_across_file(app, association):
+    lines = ['first_name,last_name,email,phone']
+    lines += [f'P{i},N{i},m{i % 7}@test.com,{i}' for i in range(20)]
+    report = import_members(io.BytesIO('\n'.join(lines).encode()), 'csv', association.id, chunk_size=3)
+    assert report.imported == 7 and report.error_count == 13
+    assert Member.query.count() == 7
+
+
+def test_existing_emails_match_regardless_of_case(app, association):
+    db.session.add(Member(first_name='Awa', last_name='Ba', email='awa@test.com', phone='0',
+                          association_id=association.id))
+    db.session.commit()
+    content = 'first_name,last_name,email,phone\nAwa,Ba,Awa@Test.com,1\nMoussa,Sy,moussa@test.com,2\n'
+    report = import_members(io.BytesIO(content.encode()), 'csv', association.id)
+    assert report.imported == 1
+    assert [error['error'] for error in report.to_dict()['errors']] == ['Cette adresse email est déjà utilisée']
+    assert Member.query.count() == 2
+
+
+def test_import_of_many_rows_uses_few_statements(app, association, sql_statements):
+    lines = ['first_name,last_name,email,phone'] + [f'P{i},N{i},m{i}@test.com,{i}' for i in range(2500)]
+    with sql_statements() as statements:
+        report = import_members(io.BytesIO('\n'.join(lines).encode()), 'csv', association.id, chunk_size=1000)
+    assert report.imported == 2500
+    # Par lot : une recherche des emails existants et une insertion groupée
+    assert len([s for s in statements if s.lstrip().startswith('SELECT members.email')]) == 3
+    assert len([s for s in statements if s.lstrip().startswith('INSERT INTO members')]) <= 3
+
+    # Recherche des emails existants par l'index sur lower(email), sans parcours de la table
+    lookup = next(s for s in statements if s.lstrip().startswith('SELECT members.email'))
+    plan = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + lookup,
+                                                   ('x',) * lookup.count('?')).all()
+    assert any('ix_members_email_lower' in str(row) for row in plan)
+    assert not any('SCAN members' in str(row) for row in plan)
+    assert Member.query.count() == 2500
+
+
+def test_unknown_extension_raises():
+    with pytest.raises(ImportFileError):
+        import_members(io.BytesIO(b''), 'ods', 1)
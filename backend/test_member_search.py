@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests de la recherche des membres : index trigrammes, accents et autocomplétion"""
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models.member import Member, normalize_search
+from app.services.member_search import rebuild_search_index
+
+PEOPLE = [
+    ('Aïssatou', 'Diallo', 'aissatou.diallo@test.com'),
+    ('Mamadou', 'Diop', 'm.diop@test.com'),
+    ('Hélène', 'Lefèvre', 'helene@test.com'),
+    ('Ousmane', 'Sow', 'ousmane.diallo@test.com'),
+    ('Fatou', 'Ndiaye', 'fatou@test.com'),
+]
+
+
+@pytest.fixture
+def members(app, association):
+    rows = [Member(first_name=first, last_name=last, email=email, phone='000', role='MEMBER',
+                   association_id=association.id) for first, last, email in PEOPLE]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def search(client, auth_headers, q, limit=10):
+    response = client.get(f'/api/members/search?q={q}&limit={limit}', headers=auth_headers)
+    assert response.status_code == 200
+    return [item['lastName'] for item in response.get_json()['results']]
+
+
+def test_normalize_strips_accents_and_case():
+    assert normalize_search('  Hélène   LEFÈVRE ') == 'helene lefevre'
+
+
+def test_search_text_kept_in_sync(members):
+    member = members[2]
+    assert member.search_text == 'lefevre helene helene@test.com'
+    member.last_name = 'Gueye'
+    db.session.commit()
+    assert member.search_text.startswith('gueye ')
+
+
+def test_substring_search_is_accent_insensitive(client, auth_headers, members):
+    assert search(client, auth_headers, 'lefevre') == ['Lefèvre']
+    assert search(client, auth_headers, 'ÈLÈN') == ['Lefèvre']
+    assert search(client, auth_headers, 'issat') == ['Diallo']
+
+
+def test_typeahead_ranks_last_name_prefix_first(client, auth_headers, members):
+    # "diallo" : nom de famille d'Aïssatou, email d'Ousmane
+    assert search(client, auth_headers, 'dial') == ['Diallo', 'Sow']
+    # Terme court (< 3 caractères) : début de mot seulement
+    assert search(client, auth_headers, 'di') == ['Diallo', 'Diop']
+    assert search(client, auth_headers, 'di', limit=1) == ['Diallo']
+
+
+def test_all_words_must_match(client, auth_headers, members):
+    assert search(client, auth_headers, 'diallo ousmane') == ['Sow']
+    assert search(client, auth_headers, '') == []
+
+
+def test_index_follows_updates_and_deletes(client, auth_headers, members):
+    members[4].last_name = 'Touré'
+    db.session.commit()
+    assert search(client, auth_headers, 'ndiaye') == []
+    assert search(client, auth_headers, 'toure') == ['Touré']
+
+    db.session.delete(members[0])
+    db.session.commit()
+    assert search(client, auth_headers, 'dial') == ['Sow']
+
+
+def test_search_is_scoped_to_association(client, auth_headers, members, app):
+    from app.models.association import Association
+    other = Association(name='Autre', sigle='AU', email='autre@asso.com', phone='000', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(Member(first_name='Awa', last_name='Diallo', email='awa@autre.com', phone='000',
+                          role='MEMBER', association_id=other.id))
+    db.session.commit()
+    assert search(client, auth_headers, 'diallo') == ['Diallo', 'Sow']
+
+
+def test_member_list_search_uses_index(client, auth_headers, members):
+    data = client.get('/api/members/?search=Hélène', headers=auth_headers).get_json()
+    assert [item['lastName'] for item in data] == ['Lefèvre']
+
+
+def test_invalid_limit(client, auth_headers):
+    response = client.get('/api/members/search?q=ab&limit=abc', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_rebuild_restores_missing_search_text(client, auth_headers, members):
+    db.session.execute(text('UPDATE members SET search_text = NULL'))
+    db.session.commit()
+    assert search(client, auth_headers, 'diop') == []
+    assert rebuild_search_index(batch_size=2) == len(PEOPLE)
+    assert search(client, auth_headers, 'diop') == ['Diop']
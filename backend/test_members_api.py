@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Tests de la liste des membres (/api/members) : pagination par clé et champs partiels"""
+import pytest
+
+from app import db
+from app.models.member import Member
+
+LAST_NAMES = ['Diallo', 'Camara', 'Diallo', 'Ba', 'Sow', 'Camara', 'Ndiaye']
+
+
+@pytest.fixture
+def members(app, association):
+    rows = [Member(first_name=f'Prénom {i}', last_name=name, email=f'membre{i}@test.com', phone='000',
+                   role='MEMBER', status='ACTIVE' if i % 2 == 0 else 'INACTIVE', association_id=association.id)
+            for i, name in enumerate(LAST_NAMES)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def test_legacy_list_without_parameters(client, auth_headers, members):
+    response = client.get('/api/members/', headers=auth_headers)
+    data = response.get_json()
+    assert isinstance(data, list) and len(data) == len(LAST_NAMES)
+    assert set(data[0]) == set(Member.API_FIELDS)
+
+
+def test_keyset_pages_cover_all_members_in_order(client, auth_headers, members):
+    seen, cursor = [], None
+    while True:
+        url = '/api/members/?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url, headers=auth_headers).get_json()
+        assert len(page['items']) <= 3
+        seen.extend(page['items'])
+        cursor = page['next_cursor']
+        if not page['has_more']:
+            break
+
+    expected = sorted(members, key=lambda m: (m.last_name, m.id))
+    assert [item['id'] for item in seen] == [str(m.id) for m in expected]
+
+
+def test_sort_by_id_with_filter_and_total(client, auth_headers, members):
+    page = client.get('/api/members/?limit=2&sort=id&status=ACTIVE&include_total=true',
+                      headers=auth_headers).get_json()
+    assert page['total'] == 4
+    assert [item['id'] for item in page['items']] == [str(members[0].id), str(members[2].id)]
+    nxt = client.get(f"/api/members/?limit=2&sort=id&status=ACTIVE&cursor={page['next_cursor']}",
+                     headers=auth_headers).get_json()
+    assert [item['id'] for item in nxt['items']] == [str(members[4].id), str(members[6].id)]
+    assert nxt['has_more'] is False and 'total' not in nxt
+
+
+def test_sparse_fields_select_only_requested_columns(client, auth_headers, members, sql_statements):
+    with sql_statements() as statements:
+        page = client.get('/api/members/?limit=2&fields=firstName,email', headers=auth_headers).get_json()
+
+    assert all(set(item) == {'firstName', 'email'} for item in page['items'])
+    select = next(s for s in statements if 'FROM members' in s)
+    assert 'members.phone' not in select and 'members.created_at' not in select
+
+
+def test_invalid_parameters(client, auth_headers, members):
+    assert client.get('/api/members/?fields=password', headers=auth_headers).status_code == 400
+    assert client.get('/api/members/?limit=0', headers=auth_headers).status_code == 400
+    assert client.get('/api/members/?cursor=pas-un-curseur', headers=auth_headers).status_code == 400
+    cursor = client.get('/api/members/?limit=1', headers=auth_headers).get_json()['next_cursor']
+    assert client.get(f'/api/members/?limit=1&sort=id&cursor={cursor}', headers=auth_headers).status_code == 400
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests du routage des requêtes IA entre modèles"""
+from app import db
+from app.models.guidance import AIQuery
+from app.services.model_router import FAST, QUALITY, ModelRouter, classify_query
+from app.services.ollama_service import OllamaService
+
+MODELS = ['llama2', 'mistral-french']
+
+
+def make_router(**kwargs):
+    return ModelRouter(fast_model='llama2', quality_model='mistral-french', **kwargs)
+
+
+def test_classify_query():
+    assert classify_query('Comment ajouter un membre ?', {'currentPage': 'members'}) == FAST
+    assert classify_query('Comment ajouter un membre ?', {'currentPage': '/governance'}) == QUALITY
+    assert classify_query('Faut-il modifier nos statuts ?', {}) == QUALITY
+    assert classify_query(' '.join(['mot'] * 30), {}) == QUALITY
+
+
+def test_routes_by_class():
+    router = make_router()
+    assert router.route('Où voir les cotisations ?', {}, MODELS, 400) == ('llama2', FAST)
+    assert router.route('Préparer notre assemblée générale', {}, MODELS, 400) == ('mistral-french', QUALITY)
+
+
+def test_latency_slo_downgrades_to_fast_model():
+    router = make_router(latency_slo=10)
+    router.observe('mistral-french', {'tokens_per_second': 20.0})
+    assert router.route('Préparer notre assemblée générale', {}, MODELS, 400) == ('llama2', 'latency_slo')
+
+    router.observe('mistral-french', {'tokens_per_second': 200.0})
+    assert router.estimated_latency('mistral-french', 400) < 10
+    assert router.route('Préparer notre assemblée générale', {}, MODELS, 400)[0] == 'mistral-french'
+
+
+def test_unavailable_model_uses_the_other_one():
+    router = make_router()
+    model, reason = router.route('Préparer notre assemblée générale', {}, ['llama2'], 400)
+    assert (model, reason) == ('llama2', 'quality:unavailable')
+
+
+def test_service_routes_and_measures_throughput(stub_ollama):
+    stub_ollama.models = MODELS
+    router = make_router()
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, router=router)
+    service.available_models = MODELS
+
+    result = service.generate_response('Faut-il réviser nos statuts ?', {})
+
+    assert result['model_used'] == 'mistral-french'
+    assert stub_ollama.calls[-1][2]['model'] == 'mistral-french'
+    assert router.stats()['tokens_per_second'] == {'mistral-french': 50.0}
+
+    # Un modèle explicitement demandé n'est pas re-routé
+    assert service.generate_response('Bonjour', {}, model='mistral-french')['model_used'] == 'mistral-french'
+
+
+def test_model_used_is_recorded(client, auth_headers, ollama):
+    from app.services.ollama_service import get_ollama_service
+
+    get_ollama_service().check_ollama_status()  # Catalogue chargé : nom publié par /api/tags
+    response = client.post('/api/guidance/ai/query', headers=auth_headers,
+                           json={'query': 'Comment ajouter un membre ?'})
+
+    assert response.get_json()['model_used'] == 'llama2:latest'
+    assert db.session.query(AIQuery).one().model_used == 'llama2:latest'
+
+
+def test_routes_against_tagged_catalog_names(stub_ollama):
+    # /api/tags d'un vrai serveur : noms suivis de leur tag
+    tagged = ['llama2:latest', 'mistral-french:latest']
+    router = make_router(latency_slo=10)
+    assert router.route('Où voir les cotisations ?', {}, tagged, 400) == ('llama2:latest', FAST)
+    assert router.route('Préparer notre assemblée générale', {}, tagged, 400) == ('mistral-french:latest', QUALITY)
+    assert router.route('Préparer notre assemblée générale', {}, ['llama2:latest'], 400) == (
+        'llama2:latest', 'quality:unavailable')
+
+    # Débit mesuré sous le nom du catalogue : l'objectif de latence s'applique
+    router.observe('mistral-french:latest', {'tokens_per_second': 20.0})
+    assert router.route('Préparer notre assemblée générale', {}, tagged, 400) == ('llama2:latest', 'latency_slo')
+
+    stub_ollama.models = tagged
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, router=make_router())
+    service.check_ollama_status()
+    assert service.generate_response('Faut-il réviser nos statuts ?', {})['model_used'] == 'mistral-french:latest'
+    assert stub_ollama.calls[-1][2]['model'] == 'mistral-french:latest'
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests du préchargement des modèles Ollama"""
+from datetime import datetime
+
+from app.services.model_warmup import (ModelKeepAlive, parse_hours, parse_models,
+                                       warm_up_models)
+from app.services.ollama_service import OllamaService
+
+
+def make_service(url):
+    return OllamaService(url, refresh_on_init=False, keep_alive='30m')
+
+
+def test_parse_settings():
+    assert parse_models(' llama2, mistral ,') == ['llama2', 'mistral']
+    assert parse_hours('8-20') == (8, 20)
+    assert parse_hours('') is None
+
+
+def test_warm_up_loads_each_model_with_empty_prompt(stub_ollama):
+    service = make_service(stub_ollama.url)
+
+    durations = warm_up_models(service, ['llama2', 'mistral'])
+
+    assert set(durations) == {'llama2', 'mistral'}
+    assert all(duration is not None for duration in durations.values())
+    payloads = [payload for _, path, payload in stub_ollama.calls if path == '/api/generate']
+    assert [p['model'] for p in payloads] == ['llama2', 'mistral']
+    assert all(p['prompt'] == '' and p['keep_alive'] == '30m' for p in payloads)
+
+
+def test_warm_up_reports_unreachable_ollama():
+    service = make_service('http://127.0.0.1:9')
+    assert warm_up_models(service, ['llama2'], timeout=1) == {'llama2': None}
+
+
+def test_keep_alive_only_during_business_hours(stub_ollama):
+    keeper = ModelKeepAlive(make_service(stub_ollama.url), ['llama2'], hours=(8, 20))
+
+    assert keeper.in_business_hours(datetime(2024, 5, 6, 9, 30))
+    assert not keeper.in_business_hours(datetime(2024, 5, 6, 22, 0))
+    assert ModelKeepAlive(None, [], hours=None).in_business_hours(datetime(2024, 5, 6, 3, 0))
+
+
+def test_keep_alive_skips_when_circuit_open(stub_ollama):
+    from app.services.circuit_breaker import CircuitBreaker
+
+    service = make_service(stub_ollama.url)
+    service.breaker = CircuitBreaker(min_calls=1)
+    service.breaker.record_failure()
+    keeper = ModelKeepAlive(service, ['llama2'])
+
+    assert keeper.tick() is False
+    assert stub_ollama.calls == []
+
+
+def test_keep_alive_pings_models_listed_with_their_tag(stub_ollama):
+    stub_ollama.models = ['llama2:latest', 'mistral-french:7b']
+    service = make_service(stub_ollama.url)
+    service.check_ollama_status()
+    keeper = ModelKeepAlive(service, ['llama2', 'mistral-french', 'absent'])
+
+    assert keeper.tick() is True
+    payloads = [payload for _, path, payload in stub_ollama.calls if path == '/api/generate']
+    assert [p['model'] for p in payloads] == ['llama2:latest', 'mistral-french:7b']
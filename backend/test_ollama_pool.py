@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Tests du pool de serveurs Ollama"""
+from app.services.ollama_pool import OllamaBackendPool, parse_base_urls
+from app.services.ollama_service import OllamaService
+
+
+def generate_calls(server):
+    return [payload for method, path, payload in server.calls if path == '/api/generate']
+
+
+def make_service(servers, **kwargs):
+    return OllamaService(base_urls=[server.url for server in servers], refresh_on_init=False, **kwargs)
+
+
+def test_parse_base_urls():
+    assert parse_base_urls('http://a:1/, http://b:2', 'http://x') == ['http://a:1', 'http://b:2']
+    assert parse_base_urls('', 'http://x/') == ['http://x']
+
+
+def test_least_outstanding_requests():
+    pool = OllamaBackendPool(['http://a', 'http://b', 'http://c'])
+    first, second, third = pool.backends
+
+    with pool.lease(first), pool.lease(first), pool.lease(second):
+        assert pool.candidates()[0] is third
+        assert pool.candidates()[-1] is first
+    assert first.outstanding == 0
+
+
+def test_round_robin_when_idle(stub_ollama_factory):
+    servers = [stub_ollama_factory(), stub_ollama_factory()]
+    service = make_service(servers)
+    service.available_models = ['llama2']
+
+    for i in range(4):
+        service.generate_response(f'Question {i}', {})
+
+    assert [len(generate_calls(server)) for server in servers] == [2, 2]
+
+
+def test_health_check_builds_per_backend_inventory(stub_ollama_factory):
+    small, large = stub_ollama_factory(), stub_ollama_factory()
+    small.models = ['llama2']
+    large.models = ['llama2', 'mistral-french']
+    service = make_service([small, large])
+
+    assert service.check_ollama_status()
+    assert service.available_models == ['llama2', 'mistral-french']
+
+    for i in range(3):
+        service.generate_response(f'Question {i}', {}, model='mistral-french')
+    assert len(generate_calls(small)) == 0
+    assert len(generate_calls(large)) == 3
+
+
+def test_failover_to_next_healthy_backend(stub_ollama_factory):
+    broken, healthy = stub_ollama_factory(), stub_ollama_factory()
+    broken.fail_status = 500
+    service = make_service([broken, healthy])
+    service.available_models = ['llama2']
+
+    results = [service.generate_response(f'Question {i}', {}) for i in range(3)]
+
+    assert all(result['model_used'] == 'llama2' for result in results)
+    # Le serveur en panne n'est essayé qu'une fois puis écarté
+    assert len(generate_calls(broken)) == 1
+    assert len(generate_calls(healthy)) == 3
+    assert service.pool.stats()[0]['healthy'] is False
+
+
+def test_unreachable_backend_is_skipped(stub_ollama_factory):
+    healthy = stub_ollama_factory()
+    service = OllamaService(base_urls=['http://127.0.0.1:9', healthy.url], refresh_on_init=False)
+
+    assert service.check_ollama_status()
+    assert [backend['healthy'] for backend in service.pool.stats()] == [False, True]
+
+    events = list(service.stream_response('Question', {}))
+    assert events[-1]['result']['response'] == 'Réponse de test'
+    assert len(generate_calls(healthy)) == 1
+
+
+def test_backends_endpoint(app, client, auth_headers, stub_ollama_factory):
+    from app.services.ollama_service import reset_ollama_service
+
+    servers = [stub_ollama_factory(), stub_ollama_factory()]
+    reset_ollama_service()
+    app.config['OLLAMA_BASE_URLS'] = ','.join(server.url for server in servers)
+
+    response = client.get('/api/guidance/ai/backends', headers=auth_headers)
+
+    assert [backend['url'] for backend in response.get_json()['backends']] == [s.url for s in servers]
+
+
+def test_inventory_matches_tagged_model_names(stub_ollama_factory):
+    small, large = stub_ollama_factory(), stub_ollama_factory()
+    small.models = ['llama2:latest']
+    large.models = ['llama2:latest', 'mistral-french:latest']
+    service = make_service([small, large])
+    assert service.check_ollama_status()
+
+    # Demandé sans tag, servi par le seul serveur qui l'héberge
+    for i in range(3):
+        assert service.generate_response(f'Question {i}', {}, model='mistral-french')['model_used'] == \
+            'mistral-french:latest'
+    assert len(generate_calls(small)) == 0
+    assert len(generate_calls(large)) == 3
+    assert {backend.url for backend in service.pool.candidates('llama2')} == {small.url, large.url}
+
+    service.pool.forget_model(service.pool.backends[1], 'mistral-french')
+    assert service.pool.backends[1].models == ['llama2:latest']
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests du service Ollama de l'assistant IA"""
+import time
+
+from app.services.ollama_service import (OllamaService, get_ollama_service,
+                                         reset_ollama_service)
+
+
+def wait_for_models(service, timeout=2.0):
+    """Attend la fin du rafraîchissement du catalogue en arrière-plan"""
+    deadline = time.monotonic() + timeout
+    while service._models_checked_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_models_catalog_served_from_memory(stub_ollama):
+    """Le catalogue est chargé une fois puis servi depuis la mémoire"""
+    service = OllamaService(base_url=stub_ollama.url, models_ttl=300)
+    wait_for_models(service)
+
+    assert service.available_models == ['llama2:latest']
+    assert service.available_models == ['llama2:latest']
+    tags_calls = [call for call in stub_ollama.calls if call[1] == '/api/tags']
+    assert len(tags_calls) == 1
+    service.close()
+
+
+def test_generate_response_does_not_check_status(stub_ollama):
+    """Une requête IA ne déclenche plus d'appel /api/tags bloquant"""
+    service = OllamaService(base_url=stub_ollama.url)
+    wait_for_models(service)
+    stub_ollama.calls.clear()
+
+    result = service.generate_response('Comment faire un budget ?', {'currentPage': 'finance'})
+
+    assert result['response'] == 'Réponse de test'
+    assert [call[1] for call in stub_ollama.calls] == ['/api/generate']
+    service.close()
+
+
+def test_stale_catalog_refreshed_in_background(stub_ollama):
+    """Un catalogue expiré est rafraîchi sans bloquer l'appelant"""
+    service = OllamaService(base_url=stub_ollama.url, models_ttl=0)
+    wait_for_models(service)
+    stub_ollama.models = ['llama2', 'mistral:7b']
+
+    service.available_models  # déclenche le rafraîchissement
+    service._refresh_thread.join(timeout=2)
+
+    assert service.available_models[:2] == ['llama2', 'mistral:7b']
+    service.close()
+
+
+def test_unreachable_ollama_returns_fallback():
+    """Sans Ollama, la réponse de secours est renvoyée"""
+    service = OllamaService(base_url='http://127.0.0.1:9', refresh_on_init=False)
+    service.check_ollama_status()
+
+    result = service.generate_response('Question', {})
+
+    assert result['model_used'] == 'fallback'
+    service.close()
+
+
+def test_shared_service_per_worker(app, stub_ollama):
+    """get_ollama_service renvoie la même instance configurée"""
+    reset_ollama_service()
+    app.config['OLLAMA_BASE_URL'] = stub_ollama.url
+
+    first = get_ollama_service()
+    second = get_ollama_service()
+
+    assert first is second
+    assert first.base_url == stub_ollama.url
+    reset_ollama_service()
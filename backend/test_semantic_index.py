@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests de l'index sémantique des questions IA"""
+from conftest import stub_embedding
+
+from app import db
+from app.models.guidance import AIQuery
+from app.services.ollama_service import OllamaService
+from app.services.semantic_index import SemanticIndex
+
+RESULT = {'response': 'Réponse stockée', 'suggestions': [], 'related_resources': [],
+          'follow_up_questions': [], 'confidence': 0.8, 'model_used': 'llama2'}
+CONTEXT = {'currentPage': 'finances'}
+
+
+def make_index(threshold=0.8):
+    return SemanticIndex(embed=stub_embedding, threshold=threshold)
+
+
+def test_similar_question_reuses_answer():
+    index = make_index()
+    index.add('1', 'Comment préparer notre budget prévisionnel ?', CONTEXT, RESULT)
+
+    result = index.lookup('Comment préparer un budget prévisionnel', CONTEXT)
+
+    assert result['response'] == 'Réponse stockée'
+    assert result['cached'] is True
+    assert result['matched_id'] == '1'
+    assert result['similarity'] >= 0.8
+
+
+def test_unrelated_question_misses():
+    index = make_index()
+    index.add('1', 'Comment préparer notre budget prévisionnel ?', CONTEXT, RESULT)
+
+    assert index.lookup('Qui peut convoquer une assemblée générale ?', CONTEXT) is None
+    assert index.stats()['misses'] == 1
+
+
+def test_answers_are_scoped_to_context():
+    index = make_index()
+    index.add('1', 'Comment préparer notre budget ?', CONTEXT, RESULT)
+
+    assert index.lookup('Comment préparer notre budget ?', {'currentPage': 'governance'}) is None
+
+
+def test_matrix_grows_and_drops_oldest():
+    def one_hot(text):
+        return [1.0 if i == int(text) else 0.0 for i in range(200)]
+
+    index = SemanticIndex(embed=one_hot, max_entries=100)
+    for i in range(130):
+        index.add(str(i), str(i), CONTEXT, RESULT)
+
+    assert len(index) <= 100
+    assert index.lookup('129', CONTEXT)['matched_id'] == '129'
+    assert index.lookup('0', CONTEXT) is None
+
+
+def test_service_skips_generation_for_paraphrase(stub_ollama):
+    stub_ollama.models = ['llama2', 'nomic-embed-text:latest']
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, embedding_model='nomic-embed-text')
+    service.available_models = stub_ollama.models
+    service.semantic_index = make_index()
+    service.semantic_index.add('1', 'Comment faire notre budget prévisionnel ?', {}, RESULT)
+
+    result = service.generate_response('Comment faire un budget prévisionnel ?', {})
+
+    assert result['response'] == 'Réponse stockée'
+    assert not [call for call in stub_ollama.calls if call[1] == '/api/generate']
+
+
+def test_no_embedding_call_without_catalog(stub_ollama):
+    service = OllamaService(stub_ollama.url, refresh_on_init=False, embedding_model='nomic-embed-text')
+    service.semantic_index = make_index()
+    # Catalogue pas encore chargé, puis vérifié mais vide (Ollama injoignable)
+    assert not service.semantic_index_available()
+    service.available_models = []
+    assert not service.semantic_index_available()
+
+    service.available_models = ['llama2:latest']
+    service.generate_response('Comment faire un budget prévisionnel ?', {})
+    assert not [call for call in stub_ollama.calls if call[1] == '/api/embeddings']
+
+    service.available_models = ['llama2:latest', 'nomic-embed-text:latest']
+    assert service.semantic_index_available()
+
+
+def test_saved_queries_are_indexed(app, client, auth_headers, ollama):
+    from app.services.ollama_service import get_ollama_service
+
+    ollama.models = ['llama2', 'nomic-embed-text']
+    app.config.update(AI_SEMANTIC_THRESHOLD=0.8, AI_CACHE_TTL=0)
+    get_ollama_service().available_models = ollama.models
+
+    first = client.post('/api/guidance/ai/query', headers=auth_headers,
+                        json={'query': 'Comment préparer notre budget prévisionnel ?'}).get_json()
+    second = client.post('/api/guidance/ai/query', headers=auth_headers,
+                         json={'query': 'Comment préparer un budget prévisionnel'}).get_json()
+
+    assert second['response'] == first['response']
+    generations = [call for call in ollama.calls if call[1] == '/api/generate']
+    assert len(generations) == 1
+    # L'embedding calculé à la recherche est stocké avec la requête générée, pas avec la copie
+    stored = db.session.query(AIQuery).order_by(AIQuery.created_at).all()
+    assert stored[0].embedding and stored[1].embedding is None
+    embeddings = [call for call in ollama.calls if call[1] == '/api/embeddings']
+    assert len(embeddings) == 2
+
+
+def test_sync_loads_embeddings_saved_by_other_workers(app, association):
+    from app.services.semantic_index import encode_embedding, sync_from_db
+
+    db.session.add(AIQuery(id='q1', association_id=association.id, query='Comment faire un budget ?',
+                           context=CONTEXT, response='Stockée', model_used='llama2',
+                           embedding=encode_embedding(stub_embedding('Comment faire un budget ?'))))
+    db.session.commit()
+    index = make_index()
+
+    assert sync_from_db(index) == 1
+    assert sync_from_db(index) == 0
+    assert index.lookup('comment faire un budget', CONTEXT)['matched_id'] == 'q1'